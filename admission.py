@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Admission Control
+==========================
+
+Keeps the API servers responsive under overload.
+
+- ``RateLimiter`` - in-memory token buckets per key (user or tenant): a
+  steady ``rate`` of requests per second with bursts up to ``burst``.
+- ``AdmissionController`` / ``AsyncAdmissionController`` - at most
+  ``max_in_flight`` requests are processed at once. Up to ``max_queue``
+  more wait, each for at most ``queue_timeout`` seconds, for a slot.
+  Anything beyond that is turned away at once.
+
+Rejected requests get 429 with a Retry-After header instead of queueing
+behind blocking Honcho calls. Latency of admitted requests stays bounded
+(by queue_timeout plus the normal processing time) however much traffic
+arrives.
+
+Environment (see ``admission_from_env``):
+    OPENCLAW_MAX_IN_FLIGHT  - requests processed at once (default 64)
+    OPENCLAW_MAX_QUEUE      - requests waiting for a slot (default 256)
+    OPENCLAW_QUEUE_TIMEOUT  - seconds a request may wait (default 2)
+    OPENCLAW_USER_RATE      - requests/second per user (default 5, 0: off)
+    OPENCLAW_USER_BURST     - burst per user (default 20)
+    OPENCLAW_TENANT_RATE    - requests/second per tenant (default 200, 0: off)
+    OPENCLAW_TENANT_BURST   - burst per tenant (default 400)
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from metrics import REGISTRY
+
+# Header naming the tenant a request is made for
+TENANT_HEADER = "X-Tenant-ID"
+DEFAULT_TENANT = "default"
+
+# Seconds a client is asked to wait when its user's turn queue is full
+# (see keyed_executor.MailboxFull): about one chat turn
+MAILBOX_RETRY_AFTER = 1.0
+
+REJECTED = REGISTRY.counter(
+    "openclaw_rejected_requests_total",
+    "Requests turned away with 429",
+    ["reason"]
+)
+
+
+class Rejected(Exception):
+    """Raised when a request must be turned away."""
+
+    def __init__(self, reason: str, retry_after: float, message: Optional[str] = None):
+        super().__init__(message or f"Too many requests ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+        REJECTED.inc(reason)
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After value: whole seconds, at least 1."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class RateLimiter:
+    """
+    Token buckets per key.
+
+    Thread-safe. Buckets of keys that have been idle long enough to refill
+    are equivalent to new ones, so only the ``max_keys`` most recently used
+    are kept.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+            max_keys: Buckets kept before the least recently used are dropped
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+
+        # key -> (tokens, updated_at)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """
+        Take ``cost`` tokens from a key's bucket if it has them.
+
+        A cost above ``burst`` (e.g. a large batch) is taken from a full
+        bucket and charged in full: the bucket goes into debt, and the key's
+        next requests wait until the rate has paid it off.
+
+        Args:
+            key: Bucket key
+            cost: Tokens charged
+
+        Returns:
+            0 if taken, otherwise seconds until enough tokens are available
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+            needed = min(cost, self.burst)
+            if tokens >= needed:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (needed - tokens) / self.rate
+
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class _Admission:
+    """Limits shared by the thread and asyncio controllers."""
+
+    def __init__(self, max_in_flight: int = 64, max_queue: int = 256, queue_timeout: float = 2.0):
+        """
+        Initialize the controller.
+
+        Args:
+            max_in_flight: Requests processed at once
+            max_queue: Requests that may wait for a slot
+            queue_timeout: Seconds a request may wait before it is rejected
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the numbers of processing and waiting requests."""
+        return {"in_flight": self._in_flight, "queued": self._queued()}
+
+    def _queued(self) -> int:
+        raise NotImplementedError
+
+
+class AdmissionController(_Admission):
+    """
+    Bounded in-flight requests for threaded servers.
+
+    Usage:
+        admission.enter()    # raises Rejected
+        try:
+            ...
+        finally:
+            admission.exit()
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+    def enter(self) -> None:
+        """
+        Take a processing slot, waiting for one if needed.
+
+        Raises:
+            Rejected: If the queue is full or no slot freed up in time
+        """
+        with self._cond:
+            if self._in_flight < self.max_in_flight and not self._waiting:
+                self._in_flight += 1
+                return
+            if self._waiting >= self.max_queue:
+                raise Rejected("overloaded", self.queue_timeout)
+
+            self._waiting += 1
+            try:
+                admitted = self._cond.wait_for(
+                    lambda: self._in_flight < self.max_in_flight, timeout=self.queue_timeout
+                )
+            finally:
+                self._waiting -= 1
+            if not admitted:
+                raise Rejected("queue_timeout", self.queue_timeout)
+            self._in_flight += 1
+
+    def exit(self) -> None:
+        """Give a slot back."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def _queued(self) -> int:
+        return self._waiting
+
+
+class AsyncAdmissionController(_Admission):
+    """
+    Bounded in-flight requests for an asyncio server.
+
+    Must only be used from one event loop. Waiters are admitted in
+    arrival order.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._waiters: Deque[Any] = deque()
+
+    async def enter(self) -> None:
+        """
+        Take a processing slot, waiting for one if needed.
+
+        Raises:
+            Rejected: If the queue is full or no slot freed up in time
+        """
+        import asyncio  # Already loaded by any caller; slow to import up front
+
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise Rejected("overloaded", self.queue_timeout)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # exit() hands its slot straight to the waiter
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                self.exit()  # Admitted just as we gave up; pass the slot on
+            else:
+                waiter.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                raise Rejected("queue_timeout", self.queue_timeout) from None
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def exit(self) -> None:
+        """Give a slot back, or hand it to the longest waiting request."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _queued(self) -> int:
+        return len(self._waiters)
+
+
+def request_charges(user_id: Optional[str], body: Any) -> Dict[str, int]:
+    """
+    Get the users a request is for and what to charge each.
+
+    Args:
+        user_id: User named in the request's path, if any
+        body: The request's parsed JSON body, if any
+
+    Returns:
+        user_id -> tokens: 1 for a single user's request, and for a batch
+        one per item to each user with items in it
+    """
+    if user_id is not None:
+        return {user_id: 1}
+    if not isinstance(body, dict):
+        return {}
+
+    if isinstance(body.get("user_id"), str) and body["user_id"]:
+        return {body["user_id"]: 1}
+
+    charges: Dict[str, int] = {}
+    items = body.get("items")
+    for item in items if isinstance(items, list) else []:
+        item_user = item.get("user_id") if isinstance(item, dict) else None
+        if isinstance(item_user, str) and item_user:
+            charges[item_user] = charges.get(item_user, 0) + 1
+    return charges
+
+
+class Limits:
+    """
+    Per-user and per-tenant rate limits for one server.
+    """
+
+    def __init__(self, user: Optional[RateLimiter], tenant: Optional[RateLimiter]):
+        """
+        Initialize the limits.
+
+        Args:
+            user: Limiter keyed by user id (None: no per-user limit)
+            tenant: Limiter keyed by tenant (None: no per-tenant limit)
+        """
+        self.user = user
+        self.tenant = tenant
+
+    def check(self, tenant: Optional[str], charges: Dict[str, int]) -> None:
+        """
+        Charge a request to its tenant and users.
+
+        Args:
+            tenant: Tenant (None: the default tenant)
+            charges: Tokens to charge each user the request is for (see
+                     request_charges); the tenant is charged their total,
+                     and at least 1
+
+        Raises:
+            Rejected: If a bucket is empty
+        """
+        if self.tenant is not None:
+            wait = self.tenant.acquire(tenant or DEFAULT_TENANT, max(1, sum(charges.values())))
+            if wait:
+                raise Rejected("tenant_rate", wait)
+        if self.user is not None:
+            for user_id, cost in charges.items():
+                wait = self.user.acquire(user_id, cost)
+                if wait:
+                    raise Rejected("user_rate", wait)
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def limits_from_env() -> Limits:
+    """Build rate limits from the OPENCLAW_*_RATE / _BURST variables."""
+    user_rate = _env_float("OPENCLAW_USER_RATE", 5)
+    tenant_rate = _env_float("OPENCLAW_TENANT_RATE", 200)
+    return Limits(
+        RateLimiter(user_rate, _env_float("OPENCLAW_USER_BURST", 20)) if user_rate > 0 else None,
+        RateLimiter(tenant_rate, _env_float("OPENCLAW_TENANT_BURST", 400)) if tenant_rate > 0 else None,
+    )
+
+
+def admission_from_env(cls: type = AdmissionController) -> _Admission:
+    """
+    Build an admission controller from the OPENCLAW_MAX_* variables.
+
+    Args:
+        cls: AdmissionController or AsyncAdmissionController
+    """
+    admission = cls(
+        max_in_flight=int(_env_float("OPENCLAW_MAX_IN_FLIGHT", 64)),
+        max_queue=int(_env_float("OPENCLAW_MAX_QUEUE", 256)),
+        queue_timeout=_env_float("OPENCLAW_QUEUE_TIMEOUT", 2.0),
+    )
+    REGISTRY.gauge(
+        "openclaw_admission_requests",
+        "Requests being processed or waiting for a slot",
+        lambda: {(state,): count for state, count in admission.stats().items()},
+        ["state"]
+    )
+    return admission
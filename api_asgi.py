@@ -0,0 +1,684 @@
+#!/usr/bin/env python3
+"""
+OpenClaw ASGI Server
+====================
+
+Async serving mode for the OpenClaw HTTP API.
+
+Same endpoints and payloads as ``api_server.py``, served from an asyncio
+event loop through ``AsyncOpenClaw``: a turn's store and context fetch
+overlap, blocking memory and LLM calls run on a bounded thread pool, and
+a slow Honcho call holds up only the request that made it.
+
+Serve it from a single process. Each user's cached context, version tags
+(ETags), session epochs and turn order live in process memory, so a
+second process would serve the first one's users stale: old context,
+304 for changed history, history that was cleared elsewhere. To use
+several cores, run ``api_prefork.py``, which sends each user to one
+worker.
+
+Rate limits and the in-flight request bound apply as in
+``api_server.py`` (see admission.py).
+
+Endpoints:
+    GET  /health            - Health check
+    GET  /metrics           - Prometheus metrics
+    POST /chat              - Send a message
+    POST /chat/stream       - Send a message, stream the response (server-sent events)
+    POST /chat/batch        - Send messages for many users at once
+    GET  /history/<user_id> - Get conversation history
+    GET  /info/<user_id>    - Get user info
+    POST /clear/<user_id>   - Clear user history
+    WS   /ws/<user_id>      - Chat over a WebSocket (see OpenClawASGI.websocket)
+
+Usage (requires uvicorn):
+    python api_asgi.py --port 8080
+
+    # or with any ASGI server, in one process
+    uvicorn api_asgi:app --port 8080
+
+Compare with the Flask server using ``api_bench.py``.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+# Add paths
+sys.path.insert(0, '/home/faisal/.openclaw/workspace')
+
+from admission import (
+    MAILBOX_RETRY_AFTER, TENANT_HEADER, AsyncAdmissionController, Rejected,
+    admission_from_env, limits_from_env, request_charges
+)
+from keyed_executor import MailboxFull
+from main import MAX_BATCH_ITEMS, openclaw_from_env
+from metrics import CONTENT_TYPE, REGISTRY
+from openclaw_async import DEFAULT_THREADS, AsyncOpenClaw, Conversation
+from payloads import dumps, encode_json, history_options, project_messages
+from read_cache import etag_matches
+
+logger = logging.getLogger(__name__)
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 1024 * 1024
+
+Headers = List[Tuple[bytes, bytes]]
+
+# Request body not read yet
+_UNREAD = object()
+
+# Returned by WebSocket.receive_json once the client is gone
+_CLOSED = object()
+
+
+class OpenClawASGI:
+    """
+    ASGI application serving the OpenClaw API.
+
+    OpenClaw is created at lifespan startup (or on the first request, for
+    servers without lifespan support) and flushed and closed at shutdown.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any] = openclaw_from_env,
+        threads: Optional[int] = None
+    ):
+        """
+        Initialize the application.
+
+        Args:
+            factory: Creates the OpenClaw instance to serve
+            threads: Worker threads for blocking OpenClaw calls
+                     (default: see AsyncOpenClaw)
+        """
+        self.factory = factory
+        self.threads = threads
+        self.client: Optional[AsyncOpenClaw] = None
+        self.limits = limits_from_env()
+        self.admission = admission_from_env(AsyncAdmissionController)
+        self._startup_lock: Optional[asyncio.Lock] = None
+
+        self._routes = {
+            ("GET", "health"): self.health,
+            ("GET", "metrics"): self.metrics,
+            ("POST", "chat"): self.chat,
+            ("POST", "chat/stream"): self.chat_stream,
+            ("POST", "chat/batch"): self.chat_batch,
+            ("GET", "history"): self.get_history,
+            ("GET", "info"): self.get_info,
+            ("POST", "clear"): self.clear_history,
+        }
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+
+    # Endpoints
+
+    async def health(self, request: "Request") -> None:
+        """Health check endpoint."""
+        openclaw = self.client.openclaw
+        await request.json({
+            "status": "healthy",
+            "service": "openclaw",
+            "memory": openclaw.memory.name if openclaw.memory else "none",
+            "memory_stats": openclaw.memory.stats() if openclaw.memory else {},
+            "chat_queue": openclaw.queue_stats(),
+            "admission": self.admission.stats(),
+            "version": "1.0.0"
+        })
+
+    async def metrics(self, request: "Request") -> None:
+        """Prometheus metrics endpoint. See api_server.metrics."""
+        body = REGISTRY.render().encode("utf-8")
+        await request.start(200, [
+            (b"content-type", CONTENT_TYPE.encode("latin-1")),
+            (b"content-length", str(len(body)).encode()),
+        ])
+        await request.write(body, more=False)
+
+    async def chat(self, request: "Request") -> None:
+        """Chat endpoint. See api_server.chat."""
+        data = await request.body_json()
+        if not data:
+            await request.json({"error": "No data provided"}, 400)
+            return
+
+        user_id = data.get('user_id')
+        message = data.get('message')
+        if not user_id or not message:
+            await request.json({"error": "user_id and message required"}, 400)
+            return
+
+        try:
+            response = await self.client.chat(user_id, message)
+        except MailboxFull as e:
+            await self._too_many(request, Rejected("mailbox_full", MAILBOX_RETRY_AFTER, str(e)))
+            return
+        except Exception as e:
+            logger.error(f"Error in chat: {e}")
+            await request.json({"error": str(e)}, 500)
+            return
+
+        await request.json({
+            "user_id": user_id,
+            "message": message,
+            "response": response
+        })
+
+    async def chat_stream(self, request: "Request") -> None:
+        """Streaming chat endpoint (server-sent events). See api_server.chat_stream."""
+        data = await request.body_json()
+        if not data:
+            await request.json({"error": "No data provided"}, 400)
+            return
+
+        user_id = data.get('user_id')
+        message = data.get('message')
+        if not user_id or not message:
+            await request.json({"error": "user_id and message required"}, 400)
+            return
+
+        try:
+            stream = self.client.chat_stream(user_id, message)  # Reserves the turn
+        except MailboxFull as e:
+            await self._too_many(request, Rejected("mailbox_full", MAILBOX_RETRY_AFTER, str(e)))
+            return
+
+        try:
+            await request.start(200, [
+                (b"content-type", b"text/event-stream; charset=utf-8"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),  # Don't let a proxy buffer the stream
+            ])
+        except BaseException:
+            await stream.aclose()
+            raise
+
+        try:
+            chunks = []
+            async for chunk in stream:
+                chunks.append(chunk)
+                await request.write(_sse("token", {"token": chunk}))
+
+            await request.write(_sse("done", {"user_id": user_id, "response": "".join(chunks)}))
+
+        except Exception as e:
+            logger.error(f"Error in chat stream: {e}")
+            await request.write(_sse("error", {"error": str(e)}))
+        finally:
+            await stream.aclose()
+            await request.write(b"", more=False)
+
+    async def chat_batch(self, request: "Request") -> None:
+        """Batch chat endpoint. See api_server.chat_batch."""
+        data = await request.body_json()
+        items = data.get('items') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            await request.json({"error": "items required"}, 400)
+            return
+        if len(items) > MAX_BATCH_ITEMS:
+            await request.json({"error": f"At most {MAX_BATCH_ITEMS} items per batch"}, 400)
+            return
+
+        try:
+            results = await self.client.chat_batch(items)
+        except Exception as e:
+            logger.error(f"Error in batch chat: {e}")
+            await request.json({"error": str(e)}, 500)
+            return
+
+        await request.json({"results": results})
+
+    async def get_history(self, request: "Request") -> None:
+        """Conversation history endpoint (conditional). See api_server.get_history."""
+        etag = self.client.openclaw.version_tag(request.user_id)
+        if await request.not_modified(etag):
+            return
+
+        try:
+            limit = int(request.query.get("limit", 50))
+        except ValueError:
+            limit = 50  # As Flask's type=int does
+
+        try:
+            fields, clip = history_options(request.query.get("fields"), request.query.get("clip"))
+            page = await self.client.get_history_page(
+                request.user_id, limit, request.query.get("before"), request.query.get("after")
+            )
+        except ValueError as e:
+            await request.json({"error": str(e)}, 400)
+            return
+        except Exception as e:
+            logger.error(f"Error getting history: {e}")
+            await request.json({"error": str(e)}, 500)
+            return
+
+        await request.json({
+            "user_id": request.user_id,
+            **page,
+            "messages": project_messages(page["messages"], fields, clip)
+        }, etag=etag)
+
+    async def get_info(self, request: "Request") -> None:
+        """User info endpoint (conditional). See api_server.get_info."""
+        etag = self.client.openclaw.version_tag(request.user_id)
+        if await request.not_modified(etag):
+            return
+
+        try:
+            info = await self.client.get_user_info(request.user_id)
+        except Exception as e:
+            logger.error(f"Error getting info: {e}")
+            await request.json({"error": str(e)}, 500)
+            return
+
+        await request.json(info, etag=etag)
+
+    async def clear_history(self, request: "Request") -> None:
+        """Clear history endpoint. See api_server.clear_history."""
+        try:
+            success = await self.client.clear_history(request.user_id)
+        except Exception as e:
+            logger.error(f"Error clearing history: {e}")
+            await request.json({"error": str(e)}, 500)
+            return
+
+        await request.json({"success": success, "user_id": request.user_id})
+
+    async def websocket(self, socket: "WebSocket") -> None:
+        """
+        Chat over one WebSocket connection, for clients that talk
+        continuously.
+
+        The connection is bound to the user in its path and keeps the
+        user's recent context between messages (see Conversation), so a
+        message costs no HTTP request, routing or context fetch. Messages
+        are handled one at a time, in order. An idle connection is just a
+        suspended coroutine: no thread and no processing slot.
+
+        Client frames (JSON text):
+            {"message": "string", "stream": false, "id": any}
+
+        Server frames:
+            {"type": "response", "response": "string", "id": ...}
+            {"type": "token", "token": "string", "id": ...}      (stream)
+            {"type": "done", "response": "string", "id": ...}    (stream)
+            {"type": "error", "error": "string", "id": ...}
+
+        "id" is echoed when given. Rate limits and admission apply per
+        message; a rejected message gets an error frame with
+        "retry_after" and the connection stays open.
+        """
+        conversation = Conversation(socket.user_id)
+        while True:
+            data = await socket.receive_json()
+            if data is _CLOSED:
+                return
+
+            reply_id = data.get("id") if isinstance(data, dict) else None
+            message = data.get("message") if isinstance(data, dict) else None
+            if not isinstance(message, str) or not message:
+                await socket.send_json({"type": "error", "error": "message required", "id": reply_id})
+                continue
+
+            try:
+                self.limits.check(socket.tenant, {socket.user_id: 1})
+                await self.admission.enter()
+            except Rejected as e:
+                await socket.send_json({
+                    "type": "error", "error": str(e), "retry_after": e.retry_after, "id": reply_id
+                })
+                continue
+
+            try:
+                if data.get("stream"):
+                    stream = self.client.chat_stream(socket.user_id, message, conversation)
+                    try:
+                        chunks = []
+                        async for chunk in stream:
+                            chunks.append(chunk)
+                            await socket.send_json({"type": "token", "token": chunk, "id": reply_id})
+                    finally:
+                        await stream.aclose()  # Releases the user's turn even if a send failed
+                    await socket.send_json({"type": "done", "response": "".join(chunks), "id": reply_id})
+                else:
+                    response = await self.client.chat(socket.user_id, message, conversation)
+                    await socket.send_json({"type": "response", "response": response, "id": reply_id})
+
+            except MailboxFull as e:
+                if socket.closed:
+                    return
+                rejected = Rejected("mailbox_full", MAILBOX_RETRY_AFTER, str(e))
+                await socket.send_json({
+                    "type": "error", "error": str(rejected), "retry_after": rejected.retry_after,
+                    "id": reply_id
+                })
+            except Exception as e:
+                if socket.closed:
+                    return
+                logger.error(f"Error in WebSocket chat: {e}")
+                await socket.send_json({"type": "error", "error": str(e), "id": reply_id})
+            finally:
+                self.admission.exit()
+
+    # Plumbing
+
+    async def _http(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        """Route one HTTP request."""
+        request = Request(scope, receive, send)
+        path = scope["path"].strip("/")
+
+        # /history/<user_id>, /info/<user_id>, /clear/<user_id>
+        name, _, user_id = path.partition("/")
+        if name in ("history", "info", "clear") and user_id and "/" not in user_id:
+            path = name
+            request.user_id = user_id
+
+        methods = [method for method, route in self._routes if route == path]
+        if not methods:
+            await request.json({"error": "Not found"}, 404)
+            return
+        if scope["method"] not in methods:
+            await request.json({"error": "Method not allowed"}, 405)
+            return
+
+        # Monitoring stays reachable under overload
+        if path in ("health", "metrics"):
+            await self._ensure_started()
+            await self._routes[(scope["method"], path)](request)
+            return
+
+        try:
+            await self._admit(request)
+        except Rejected as e:
+            await self._too_many(request, e)
+            return
+
+        try:
+            await self._ensure_started()
+            await self._routes[(scope["method"], path)](request)
+        finally:
+            self.admission.exit()
+
+    async def _websocket(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        """Accept a WebSocket connection on /ws/<user_id> and serve it."""
+        socket = WebSocket(scope, receive, send)
+        if (await receive())["type"] != "websocket.connect":
+            return
+
+        name, _, user_id = scope["path"].strip("/").partition("/")
+        if name != "ws" or not user_id or "/" in user_id:
+            await send({"type": "websocket.close", "code": 4404})
+            return
+
+        socket.user_id = user_id
+        await self._ensure_started()
+        await send({"type": "websocket.accept"})
+        try:
+            await self.websocket(socket)
+        finally:
+            if not socket.closed:
+                socket.closed = True
+                await send({"type": "websocket.close", "code": 1000})
+
+    async def _admit(self, request: "Request") -> None:
+        """Charge a request to its tenant and users, then wait for a slot. See api_server.admit."""
+        body = None
+        if request.user_id is None and request.scope["method"] == "POST":
+            body = await request.body_json()
+
+        self.limits.check(request.header(TENANT_HEADER), request_charges(request.user_id, body))
+        await self.admission.enter()
+
+    @staticmethod
+    async def _too_many(request: "Request", rejected: Rejected) -> None:
+        """429 telling the client when to try again."""
+        await request.json({"error": str(rejected)}, 429, headers=[
+            (b"retry-after", rejected.retry_after_header.encode())
+        ])
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        """Start up and shut down with the server."""
+        while True:
+            event = await receive()
+            if event["type"] == "lifespan.startup":
+                try:
+                    await self._ensure_started()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif event["type"] == "lifespan.shutdown":
+                await self._shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _ensure_started(self) -> None:
+        """Create OpenClaw if it doesn't exist yet."""
+        if self.client is not None:
+            return
+        if self._startup_lock is None:
+            self._startup_lock = asyncio.Lock()
+
+        async with self._startup_lock:
+            if self.client is None:
+                openclaw = await asyncio.get_running_loop().run_in_executor(None, self._create)
+                self.client = AsyncOpenClaw(openclaw, max_workers=self.threads)
+                logger.info(f"✅ OpenClaw ASGI worker ready ({self.client.max_workers} threads)")
+
+    def _create(self) -> Any:
+        """Create OpenClaw and connect its memory, off the event loop."""
+        openclaw = self.factory()
+        openclaw.memory  # Connect now rather than during the first request
+        return openclaw
+
+    async def _shutdown(self) -> None:
+        """Wait for in-flight calls, then flush journaled messages."""
+        if self.client is None:
+            return
+        await self.client.close()
+        await asyncio.get_running_loop().run_in_executor(None, self.client.openclaw.close)
+        logger.info("👋 OpenClaw ASGI worker stopped")
+
+
+class Request:
+    """One HTTP request and its response channel."""
+
+    def __init__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        self.scope = scope
+        self.user_id: Optional[str] = None
+        self.query = {
+            key: values[-1]
+            for key, values in parse_qs(scope.get("query_string", b"").decode("latin-1")).items()
+        }
+        self._receive = receive
+        self._send = send
+        self._body: Any = _UNREAD
+
+    async def body_json(self) -> Any:
+        """Read the body as JSON. Returns None if it is missing, too big or invalid."""
+        if self._body is _UNREAD:
+            self._body = await self._read_json()
+        return self._body
+
+    async def _read_json(self) -> Any:
+        body = b""
+        more = True
+        while more:
+            event = await self._receive()
+            if event["type"] == "http.disconnect":
+                return None
+            body += event.get("body", b"")
+            more = event.get("more_body", False)
+            if len(body) > MAX_BODY_BYTES:
+                return None
+
+        try:
+            return json.loads(body) if body else None
+        except ValueError:
+            return None
+
+    async def start(self, status: int, headers: Headers) -> None:
+        """Send the response status and headers."""
+        await self._send({"type": "http.response.start", "status": status, "headers": headers})
+
+    async def write(self, data: bytes, more: bool = True) -> None:
+        """Send part of the response body."""
+        await self._send({"type": "http.response.body", "body": data, "more_body": more})
+
+    def header(self, name: str) -> Optional[str]:
+        """Get a request header (all values, comma-joined), or None."""
+        name_bytes = name.lower().encode("latin-1")
+        values = [
+            value.decode("latin-1")
+            for key, value in self.scope.get("headers", [])
+            if key == name_bytes
+        ]
+        return ", ".join(values) if values else None
+
+    async def not_modified(self, etag: str) -> bool:
+        """Send 304 and return True if the client already has ``etag``."""
+        if not etag_matches(self.header("if-none-match"), etag):
+            return False
+        await self.start(304, [(b"etag", etag.encode("latin-1"))])
+        await self.write(b"", more=False)
+        return True
+
+    async def json(
+        self,
+        data: Any,
+        status: int = 200,
+        etag: Optional[str] = None,
+        headers: Optional[Headers] = None
+    ) -> None:
+        """
+        Send a complete JSON response.
+
+        With ``etag``, the response is tagged for conditional requests;
+        clients may keep it but must revalidate. Tagged responses are also
+        compressed if the client accepts it, as in api_server._tagged.
+        ``headers`` are added as is.
+        """
+        if etag is None:
+            body, encoding = dumps(data), None
+        else:
+            body, encoding = encode_json(data, self.header("accept-encoding"))
+        response_headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if etag is not None:
+            if encoding is not None:
+                etag = f"W/{etag}"
+                response_headers.append((b"content-encoding", encoding.encode("latin-1")))
+            response_headers += [
+                (b"etag", etag.encode("latin-1")),
+                (b"cache-control", b"no-cache"),
+                (b"vary", b"accept-encoding"),
+            ]
+        await self.start(status, response_headers + (headers or []))
+        await self.write(body, more=False)
+
+
+class WebSocket:
+    """One WebSocket connection."""
+
+    def __init__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        self.scope = scope
+        self.user_id: Optional[str] = None
+        self.closed = False
+        self._receive = receive
+        self._send = send
+
+        headers = dict(scope.get("headers", []))
+        tenant = headers.get(TENANT_HEADER.lower().encode("latin-1"))
+        self.tenant = tenant.decode("latin-1") if tenant is not None else None
+
+    async def receive_json(self) -> Any:
+        """
+        Wait for the next message, parsed as JSON.
+
+        Returns:
+            The message (None if it isn't valid JSON), or _CLOSED once the
+            client has disconnected
+        """
+        event = await self._receive()
+        if event["type"] == "websocket.disconnect":
+            self.closed = True
+            return _CLOSED
+
+        raw = event.get("text")
+        if raw is None:
+            raw = event.get("bytes") or b""
+        if len(raw) > MAX_BODY_BYTES:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    async def send_json(self, data: Any) -> None:
+        """Send a message as JSON text."""
+        if data.get("id") is None:
+            data.pop("id", None)
+        try:
+            await self._send({"type": "websocket.send", "text": dumps(data).decode("utf-8")})
+        except Exception:
+            self.closed = True  # The client went away
+            raise
+
+
+def _sse(event: str, data: dict) -> bytes:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+# Threads come from OPENCLAW_THREADS when an ASGI server's CLI loads the app
+app = OpenClawASGI()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenClaw API server (ASGI)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--threads", type=int, default=None,
+                        help=f"Threads for blocking calls (default: $OPENCLAW_THREADS or {DEFAULT_THREADS})")
+    parser.add_argument("--graceful-timeout", type=float, default=30,
+                        help="Seconds to finish in-flight requests on shutdown")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ uvicorn is required: pip install uvicorn")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("🚀 OpenClaw API Server (ASGI)")
+    print("=" * 60)
+    print(f"\nRunning on http://localhost:{args.port}")
+    print("=" * 60)
+
+    app.threads = args.threads
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level="info",
+    )
+
+
+if __name__ == "__main__":
+    main()
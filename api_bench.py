@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+OpenClaw API Benchmark
+======================
+
+Load generator for the OpenClaw HTTP API, for comparing serving modes
+(``api_server.py`` vs ``api_asgi.py``) and configurations.
+
+Each client thread keeps one keep-alive connection and sends requests
+back to back, spread over ``--users`` distinct users.
+
+Usage:
+    # Flask server on :8080, ASGI server on :8081
+    python api_bench.py --url http://localhost:8080 --endpoint chat --concurrency 64
+    python api_bench.py --url http://localhost:8081 --endpoint chat --concurrency 64
+
+    python api_bench.py --url http://localhost:8081 --endpoint history --requests 5000
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+def _request(args: argparse.Namespace, i: int) -> Tuple[str, str, Optional[bytes]]:
+    """Build the (method, path, body) of request number ``i``."""
+    user_id = f"bench-user-{i % args.users}"
+    if args.endpoint == "chat":
+        body = json.dumps({"user_id": user_id, "message": f"Benchmark message {i}"})
+        return "POST", "/chat", body.encode()
+    if args.endpoint == "history":
+        return "GET", f"/history/{user_id}?limit=20", None
+    if args.endpoint == "info":
+        return "GET", f"/info/{user_id}", None
+    return "GET", "/health", None
+
+
+def bench(args: argparse.Namespace) -> None:
+    """Run the benchmark and print throughput and latency."""
+    url = urlsplit(args.url)
+    local = threading.local()
+
+    def connection() -> http.client.HTTPConnection:
+        if getattr(local, "conn", None) is None:
+            local.conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+        return local.conn
+
+    def one(i: int) -> Tuple[float, bool]:
+        method, path, body = _request(args, i)
+        headers = {"Content-Type": "application/json"} if body else {}
+        start = time.perf_counter()
+        try:
+            conn = connection()
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            local.conn = None  # Reconnect next time
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    def pct(values: List[float], q: float) -> float:
+        return sorted(values)[min(int(len(values) * q), len(values) - 1)] * 1000
+
+    latencies = [r[0] for r in results]
+    errors = sum(1 for r in results if not r[1])
+    print(f"{args.requests} x {args.endpoint} against {args.url}, "
+          f"concurrency {args.concurrency}, {args.users} users")
+    print(f"  throughput:  {args.requests / elapsed:.1f} req/s")
+    print(f"  latency:     p50 {pct(latencies, 0.5):.1f} ms  p99 {pct(latencies, 0.99):.1f} ms  "
+          f"mean {statistics.mean(latencies) * 1000:.1f} ms")
+    print(f"  errors:      {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenClaw API load generator")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--endpoint", choices=["chat", "history", "info", "health"], default="chat")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=100)
+    bench(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,729 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Pre-forked API Server
+==============================
+
+Multi-process mode for ``api_server.py``: one master and N worker
+processes, each serving the Flask app with its own OpenClaw.
+
+Warm-up:
+    The master imports the app, the Honcho SDK and the LLM client
+    libraries once, so forked workers start with them loaded. Each worker
+    then builds its own Honcho client and claims its own write-behind
+    journal (connection pools, locks and background threads can't be
+    shared across fork) and loads the context of the most recently active
+    users it owns, before it takes requests.
+
+User affinity:
+    Users are spread over the workers by consistent hashing. The master
+    accepts each connection, peeks at its request to find the user (the
+    path of /history, /info and /clear, the body of /chat and
+    /chat/stream) and passes the socket to that user's worker. A user's
+    cached context, session epochs, turn ordering and rate limit therefore
+    live in one worker, and are only correct there: every request for a
+    user must reach its owner.
+
+    - Peeking never blocks the master: connections wait in a selector
+      until their request (head and, for chat, body) has arrived, for up
+      to REQUEST_TIMEOUT (then 408). Clients sending ``Expect:
+      100-continue`` are told to continue. Chat bodies too large to peek
+      (PEEK_BYTES) get 413.
+    - A batch whose users all belong to one worker goes there. Any other
+      batch goes to some worker, which runs its own users' items and
+      sends the rest, one part per worker, back through the master to
+      their owners.
+    - Requests without a user (health, metrics) go round robin.
+
+    The server closes the connection after every response, so every
+    request is routed.
+
+Shutdown:
+    SIGTERM or SIGINT stops the master accepting. Workers finish their
+    in-flight requests (up to --graceful-timeout), flush their journals
+    and exit. Workers that die are restarted and own the same users.
+
+Usage:
+    python api_prefork.py --workers 4 --port 8080 --hot-users 1000
+
+Linux/macOS only (fork and socket passing).
+"""
+
+import argparse
+import hmac
+import http.client
+import json
+import logging
+import os
+import secrets
+import select
+import selectors
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+# Bytes of a request looked at to find its user
+PEEK_BYTES = 64 * 1024
+
+# Seconds a connection has to send its request before it gets 408
+REQUEST_TIMEOUT = 10.0
+
+# Seconds the master waits for workers to finish warming up
+WARM_TIMEOUT = 120.0
+
+# Seconds a worker waits for another worker's part of a batch
+FORWARD_TIMEOUT = 300.0
+
+# Routes that name their user in the path, and POST routes that carry it
+# in the JSON body
+PATH_ROUTES = ("history", "info", "clear")
+BODY_ROUTES = ("chat", "chat/stream")
+BATCH_ROUTE = "chat/batch"
+
+# Names the worker a batch part forwarded by another worker is for. Only
+# honoured together with the master's forwarding token (see
+# api_server.FORWARDED_HEADER); clients can't pick a worker.
+WORKER_HEADER = "X-OpenClaw-Worker"
+
+
+def worker_name(index: int) -> str:
+    """Ring node name of worker ``index``."""
+    return f"worker-{index}"
+
+
+def parse_request(data: bytes) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """
+    Parse the start of a raw HTTP request.
+
+    Args:
+        data: The start of the request (request line, headers, body)
+
+    Returns:
+        (method, path without slashes or query, headers with lowercase
+        names, the part of the body that arrived), or None until the whole
+        head has arrived
+    """
+    head, sep, body = data.partition(b"\r\n\r\n")
+    if not sep:
+        return None
+
+    lines = head.decode("latin-1").split("\r\n")
+    request_line = lines[0].split(" ")
+    method = request_line[0]
+    path = unquote(request_line[1].split("?", 1)[0]).strip("/") if len(request_line) > 1 else ""
+
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return method, path, headers, body
+
+
+def content_length(headers: Dict[str, str]) -> int:
+    """Get a request's Content-Length, or 0."""
+    try:
+        return max(0, int(headers.get("content-length", 0)))
+    except ValueError:
+        return 0
+
+
+def body_users(body: bytes, batch: bool) -> List[str]:
+    """
+    Get the users a chat or batch request body is for.
+
+    Args:
+        body: The complete JSON body
+        batch: True for a /chat/batch body
+
+    Returns:
+        User ids (empty for a malformed body, which the worker rejects)
+    """
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return []
+    if not isinstance(data, dict):
+        return []
+
+    items = data.get("items") if batch else [data]
+    if not isinstance(items, list):
+        return []
+    users = [item.get("user_id") for item in items if isinstance(item, dict)]
+    return [user_id for user_id in users if isinstance(user_id, str) and user_id]
+
+
+class _Pending:
+    """A connection whose request hasn't arrived in full yet."""
+
+    __slots__ = ("conn", "deadline", "continued", "owner")
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self.deadline = time.monotonic() + REQUEST_TIMEOUT
+        self.continued = False  # "100 Continue" sent
+        self.owner: Optional[int] = None  # Set while its worker can't take it
+
+
+class Master:
+    """Forks, feeds and supervises the workers."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int,
+        hot_users: int,
+        graceful_timeout: float
+    ):
+        """
+        Initialize the master.
+
+        Args:
+            host: Address to listen on
+            port: Port to listen on
+            workers: Worker processes
+            hot_users: Most recently active users to warm up, across all
+                       workers
+            graceful_timeout: Seconds workers get to finish requests on
+                              shutdown
+        """
+        from memory_shards import HashRing
+
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.hot_users = hot_users
+        self.graceful_timeout = graceful_timeout
+
+        self.ring = HashRing([worker_name(i) for i in range(workers)])
+        self._indexes = {worker_name(i): i for i in range(workers)}
+        self._listener: Optional[socket.socket] = None
+        self._pids: Dict[int, int] = {}  # pid -> worker index
+        self._channels: Dict[int, socket.socket] = {}  # worker index -> master end
+        self._round_robin = count()
+        self._stopping = False
+
+        # Connections waiting for their request to arrive
+        self._selector = selectors.DefaultSelector()
+        self._pending: Dict[socket.socket, _Pending] = {}
+        self._retrying: List[_Pending] = []  # Routed, waiting for their worker
+
+        # Marks batch parts workers pass to each other (see api_server)
+        self.token = secrets.token_hex(16)
+
+    def run(self) -> None:
+        """Warm up, fork the workers and serve until signalled."""
+        self._warm_up()
+
+        listener = self._listener = socket.create_server((self.host, self.port), backlog=2048)
+        logger.info(f"🚀 Listening on http://{self.host}:{self.port}")
+
+        for index in range(self.workers):
+            self._spawn(index)
+        self._wait_ready()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        listener.setblocking(False)
+        self._selector.register(listener, selectors.EVENT_READ)
+        while not self._stopping:
+            self._reap()
+            for key, _ in self._selector.select(0.01 if self._retrying else 0.5):
+                if key.fileobj is listener:
+                    self._accept()
+                else:
+                    self._route(key.data)
+            for pending in list(self._retrying):
+                self._dispatch(pending, pending.owner)
+            self._expire()
+
+        for pending in list(self._pending.values()):
+            self._close(pending)
+        listener.close()
+        self._shutdown()
+
+    def _stop(self, signum: int, frame) -> None:
+        self._stopping = True
+
+    def _warm_up(self) -> None:
+        """Import everything the workers use, once, before forking."""
+        start = time.perf_counter()
+
+        import api_server  # noqa: F401 - Flask, OpenClaw and their modules
+        from llm_backend import REQUESTS_AVAILABLE, _load_requests
+        from memory_backend import load_honcho
+
+        if os.environ.get("OPENCLAW_MEMORY", "honcho") != "sqlite":
+            load_honcho()
+        if REQUESTS_AVAILABLE:
+            _load_requests()
+
+        logger.info(f"✅ Warmed up in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def _spawn(self, index: int) -> None:
+        """Fork worker ``index``."""
+        ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        pid = os.fork()
+        if pid == 0:
+            ours.close()
+            for channel in self._channels.values():
+                channel.close()  # So the worker sees EOF when the master closes its end
+            for pending in self._pending.values():
+                pending.conn.close()
+            self._selector.close()
+            signal.signal(signal.SIGINT, signal.SIG_IGN)  # The master stops us
+            code = 0
+            try:
+                worker = Worker(
+                    index, self.ring, theirs, self._listener, self.token, self.graceful_timeout
+                )
+                worker.run(self.hot_users)
+            except BaseException:
+                logger.exception(f"Worker {index} failed")
+                code = 1
+            finally:
+                os._exit(code)
+
+        theirs.close()
+        ours.setblocking(False)  # A backed-up worker mustn't stall the master
+        self._channels[index] = ours
+        self._pids[pid] = index
+        logger.info(f"   Worker {index} started (pid {pid})")
+
+    def _wait_ready(self) -> None:
+        """Wait for every worker to report that it has warmed up."""
+        deadline = time.monotonic() + WARM_TIMEOUT
+        waiting = dict(self._channels)
+        while waiting and time.monotonic() < deadline:
+            ready, _, _ = select.select(list(waiting.values()), [], [], deadline - time.monotonic())
+            for index, channel in list(waiting.items()):
+                if channel in ready:
+                    try:
+                        channel.recv(1)
+                    except OSError:
+                        pass  # Died while warming up; _reap restarts it
+                    del waiting[index]
+        if waiting:
+            logger.warning(f"⚠️  Workers {sorted(waiting)} not ready; serving anyway")
+        logger.info(f"✅ {self.workers} workers serving")
+
+    def _accept(self) -> None:
+        """Take the new connections and wait for their requests."""
+        while True:
+            try:
+                conn, _ = self._listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.error(f"Accept failed: {e}")
+                return
+            conn.setblocking(False)
+            pending = self._pending[conn] = _Pending(conn)
+            self._selector.register(conn, selectors.EVENT_READ, pending)
+
+    def _route(self, pending: _Pending) -> None:
+        """Pass a connection to its worker once enough of its request has arrived."""
+        conn = pending.conn
+        try:
+            data = conn.recv(PEEK_BYTES, socket.MSG_PEEK)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._close(pending)  # Gone before sending a request
+            return
+
+        request = parse_request(data)
+        if request is None:
+            if len(data) >= PEEK_BYTES:
+                self._reply(pending, "431 Request Header Fields Too Large")
+            else:
+                self._wait_for_more(pending, len(data))
+            return
+        method, path, headers, body = request
+
+        worker = headers.get(WORKER_HEADER.lower())
+        if worker in self._indexes and path == BATCH_ROUTE and self._forwarded(headers):
+            self._dispatch(pending, self._indexes[worker])
+            return
+
+        name, _, user_id = path.partition("/")
+        if name in PATH_ROUTES and user_id and "/" not in user_id:
+            self._dispatch(pending, self._owner(user_id))
+            return
+
+        batch = path == BATCH_ROUTE
+        if method != "POST" or not (batch or path in BODY_ROUTES):
+            self._dispatch(pending, None)
+            return
+
+        length = content_length(headers)
+        if len(body) < length:
+            if len(data) < PEEK_BYTES:
+                if headers.get("expect", "").lower() == "100-continue" and not pending.continued:
+                    pending.continued = True
+                    try:
+                        conn.send(b"HTTP/1.1 100 Continue\r\n\r\n")
+                    except OSError:
+                        pass
+                self._wait_for_more(pending, len(data))
+            elif batch:
+                self._dispatch(pending, None)  # Whoever gets it splits it
+            else:
+                self._reply(pending, "413 Payload Too Large")
+            return
+
+        owners = {self._owner(user_id) for user_id in body_users(body[:length], batch)}
+        # Several owners: the receiving worker splits the batch. No user:
+        # the worker rejects the request without touching any user.
+        self._dispatch(pending, owners.pop() if len(owners) == 1 else None)
+
+    def _forwarded(self, headers: Dict[str, str]) -> bool:
+        """Check whether a request is a batch part passed on by one of our workers."""
+        import api_server
+
+        token = headers.get(api_server.FORWARDED_HEADER.lower(), "")
+        return hmac.compare_digest(token.encode("latin-1"), self.token.encode("ascii"))
+
+    def _owner(self, user_id: str) -> int:
+        """Get the index of the worker that owns a user."""
+        return self._indexes[self.ring.node_for(user_id)]
+
+    def _wait_for_more(self, pending: _Pending, received: int) -> None:
+        """Don't wake up for this connection again until more of it has arrived."""
+        try:
+            pending.conn.setsockopt(socket.SOL_SOCKET, socket.SO_RCVLOWAT, received + 1)
+        except OSError:
+            self._close(pending)
+
+    def _expire(self) -> None:
+        """Answer connections that took too long to send their request."""
+        now = time.monotonic()
+        for pending in list(self._pending.values()):
+            if pending.deadline > now:
+                continue
+            if pending.owner is None:
+                self._reply(pending, "408 Request Timeout")
+            else:
+                self._reply(pending, "503 Service Unavailable")
+
+    def _reply(self, pending: _Pending, status: str) -> None:
+        """Answer a connection with an error from the master itself, and close it."""
+        body = json.dumps({"error": status.split(" ", 1)[1]}).encode("utf-8")
+        try:
+            pending.conn.send(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+        except OSError:
+            pass
+        self._close(pending)
+
+    def _close(self, pending: _Pending) -> None:
+        """Stop waiting for a connection and close the master's copy."""
+        del self._pending[pending.conn]
+        if pending.owner is None:
+            self._selector.unregister(pending.conn)
+        else:
+            self._retrying.remove(pending)
+        pending.conn.close()
+
+    def _dispatch(self, pending: _Pending, owner: Optional[int]) -> None:
+        """
+        Pass a connection to its worker.
+
+        A user's request only ever goes to the user's worker; if that is
+        restarting or backed up, the request is retried until its
+        deadline. Others go to the next worker that takes them.
+
+        Args:
+            pending: The connection
+            owner: Index of the worker that must take it (None: any)
+        """
+        conn = pending.conn
+        if owner is None:
+            first = next(self._round_robin) % self.workers
+            candidates = [(first + offset) % self.workers for offset in range(self.workers)]
+        else:
+            candidates = [owner]
+
+        try:
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_RCVLOWAT, 1)
+        except OSError:
+            self._close(pending)
+            return
+        for index in candidates:
+            try:
+                socket.send_fds(self._channels[index], [b"c"], [conn.fileno()])
+            except (OSError, KeyError):
+                continue  # Worker restarting or backed up
+            self._close(pending)
+            return
+
+        if owner is None:
+            logger.error("No worker accepted the connection")
+            self._close(pending)
+        elif pending.owner is None:
+            self._selector.unregister(conn)
+            pending.owner = owner
+            self._retrying.append(pending)
+
+    def _reap(self) -> None:
+        """Restart workers that died. A restarted worker owns the same users."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            index = self._pids.pop(pid, None)
+            if index is None or self._stopping:
+                continue
+            logger.warning(f"⚠️  Worker {index} exited (status {status}); restarting")
+            self._channels.pop(index).close()
+            self._spawn(index)
+
+    def _shutdown(self) -> None:
+        """Let the workers drain, then make sure they're gone."""
+        logger.info("👋 Shutting down workers...")
+        for channel in self._channels.values():
+            channel.close()  # Workers stop taking connections and drain
+        for pid in self._pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self._pids and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.05)
+            else:
+                self._pids.pop(pid, None)
+
+        for pid in self._pids:
+            logger.warning(f"⚠️  Killing worker pid {pid}")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+
+class Worker:
+    """One worker process: serves connections the master passes to it."""
+
+    def __init__(
+        self,
+        index: int,
+        ring,
+        channel: socket.socket,
+        listener: socket.socket,
+        token: str,
+        graceful_timeout: float
+    ):
+        self.index = index
+        self.name = worker_name(index)
+        self.ring = ring
+        self.channel = channel
+        self.listener = listener
+        self.token = token
+        self.graceful_timeout = graceful_timeout
+
+        # Where batch parts for other workers are sent: the master
+        host, port = listener.getsockname()[:2]
+        if host in ("0.0.0.0", ""):
+            host = "127.0.0.1"
+        elif host == "::":
+            host = "::1"
+        self.address = (host, port)
+
+    def run(self, hot_users: int) -> None:
+        """
+        Warm up, then serve until the master goes away or asks us to stop.
+
+        Args:
+            hot_users: Most recently active users (across all workers) to
+                       consider; this worker loads the ones it owns
+        """
+        from werkzeug.serving import make_server
+
+        import api_server
+
+        signal.signal(signal.SIGTERM, self._stop)
+        api_server.route_batches(self.run_batch, self.token)
+
+        start = time.perf_counter()
+        openclaw = api_server.get_openclaw()  # Own Honcho client and journal
+        owned = [
+            user_id for user_id in openclaw.most_active_users(hot_users)
+            if self.ring.node_for(user_id) == self.name
+        ]
+        warmed = openclaw.warm_users(owned)
+        logger.info(
+            f"   Worker {self.index} warmed {warmed} users "
+            f"in {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+
+        host, port = self.listener.getsockname()[:2]
+        server = make_server(host, port, api_server.app, threaded=True, fd=self.listener.fileno())
+        # Connections come from the master; don't hold the port ourselves
+        server.socket.close()
+        self.listener.close()
+
+        self.channel.sendall(b"r")  # Ready
+
+        while True:
+            try:
+                _, fds, _, _ = socket.recv_fds(self.channel, 1, 1)
+            except OSError:
+                break
+            if not fds:
+                break  # Master closed the channel: stop
+            conn = socket.socket(fileno=fds[0])
+            conn.settimeout(None)
+            try:
+                address = conn.getpeername()
+            except OSError:
+                conn.close()
+                continue
+            server.process_request(conn, address)
+
+        self._drain(openclaw)
+
+    def run_batch(self, items: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Run each of a batch's items in the worker that owns its user.
+
+        This worker's users' items run here. The rest are sent through
+        the master, one part per worker, and all parts run at once.
+
+        Args:
+            items: Batch items, as given to OpenClaw.chat_batch
+
+        Returns:
+            One result per item, in order
+        """
+        import api_server
+
+        parts: Dict[str, List[int]] = {}  # worker name -> item indexes
+        for index, item in enumerate(items):
+            user_id = item.get("user_id") if isinstance(item, dict) else None
+            # Invalid items get their error here
+            owner = self.ring.node_for(user_id) if isinstance(user_id, str) and user_id else self.name
+            parts.setdefault(owner, []).append(index)
+
+        openclaw = api_server.get_openclaw()
+        if list(parts) == [self.name]:
+            return openclaw.chat_batch(items)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+        def run(owner: str) -> None:
+            part = [items[index] for index in parts[owner]]
+            if owner == self.name:
+                part_results = openclaw.chat_batch(part)
+            else:
+                part_results = self._forward(owner, part)
+            for index, result in zip(parts[owner], part_results):
+                results[index] = result
+
+        with ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix="openclaw-forward") as pool:
+            list(pool.map(run, parts))
+        return results
+
+    def _forward(self, owner: str, part: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run part of a batch in another worker.
+
+        Args:
+            owner: Worker that owns the part's users
+            part: Its items
+
+        Returns:
+            One result per item (errors if the worker couldn't run them)
+        """
+        import api_server
+
+        conn = http.client.HTTPConnection(*self.address, timeout=FORWARD_TIMEOUT)
+        try:
+            conn.request("POST", "/" + BATCH_ROUTE, json.dumps({"items": part}), {
+                "Content-Type": "application/json",
+                WORKER_HEADER: owner,
+                api_server.FORWARDED_HEADER: self.token,
+            })
+            response = conn.getresponse()
+            data = json.loads(response.read())
+            if response.status == 200:
+                return data["results"]
+            error = data.get("error") or f"HTTP {response.status}"
+        except (OSError, ValueError, KeyError, http.client.HTTPException) as e:
+            error = str(e)
+        finally:
+            conn.close()
+
+        logger.error(f"Batch part for {owner} failed: {error}")
+        return [
+            {"user_id": item["user_id"], "message": item.get("message"), "error": error}
+            for item in part
+        ]
+
+    def _stop(self, signum: int, frame) -> None:
+        """Stop taking connections; the receive loop then ends."""
+        try:
+            self.channel.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _drain(self, openclaw) -> None:
+        """Wait for in-flight requests, then flush journaled messages."""
+        import api_server
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while api_server._admission.stats()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        openclaw.close()
+        logger.info(f"   Worker {self.index} stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenClaw API server (pre-forked workers)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--hot-users", type=int, default=1000,
+                        help="Most recently active users to warm up before serving")
+    parser.add_argument("--graceful-timeout", type=float, default=30,
+                        help="Seconds to finish in-flight requests on shutdown")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork") or not hasattr(socket, "send_fds"):
+        print("❌ Pre-forked mode needs fork and socket passing (Linux/macOS)")
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO)
+
+    print("=" * 60)
+    print("🚀 OpenClaw API Server (pre-forked)")
+    print("=" * 60)
+    print(f"\nRunning on http://localhost:{args.port} ({args.workers} workers)")
+    print("=" * 60)
+
+    Master(args.host, args.port, args.workers, args.hot_users, args.graceful_timeout).run()
+
+
+if __name__ == "__main__":
+    main()
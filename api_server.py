@@ -6,11 +6,21 @@ OpenClaw API Server
 HTTP API for OpenClaw AI assistant.
 
 Endpoints:
+    GET /metrics - Prometheus metrics
     POST /chat - Send a message
+    POST /chat/stream - Send a message, stream the response (server-sent events)
+    POST /chat/batch - Send messages for many users at once
     GET /history/<user_id> - Get conversation history
     GET /info/<user_id> - Get user info
     POST /clear/<user_id> - Clear user history
 
+For chat over a WebSocket (WS /ws/<user_id>), run the ASGI server,
+api_asgi.py: it holds thousands of idle connections without a thread each.
+
+Requests are rate limited per user and per tenant (X-Tenant-ID header),
+and at most OPENCLAW_MAX_IN_FLIGHT are processed at once; the rest get 429
+with Retry-After. See admission.py for the settings.
+
 Usage:
     python api_server.py
     
@@ -21,15 +31,26 @@ Then:
 """
 
 import sys
+import hmac
 import json
 import logging
-from flask import Flask, request, jsonify
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from flask import Flask, Response, g, request, jsonify
 
 # Add paths
 sys.path.insert(0, '/home/faisal/.openclaw/workspace')
 sys.path.insert(0, '/home/faisal/.openclaw/workspace/honcho-ai/sdks/python/src')
 
-from main import OpenClaw
+from main import MAX_BATCH_ITEMS, OpenClaw, openclaw_from_env
+from keyed_executor import MailboxFull
+from read_cache import etag_matches
+from metrics import CONTENT_TYPE, REGISTRY
+from payloads import encode_json, history_options, project_messages
+from admission import (
+    MAILBOX_RETRY_AFTER, TENANT_HEADER, Rejected, admission_from_env, limits_from_env,
+    request_charges
+)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -38,21 +59,129 @@ logger = logging.getLogger(__name__)
 # Initialize Flask
 app = Flask(__name__)
 
-# Initialize OpenClaw
-openclaw = OpenClaw()
+# OpenClaw with write-behind message storage, configured from the
+# environment (see main.openclaw_from_env). Created on first use, so
+# importing this module (CLI tools, tests, worker processes before they
+# fork) doesn't pay for connecting to memory
+_openclaw = None
+_openclaw_lock = threading.Lock()
+
+
+def get_openclaw() -> OpenClaw:
+    """Get the shared OpenClaw instance, creating it on first use."""
+    global _openclaw
+    if _openclaw is None:
+        with _openclaw_lock:
+            if _openclaw is None:
+                _openclaw = openclaw_from_env()
+    return _openclaw
+
+
+# Rate limits and the in-flight request bound, from the environment
+_limits = limits_from_env()
+_admission = admission_from_env()
+
+# Monitoring stays reachable under overload
+UNLIMITED_ENDPOINTS = {'health', 'metrics'}
+
+# Pre-forked workers (api_prefork.py) run each batch item in the worker
+# that owns its user. The parts of a batch one worker passes to another
+# carry FORWARDED_HEADER with the deployment's token: they were charged
+# to their tenant and users by the worker that split the batch.
+FORWARDED_HEADER = 'X-OpenClaw-Forwarded'
+_batch_router: Optional[Callable[[List[Any]], List[Dict[str, Any]]]] = None
+_forward_token: Optional[str] = None
+
+
+def route_batches(router: Callable[[List[Any]], List[Dict[str, Any]]], token: str) -> None:
+    """
+    Run /chat/batch items through ``router`` instead of this process's
+    OpenClaw, and accept batch parts forwarded with ``token``.
+    
+    Args:
+        router: Takes the batch items, returns one result per item
+        token: Secret shared by the workers
+    """
+    global _batch_router, _forward_token
+    _batch_router = router
+    _forward_token = token
+
+
+def _forwarded() -> bool:
+    """Check whether the request is a batch part passed on by another worker."""
+    return _forward_token is not None and hmac.compare_digest(
+        request.headers.get(FORWARDED_HEADER, ''), _forward_token
+    )
+
+
+@app.before_request
+def admit():
+    """
+    Charge the request to its tenant and user, then wait for a processing
+    slot. Raises Rejected (429) instead of letting requests pile up.
+    """
+    if request.endpoint is None or request.endpoint in UNLIMITED_ENDPOINTS:
+        return
+    
+    if not _forwarded():
+        user_id = (request.view_args or {}).get('user_id')
+        body = request.get_json(silent=True) if request.method == 'POST' else None
+        # A batch charges each item to its user
+        _limits.check(request.headers.get(TENANT_HEADER), request_charges(user_id, body))
+    _admission.enter()
+    g.admitted = True
+
+
+@app.after_request
+def release_on_close(response):
+    """Free the request's slot once the response is sent (streams included)."""
+    if g.pop('admitted', False):
+        response.call_on_close(_admission.exit)
+    return response
+
+
+@app.teardown_request
+def release_on_error(exc):
+    """Free the slot of a request that never produced a response."""
+    if g.pop('admitted', False):
+        _admission.exit()
+
+
+@app.errorhandler(Rejected)
+def too_many_requests(e):
+    """429 telling the client when to try again."""
+    response = jsonify({"error": str(e)})
+    response.status_code = 429
+    response.headers["Retry-After"] = e.retry_after_header
+    return response
 
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint."""
+    openclaw = get_openclaw()
     return jsonify({
         "status": "healthy",
         "service": "openclaw",
-        "memory": "honcho",
+        "memory": openclaw.memory.name if openclaw.memory else "none",
+        "memory_stats": openclaw.memory.stats() if openclaw.memory else {},
+        "chat_queue": openclaw.queue_stats(),
+        "admission": _admission.stats(),
         "version": "1.0.0"
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus metrics: per-stage chat latency, Honcho call latency and
+    errors, turn queueing and cache size. Each worker process reports its
+    own.
+    """
+    get_openclaw()  # Registers the cache and queue gauges
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """
@@ -84,7 +213,7 @@ def chat():
             return jsonify({"error": "user_id and message required"}), 400
         
         # Get response
-        response = openclaw.chat(user_id, message)
+        response = get_openclaw().chat(user_id, message)
         
         return jsonify({
             "user_id": user_id,
@@ -92,32 +221,206 @@ def chat():
             "response": response
         })
         
+    except MailboxFull as e:
+        raise Rejected("mailbox_full", MAILBOX_RETRY_AFTER, str(e))
+        
     except Exception as e:
         logger.error(f"Error in chat: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """
+    Batch chat endpoint.
+    
+    Different users' messages are processed concurrently, each user's in
+    the order given. Items fail independently.
+    
+    Request:
+        {
+            "items": [
+                {"user_id": "string", "message": "string"},
+                ...
+            ]
+        }
+    
+    Response:
+        {
+            "results": [
+                {"user_id": "string", "message": "string", "response": "string"},
+                {"user_id": "string", "message": "string", "error": "string"},
+                ...
+            ]
+        }
+    """
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else None
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "items required"}), 400
+    
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({"error": f"At most {MAX_BATCH_ITEMS} items per batch"}), 400
+    
+    try:
+        if _batch_router is not None and not _forwarded():
+            results = _batch_router(items)
+        else:
+            results = get_openclaw().chat_batch(items)
+        return jsonify({"results": results})
+        
+    except Exception as e:
+        logger.error(f"Error in batch chat: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Streaming chat endpoint (server-sent events).
+    
+    Request:
+        {
+            "user_id": "string",
+            "message": "string"
+        }
+    
+    Response (text/event-stream):
+        event: token
+        data: {"token": "Hello "}
+        
+        ...
+        
+        event: done
+        data: {"user_id": "string", "response": "string"}
+    
+    If generation fails part way, the stream ends with an "error" event
+    instead of "done". A full turn queue is a 429, as for /chat.
+    """
+    data = request.get_json(silent=True)
+    
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+    
+    user_id = data.get('user_id')
+    message = data.get('message')
+    
+    if not user_id or not message:
+        return jsonify({"error": "user_id and message required"}), 400
+    
+    try:
+        stream = get_openclaw().chat_stream(user_id, message)  # Reserves the turn
+    except MailboxFull as e:
+        raise Rejected("mailbox_full", MAILBOX_RETRY_AFTER, str(e))
+    
+    def generate():
+        try:
+            chunks = []
+            for chunk in stream:
+                chunks.append(chunk)
+                yield _sse("token", {"token": chunk})
+            
+            yield _sse("done", {"user_id": user_id, "response": "".join(chunks)})
+            
+        except Exception as e:
+            logger.error(f"Error in chat stream: {e}")
+            yield _sse("error", {"error": str(e)})
+    
+    response = Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Don't let a proxy buffer the stream
+        }
+    )
+    response.call_on_close(stream.close)  # Gives the turn up if never streamed
+    return response
+
+
+def _not_modified(etag: str):
+    """Get a 304 response if the client already has ``etag``, else None."""
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response(status=304, headers={"ETag": etag})
+    return None
+
+
+def _tagged(payload: dict, etag: str):
+    """
+    JSON response carrying ``etag``; clients may keep it but must revalidate.
+    
+    Compressed if the client accepts gzip or deflate. A compressed body
+    gets the weak form of the tag, since it differs byte for byte.
+    """
+    body, encoding = encode_json(payload, request.headers.get('Accept-Encoding'))
+    response = Response(body, content_type="application/json")
+    response.headers["ETag"] = etag if encoding is None else f"W/{etag}"
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["Vary"] = "Accept-Encoding"
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
 @app.route('/history/<user_id>', methods=['GET'])
 def get_history(user_id):
     """
     Get conversation history.
     
+    Query:
+        limit  - page size (default 50)
+        before - cursor; get the page of older messages
+        after  - cursor; get messages newer than the page
+        fields - message fields to return, e.g. "role,content" (default all)
+        clip   - most characters of content per message; clipped messages
+                 get "truncated": true (default no limit)
+    
+    Without a cursor, returns the newest messages. Follow "before" to
+    scroll back (null once the start is reached) and "after" to catch up
+    on new messages.
+    
+    Supports conditional requests: send the ETag of a previous response
+    as If-None-Match to get 304 Not Modified, without any memory read, if
+    the user's history hasn't changed since. Large responses are gzip or
+    deflate compressed when Accept-Encoding allows.
+    
     Response:
         {
             "user_id": "string",
             "messages": [
                 {"role": "user", "content": "...", "created_at": "..."}
-            ]
+            ],
+            "before": "cursor" | null,
+            "after": "cursor" | null
         }
     """
     try:
+        openclaw = get_openclaw()
+        etag = openclaw.version_tag(user_id)
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        
         limit = request.args.get('limit', 50, type=int)
-        history = openclaw.get_history(user_id, limit)
+        fields, clip = history_options(request.args.get('fields'), request.args.get('clip'))
+        page = openclaw.get_history_page(
+            user_id, limit, request.args.get('before'), request.args.get('after')
+        )
         
-        return jsonify({
+        return _tagged({
             "user_id": user_id,
-            "messages": history
-        })
+            **page,
+            "messages": project_messages(page["messages"], fields, clip)
+        }, etag)
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
         
     except Exception as e:
         logger.error(f"Error getting history: {e}")
@@ -129,6 +432,8 @@ def get_info(user_id):
     """
     Get user info.
     
+    Supports conditional requests, like /history.
+    
     Response:
         {
             "user_id": "string",
@@ -138,8 +443,14 @@ def get_info(user_id):
         }
     """
     try:
+        openclaw = get_openclaw()
+        etag = openclaw.version_tag(user_id)
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        
         info = openclaw.get_user_info(user_id)
-        return jsonify(info)
+        return _tagged(info, etag)
         
     except Exception as e:
         logger.error(f"Error getting info: {e}")
@@ -158,7 +469,7 @@ def clear_history(user_id):
         }
     """
     try:
-        success = openclaw.clear_history(user_id)
+        success = get_openclaw().clear_history(user_id)
         
         return jsonify({
             "success": success,
@@ -176,11 +487,16 @@ if __name__ == '__main__':
     print("=" * 60)
     print("\nEndpoints:")
     print("  GET  /health           - Health check")
+    print("  GET  /metrics          - Prometheus metrics")
     print("  POST /chat             - Send message")
+    print("  POST /chat/stream      - Send message, stream response (SSE)")
+    print("  POST /chat/batch       - Send messages for many users")
     print("  GET  /history/<user>   - Get history")
     print("  GET  /info/<user>      - Get user info")
     print("  POST /clear/<user>     - Clear history")
     print("\nRunning on http://localhost:8080")
     print("=" * 60)
     
+    # Connect before serving so the first request doesn't wait for it
+    get_openclaw()
     app.run(host='0.0.0.0', port=8080, debug=False)
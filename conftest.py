@@ -0,0 +1,66 @@
+"""
+Shared test fixtures.
+
+``new_openclaw`` creates OpenClaw instances backed by a SQLite store and
+index files in a temporary directory. The test modules also run as
+scripts; their ``__main__`` blocks call each test through ``run``, which
+passes a fresh factory to the tests that take one.
+"""
+
+import inspect
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import pytest
+
+from main import OpenClaw
+from memory_backend import MemoryBackend, SQLiteBackend
+
+
+class OpenClawFactory:
+    """Creates OpenClaw instances whose files live in one directory."""
+
+    def __init__(self, tmp: Union[str, Path]):
+        self.tmp = str(tmp)
+        self._created = 0
+
+    def path(self, name: str) -> str:
+        """Get the path of a file in the test's directory."""
+        return os.path.join(self.tmp, name)
+
+    def __call__(self, memory: Optional[MemoryBackend] = None, **kwargs: Any) -> OpenClaw:
+        """
+        Create an OpenClaw.
+
+        The first instance uses memory.db, stats.json and epochs.json;
+        later ones get numbered files of their own.
+
+        Args:
+            memory: Store to use instead of a new SQLite database
+            **kwargs: Passed to OpenClaw
+        """
+        self._created += 1
+        suffix = "" if self._created == 1 else f"-{self._created}"
+        return OpenClaw(
+            memory=memory or SQLiteBackend(self.path(f"memory{suffix}.db")),
+            stats_path=self.path(f"stats{suffix}.json"),
+            epochs_path=self.path(f"epochs{suffix}.json"),
+            **kwargs
+        )
+
+
+@pytest.fixture
+def new_openclaw(tmp_path: Path) -> OpenClawFactory:
+    """Factory for OpenClaw instances with their files in tmp_path."""
+    return OpenClawFactory(tmp_path)
+
+
+def run(test: Callable[..., None]) -> None:
+    """Run a test outside pytest, giving it a new_openclaw if it takes one."""
+    if "new_openclaw" not in inspect.signature(test).parameters:
+        test()
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        test(new_openclaw=OpenClawFactory(tmp))
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Context Assembly
+=========================
+
+Token-budgeted conversation context for LLM prompts.
+
+Instead of a fixed number of recent messages, context is packed newest
+first until a token budget is spent, so one huge pasted log can't blow up
+the prompt and a run of short messages doesn't waste it. Individual
+messages longer than ``max_message_tokens`` are clipped, and an optional
+summary of older conversation gets its own slice of the budget.
+
+Token counts use the same ~4 characters per token estimate as
+``skills/output_truncate.py``; the default budget follows the memory
+injection limit in ``artifacts/reports/TOKEN_OPTIMIZATION_PLAN.md``.
+
+``summarize`` condenses a stretch of conversation into such a summary
+without an LLM call, for carrying context across session segments.
+
+Usage:
+    assembler = ContextAssembler(max_tokens=500)
+    context = assembler.assemble(messages, summary="User is building agents.")
+"""
+
+from typing import Any, Dict, List, Optional
+
+# Approximate characters per token
+CHARS_PER_TOKEN = 4
+
+# Memory injection budget (TOKEN_OPTIMIZATION_PLAN.md, section 4.3)
+DEFAULT_CONTEXT_TOKENS = 500
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in ``text``."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Clip text to about ``max_tokens`` tokens.
+
+    Args:
+        text: Text to clip
+        max_tokens: Token allowance, including the truncation marker
+
+    Returns:
+        ``text`` unchanged if it fits, otherwise its start followed by a
+        marker saying how much was cut
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    marker = f" ... [truncated {estimate_tokens(text) - max_tokens} tokens]"
+    keep = max(max_tokens * CHARS_PER_TOKEN - len(marker), 0)
+    return text[:keep] + marker
+
+
+def summarize(
+    messages: List[Dict[str, Any]],
+    previous: Optional[str] = None,
+    max_tokens: int = 100,
+    point_tokens: int = 20
+) -> Optional[str]:
+    """
+    Condense conversation into a short extractive summary.
+
+    The user's most recent messages are kept (each clipped to
+    ``point_tokens``), newest first until the budget is spent, after the
+    end of any earlier summary they continue.
+
+    Args:
+        messages: Message dicts with "role" and "content", oldest first
+        previous: Summary of the conversation before ``messages``
+        max_tokens: Budget for the whole summary
+        point_tokens: Longest any single message may be
+
+    Returns:
+        The summary, or ``previous`` if there is nothing to add
+    """
+    budget = max_tokens
+    head = ""
+    if previous:
+        # Older summaries fade out: keep the end of the previous one
+        head = previous
+        if estimate_tokens(head) > max_tokens // 2:
+            head = "..." + head[-(max_tokens // 2 * CHARS_PER_TOKEN - 3):]
+        budget -= estimate_tokens(head) + 1
+
+    budget -= estimate_tokens("User said: ")
+    points: List[str] = []
+    for msg in reversed(messages):
+        if msg["role"] != "user":
+            continue
+        point = truncate_to_tokens(msg["content"].strip(), min(point_tokens, budget))
+        cost = estimate_tokens(point) + 1  # + separator
+        if not point or cost > budget:
+            break
+        points.append(point)
+        budget -= cost
+
+    if not points:
+        return previous
+
+    points.reverse()
+    said = "User said: " + "; ".join(points)
+    return f"{head} {said}" if head else said
+
+
+class ContextAssembler:
+    """
+    Packs recent messages into a prompt context under a token budget.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = DEFAULT_CONTEXT_TOKENS,
+        max_message_tokens: int = 200,
+        summary_tokens: int = 100,
+        max_messages: int = 100
+    ):
+        """
+        Initialize the assembler.
+
+        Args:
+            max_tokens: Budget for the whole context
+            max_message_tokens: Longest any single message may be
+            summary_tokens: Budget reserved for a summary, when one is given
+            max_messages: Most recent messages considered at all
+        """
+        self.max_tokens = max_tokens
+        self.max_message_tokens = max_message_tokens
+        self.summary_tokens = summary_tokens
+        self.max_messages = max_messages
+
+    def assemble(self, messages: List[Dict[str, Any]], summary: Optional[str] = None) -> str:
+        """
+        Build a context string from messages.
+
+        Args:
+            messages: Message dicts with "role" and "content", oldest first
+            summary: Optional summary of conversation older than ``messages``
+
+        Returns:
+            "Role: content" lines, oldest first, preceded by the summary
+            if there is one, within ``max_tokens``
+        """
+        budget = self.max_tokens
+        header = ""
+        if summary:
+            header = "Summary of earlier conversation: " + summary
+            header = truncate_to_tokens(header, min(self.summary_tokens, budget))
+            budget -= estimate_tokens(header) + 1
+
+        lines: List[str] = []
+        for msg in reversed(messages[-self.max_messages:]):
+            role = "User" if msg["role"] == "user" else "Assistant"
+            line = truncate_to_tokens(
+                f"{role}: {msg['content']}",
+                min(self.max_message_tokens, budget - 1)
+            )
+            cost = estimate_tokens(line) + 1  # + newline
+            if cost > budget:
+                break
+            lines.append(line)
+            budget -= cost
+
+        lines.reverse()
+        if header:
+            lines.insert(0, header)
+        return "\n".join(lines)
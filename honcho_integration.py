@@ -3,11 +3,16 @@
 
 import sys
 import os
+import time
 sys.path.insert(0, '/home/faisal/.openclaw/workspace/honcho-ai/sdks/python/src')
 
 from honcho import Honcho
 from typing import Optional, List, Dict, Any
 
+from honcho_session import SessionRegistry, message_role, tail_messages
+from message_ingest import MessageIngestor, message_id
+from context_assembler import DEFAULT_CONTEXT_TOKENS, ContextAssembler
+
 # JWT Token for API authentication
 # Generated with admin privileges
 HONCHO_JWT_TOKEN = os.environ.get(
@@ -32,15 +37,22 @@ class OpenClawMemory:
         insights = memory.get_user_insights(user_id="faisal")
     """
     
-    def __init__(self, workspace_id: str = "openclaw"):
-        """Initialize Honcho connection with JWT authentication."""
+    def __init__(self, workspace_id: str = "openclaw", journal_path: Optional[str] = None):
+        """
+        Initialize Honcho connection with JWT authentication.
+        
+        Args:
+            workspace_id: Honcho workspace ID
+            journal_path: Enables write-behind storage through this local journal
+        """
         self.workspace_id = workspace_id
         self.honcho = Honcho(
             base_url="http://localhost:8002",
             api_key=HONCHO_JWT_TOKEN,  # JWT token used as API key
             workspace_id=workspace_id
         )
-        self._cache = {}
+        self._handles = SessionRegistry(self.honcho)
+        self._ingestor = MessageIngestor(self._handles, journal_path) if journal_path else None
     
     def store_message(self, user_id: str, message: str, metadata: Optional[Dict] = None) -> Optional[str]:
         """
@@ -52,27 +64,24 @@ class OpenClawMemory:
             metadata: Optional metadata dictionary
             
         Returns:
-            Message ID if successful, None otherwise
+            Message ID if successful, None otherwise (with write-behind
+            enabled, the journal ID the message was queued under)
         """
+        session_id = f"{user_id}-session"
+        
         try:
-            # Get or create peer (user)
-            peer = self.honcho.peer(user_id)
-            
-            # Get or create session for this user
-            session_id = f"{user_id}-session"
-            session = self.honcho.session(session_id)
-            
-            # Link peer to session
-            try:
-                session.add_peers([peer])
-            except Exception:
-                pass  # Peer already linked
-            
             # Prepare message metadata
             msg_metadata = metadata or {}
             msg_metadata["source"] = "openclaw"
             msg_metadata["timestamp"] = str(int(time.time()))
             
+            # Queue for background delivery if write-behind is enabled
+            if self._ingestor:
+                return self._ingestor.submit(user_id, session_id, message, msg_metadata)["id"]
+            
+            # Get linked peer and session handles for this user
+            peer, session = self._handles.resolve(user_id, session_id)
+            
             # Store message
             msg = peer.message(message, metadata=msg_metadata)
             result = session.add_messages([msg])
@@ -80,6 +89,7 @@ class OpenClawMemory:
             return result[0].id if result else None
             
         except Exception as e:
+            self._handles.invalidate(user_id, session_id)
             print(f"⚠️  Failed to store message: {e}")
             return None
     
@@ -96,20 +106,23 @@ class OpenClawMemory:
         """
         try:
             session_id = f"{user_id}-session"
-            session = self.honcho.session(session_id)
+            session = self._handles.session(session_id)
             
             messages = []
-            for msg in session.messages():
-                # Role is determined by peer_id - if set, it's a user message
-                role = "user" if msg.peer_id else "assistant"
+            for msg in tail_messages(session, limit):
+                # Role is determined by peer_id
+                role = message_role(msg.peer_id)
                 messages.append({
                     "role": role,
                     "content": msg.content,
                     "created_at": msg.created_at,
-                    "id": msg.id
+                    "id": message_id(msg)
                 })
             
-            return messages[-limit:]  # Return last N messages
+            if self._ingestor:
+                messages = self._ingestor.merge_pending(session_id, messages)[-limit:]
+            
+            return messages
             
         except Exception as e:
             print(f"⚠️  Failed to get history: {e}")
@@ -138,18 +151,28 @@ class OpenClawMemory:
         
         return "\n".join(formatted)
     
-    def get_context_for_prompt(self, user_id: str, limit: int = 10) -> str:
+    def get_context_for_prompt(
+        self,
+        user_id: str,
+        max_tokens: int = DEFAULT_CONTEXT_TOKENS,
+        limit: int = 100
+    ) -> str:
         """
         Get context formatted for injection into LLM prompt.
         
+        The most recent messages that fit in ``max_tokens`` are used, with
+        oversized messages clipped.
+        
         Args:
             user_id: The user identifier
-            limit: Maximum number of messages
+            max_tokens: Token budget for the conversation history
+            limit: Maximum number of messages considered
             
         Returns:
             Context string ready for prompt insertion
         """
-        history = self.get_formatted_history(user_id, limit)
+        assembler = ContextAssembler(max_tokens=max_tokens, max_messages=limit)
+        history = assembler.assemble(self.get_history(user_id, limit))
         
         if not history:
             return ""
@@ -199,11 +222,27 @@ class OpenClawMemory:
         except Exception as e:
             print(f"⚠️  Could not get user facts: {e}")
             return []
+    
+    def close(self) -> None:
+        """Flush journaled messages to Honcho and stop background work."""
+        if self._ingestor:
+            self._ingestor.close()
 
 
 # OpenClaw Integration Hook Functions
 # These functions can be called from OpenClaw's message handling
 
+# Shared by the hooks so resolved handles survive between turns
+_hook_memory: Optional[OpenClawMemory] = None
+
+
+def _get_hook_memory() -> OpenClawMemory:
+    """Get the OpenClawMemory instance shared by the hook functions."""
+    global _hook_memory
+    if _hook_memory is None:
+        _hook_memory = OpenClawMemory()
+    return _hook_memory
+
 def before_turn_inject_memory(user_id: str, current_message: str) -> str:
     """
     Hook to inject memory context before OpenClaw processes a message.
@@ -212,8 +251,8 @@ def before_turn_inject_memory(user_id: str, current_message: str) -> str:
         context = before_turn_inject_memory(user_id, message)
         prompt = context + f"User: {message}\nAssistant:"
     """
-    memory = OpenClawMemory()
-    context = memory.get_context_for_prompt(user_id, limit=10)
+    memory = _get_hook_memory()
+    context = memory.get_context_for_prompt(user_id)
     return context
 
 
@@ -224,7 +263,7 @@ def after_turn_store_memory(user_id: str, user_message: str, assistant_response:
     Usage in OpenClaw:
         after_turn_store_memory(user_id, message, response)
     """
-    memory = OpenClawMemory()
+    memory = _get_hook_memory()
     
     # Store user message
     memory.store_message(user_id, user_message, metadata)
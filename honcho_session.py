@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Honcho Session Helpers
+======================
+
+Small helpers shared by ``main.py``, ``openclaw_agent.py`` and
+``honcho_integration.py`` for talking to Honcho sessions efficiently:
+
+- ``tail_messages`` fetches a session's newest messages without scanning
+  the whole session; ``newest_first`` walks back from the newest one.
+- ``SessionRegistry`` remembers resolved peer/session handles so storing a
+  message doesn't repeat the peer, session and link setup calls.
+- ``message_role`` tells user messages from assistant messages.
+
+This module never imports the Honcho SDK itself, so it is safe to import
+even when Honcho is not installed.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from metrics import HONCHO_REQUEST_SECONDS, honcho_call
+
+logger = logging.getLogger(__name__)
+
+# Largest page size accepted by the Honcho list endpoints
+MAX_PAGE_SIZE = 100
+
+# Peer that assistant responses are stored under
+ASSISTANT_PEER_ID = "openclaw-assistant"
+
+
+def message_role(peer_id: Optional[str]) -> str:
+    """
+    Get the conversation role of a Honcho message from its peer.
+    
+    Args:
+        peer_id: Peer that sent the message
+        
+    Returns:
+        "assistant" for the assistant peer (or no peer), otherwise "user"
+    """
+    return "user" if peer_id and peer_id != ASSISTANT_PEER_ID else "assistant"
+
+
+def tail_messages(session: Any, limit: int) -> List[Any]:
+    """
+    Fetch the newest messages of a Honcho session.
+
+    Honcho is asked for the session's messages newest-first, in pages no
+    larger than ``limit``, and iteration stops as soon as ``limit`` messages
+    have been seen. The cost therefore depends on ``limit`` only, not on how
+    long the session has grown.
+
+    Older SDK builds that don't accept the ordering hint fall back to a
+    forward scan that keeps only the last ``limit`` messages in memory.
+
+    Args:
+        session: Honcho session handle
+        limit: Maximum number of messages to return
+
+    Returns:
+        Up to ``limit`` messages, oldest first
+    """
+    if limit <= 0:
+        return []
+
+    with honcho_call("messages"):
+        try:
+            page = session.messages(reverse=True, size=min(limit, MAX_PAGE_SIZE))
+        except TypeError:
+            logger.debug("Honcho SDK has no reverse paging, scanning session")
+            return list(deque(session.messages(), maxlen=limit))
+
+        newest = list(islice(page, limit))
+    newest.reverse()
+    return newest
+
+
+def newest_first(session: Any) -> Iterator[Any]:
+    """
+    Iterate over a Honcho session's messages from the newest back.
+
+    Pages are fetched as iteration proceeds, so stopping early costs only
+    the pages seen. Older SDK builds without reverse paging fall back to
+    reading the whole session first.
+
+    Args:
+        session: Honcho session handle
+
+    Yields:
+        Messages, newest first
+    """
+    try:
+        messages = session.messages(reverse=True, size=MAX_PAGE_SIZE)
+    except TypeError:
+        logger.debug("Honcho SDK has no reverse paging, scanning session")
+        messages = reversed(list(session.messages()))
+    yield from messages
+
+
+class SessionRegistry:
+    """
+    Cache of resolved Honcho peer and session handles.
+
+    The first message stored for a (user, session) pair resolves the peer,
+    resolves the session and links them. Later messages reuse the handles,
+    so a steady-state store is a single ``add_messages`` request. Entries
+    expire after ``ttl`` seconds and can be dropped explicitly when a store
+    fails or a session is retired.
+
+    Usage:
+        registry = SessionRegistry(honcho)
+        peer, session = registry.resolve("faisal", "faisal-session")
+        session.add_messages([peer.message("Hello!")])
+    """
+
+    def __init__(self, client: Any, ttl: float = 300.0, max_entries: int = 10000):
+        """
+        Initialize the registry.
+
+        Args:
+            client: Honcho client used to resolve handles
+            ttl: Seconds before a handle is resolved again
+            max_entries: Handles kept before the oldest are dropped
+        """
+        self.client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._linked: Dict[Tuple[str, str], Tuple[float, Any, Any]] = {}
+        self._sessions: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, user_id: str, session_id: str) -> Tuple[Any, Any]:
+        """
+        Get a peer and session handle that are linked to each other.
+
+        Args:
+            user_id: Peer identifier
+            session_id: Session identifier
+
+        Returns:
+            Tuple of (peer, session)
+        """
+        key = (user_id, session_id)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._linked.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1], entry[2]
+
+        with honcho_call("peer"):
+            peer = self.client.peer(user_id)
+        session = self.session(session_id)
+        try:
+            # Not counted as an error when it fails; see below
+            with HONCHO_REQUEST_SECONDS.time("add_peers"):
+                session.add_peers([peer])
+        except Exception as e:
+            # Honcho rejects re-linking an existing member
+            logger.debug(f"Peer {user_id} not linked to {session_id}: {e}")
+
+        with self._lock:
+            self._linked[key] = (now + self.ttl, peer, session)
+            self._prune(self._linked, now)
+        return peer, session
+
+    def session(self, session_id: str) -> Any:
+        """
+        Get a session handle for reading.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            Honcho session handle
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._sessions.get(session_id)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        with honcho_call("session"):
+            session = self.client.session(session_id)
+        with self._lock:
+            self._sessions[session_id] = (now + self.ttl, session)
+            self._prune(self._sessions, now)
+        return session
+
+    def invalidate(self, user_id: Optional[str] = None, session_id: Optional[str] = None) -> None:
+        """
+        Drop cached handles so they are resolved again on next use.
+
+        With no arguments, everything is dropped.
+
+        Args:
+            user_id: Drop handles for this peer
+            session_id: Drop handles for this session
+        """
+        with self._lock:
+            if user_id is None and session_id is None:
+                self._linked.clear()
+                self._sessions.clear()
+                return
+
+            for key in list(self._linked):
+                if (user_id is None or key[0] == user_id) and (session_id is None or key[1] == session_id):
+                    del self._linked[key]
+            if session_id is not None:
+                self._sessions.pop(session_id, None)
+
+    def _prune(self, entries: Dict[Any, Tuple], now: float) -> None:
+        """Keep ``entries`` within max_entries. Caller must hold the lock."""
+        if len(entries) <= self.max_entries:
+            return
+
+        for key in [key for key, entry in entries.items() if entry[0] <= now]:
+            del entries[key]
+        while len(entries) > self.max_entries:
+            del entries[next(iter(entries))]
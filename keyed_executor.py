@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Keyed Executor
+=======================
+
+Per-user turn ordering for the chat pipeline.
+
+Each key (user) has a mailbox of callers waiting to take their turn.
+Turns for one key run strictly one at a time, in arrival order; turns for
+different keys don't wait for each other at all. A turn runs on the
+caller's own thread or event loop, so there are no dispatcher threads and
+parallelism across users is whatever the server already provides.
+
+Mailboxes are bounded: a caller arriving when ``max_depth`` turns are
+already queued for its key gets ``MailboxFull`` straight away instead of
+piling up behind them. Queueing delay is recorded for ``stats()``.
+
+Usage:
+    turns = KeyedExecutor(max_depth=16)
+
+    with turns.turn("faisal"):          # threads
+        ...
+
+    async with turns.aturn("faisal"):   # asyncio
+        ...
+
+    place = turns.reserve("faisal")     # Queue now (MailboxFull now)...
+    with place:                         # ...take the turn later
+        ...
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Turns that may wait for one key before callers are turned away
+DEFAULT_MAX_DEPTH = 16
+
+# Queueing delay samples kept for percentiles
+DELAY_WINDOW = 1024
+
+
+class MailboxFull(Exception):
+    """Raised when too many turns are already queued for a key."""
+
+
+class _Waiter:
+    """One caller waiting in a mailbox, woken from any thread."""
+
+    def __init__(self, loop: Any = None):
+        self.enqueued = time.perf_counter()
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.future = loop.create_future()
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class Reservation:
+    """
+    A caller's place in a key's mailbox, from ``KeyedExecutor.reserve``.
+
+    Use it once, as a context manager (``with`` or ``async with``,
+    matching how it was reserved) that waits for and holds the turn, or
+    ``cancel()`` it. A reservation dropped unused gives its place up when
+    it is collected.
+    """
+
+    def __init__(self, executor: "KeyedExecutor", key: str, waiter: _Waiter):
+        self._executor = executor
+        self._key = key
+        self._waiter = waiter
+        self._released = False
+
+    def __enter__(self) -> None:
+        try:
+            self._waiter.event.wait()
+        except BaseException:
+            self.cancel()
+            raise
+        self._executor._started(self._waiter)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.cancel()
+
+    async def __aenter__(self) -> None:
+        try:
+            await self._waiter.future
+        except BaseException:
+            self.cancel()
+            raise
+        self._executor._started(self._waiter)
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.cancel()
+
+    def cancel(self) -> None:
+        """Leave the mailbox (passing the turn on if it was held). Idempotent."""
+        if not self._released:
+            self._released = True
+            self._executor._release(self._key, self._waiter)
+
+    def __del__(self) -> None:
+        self.cancel()
+
+
+class ReservedStream(Iterator[T]):
+    """
+    Iterator over a generator that enters ``reservation`` when started.
+
+    Closing it gives the reservation up even if the generator never
+    started (closing an unstarted generator runs none of its code).
+    """
+
+    def __init__(self, stream: Iterator[T], reservation: Reservation):
+        self._stream = stream
+        self._reservation = reservation
+
+    def __next__(self) -> T:
+        return next(self._stream)
+
+    def close(self) -> None:
+        self._stream.close()
+        self._reservation.cancel()
+
+
+class AsyncReservedStream(AsyncIterator[T]):
+    """Async counterpart of ReservedStream, closed with ``aclose()``."""
+
+    def __init__(self, stream: AsyncIterator[T], reservation: Reservation):
+        self._stream = stream
+        self._reservation = reservation
+
+    async def __anext__(self) -> T:
+        return await self._stream.__anext__()
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._reservation.cancel()
+
+
+class KeyedExecutor:
+    """
+    Serializes turns per key while running different keys in parallel.
+
+    Thread-safe; threads and event loops may take turns on the same key.
+    """
+
+    def __init__(self, max_depth: int = DEFAULT_MAX_DEPTH):
+        """
+        Initialize the executor.
+
+        Args:
+            max_depth: Most turns queued per key, including the running one
+        """
+        self.max_depth = max_depth
+
+        # key -> waiters; the first one holds the turn
+        self._mailboxes: Dict[str, Deque[_Waiter]] = {}
+        self._lock = threading.Lock()
+
+        self._turns = 0
+        self._rejected = 0
+        self._delays: Deque[float] = deque(maxlen=DELAY_WINDOW)
+
+    @contextmanager
+    def turn(self, key: str) -> Iterator[None]:
+        """
+        Hold the turn for ``key``, blocking the thread until it is free.
+
+        Args:
+            key: Key to serialize on (a user id)
+
+        Raises:
+            MailboxFull: If max_depth turns are already queued for the key
+        """
+        with self.reserve(key):
+            yield
+
+    @asynccontextmanager
+    async def aturn(self, key: str) -> AsyncIterator[None]:
+        """
+        Hold the turn for ``key``, awaiting it without blocking the loop.
+
+        Args:
+            key: Key to serialize on (a user id)
+
+        Raises:
+            MailboxFull: If max_depth turns are already queued for the key
+        """
+        import asyncio  # Already loaded by any caller; slow to import up front
+
+        async with self.reserve(key, asyncio.get_running_loop()):
+            yield
+
+    def reserve(self, key: str, loop: Any = None) -> Reservation:
+        """
+        Queue for ``key``'s turn now, to wait for and hold it later.
+
+        Lets a caller turn a request away before starting its response,
+        e.g. a stream whose turn is only taken once it is consumed.
+
+        Args:
+            key: Key to serialize on (a user id)
+            loop: Event loop that will wait for the turn (None: a thread)
+
+        Returns:
+            The reservation; enter it to take the turn
+
+        Raises:
+            MailboxFull: If max_depth turns are already queued for the key
+        """
+        return Reservation(self, key, self._enqueue(key, _Waiter(loop)))
+
+    def depth(self, key: str) -> int:
+        """Get the number of turns running or queued for a key."""
+        with self._lock:
+            return len(self._mailboxes.get(key, ()))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queueing statistics.
+
+        Returns:
+            Dict of active_keys, queued (turns waiting behind another),
+            turns, rejected, and wait_p50_ms / wait_p99_ms over the last
+            DELAY_WINDOW turns
+        """
+        with self._lock:
+            samples = sorted(self._delays)
+            queued = sum(len(mailbox) - 1 for mailbox in self._mailboxes.values())
+            active = len(self._mailboxes)
+            turns, rejected = self._turns, self._rejected
+
+        def pct(q: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(int(len(samples) * q), len(samples) - 1)] * 1000, 3)
+
+        return {
+            "active_keys": active,
+            "queued": queued,
+            "turns": turns,
+            "rejected": rejected,
+            "wait_p50_ms": pct(0.5),
+            "wait_p99_ms": pct(0.99),
+        }
+
+    def _enqueue(self, key: str, waiter: _Waiter) -> _Waiter:
+        """Add a waiter to the key's mailbox, waking it if the key is idle."""
+        with self._lock:
+            mailbox = self._mailboxes.setdefault(key, deque())
+            if len(mailbox) >= self.max_depth:
+                self._rejected += 1
+                raise MailboxFull(f"{len(mailbox)} turns already queued for {key}")
+            mailbox.append(waiter)
+            if len(mailbox) == 1:
+                waiter.wake()
+        return waiter
+
+    def _started(self, waiter: _Waiter) -> None:
+        """Record how long a turn waited."""
+        delay = time.perf_counter() - waiter.enqueued
+        with self._lock:
+            self._turns += 1
+            self._delays.append(delay)
+
+    def _release(self, key: str, waiter: _Waiter) -> None:
+        """
+        Leave the mailbox, passing the turn on if this waiter held it.
+
+        Also called for waiters that gave up before their turn came
+        (e.g. a cancelled task).
+        """
+        with self._lock:
+            mailbox = self._mailboxes[key]
+            held = mailbox[0] is waiter
+            mailbox.remove(waiter)
+            if not mailbox:
+                del self._mailboxes[key]
+            elif held:
+                mailbox[0].wake()
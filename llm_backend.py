@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+OpenClaw LLM Backends
+=====================
+
+Pluggable response generation for OpenClaw.
+
+``LLMBackend`` is the interface: ``generate()`` returns a whole response
+and ``stream()`` yields it in chunks. ``OpenRouterBackend`` implements it
+for OpenRouter and any other OpenAI-compatible chat completions API:
+
+- One persistent keep-alive connection pool, so turns don't pay a TCP and
+  TLS handshake each
+- Bounded concurrency (callers wait for a free slot)
+- Connect/read timeouts on every request
+- Retries with exponential backoff and full jitter on connection errors,
+  timeouts, 429 and 5xx responses
+
+For offline benchmarking, point a backend at ``llm_stub_server.py``.
+
+Usage:
+    backend = OpenRouterBackend(api_key="sk-or-...")
+    backend.generate([{"role": "user", "content": "Hello!"}])
+    for chunk in backend.stream([{"role": "user", "content": "Hello!"}]):
+        print(chunk, end="")
+
+Environment (see ``backend_from_env``):
+    OPENROUTER_API_KEY   - enables the OpenRouter backend
+    OPENCLAW_LLM_URL     - base URL (default https://openrouter.ai/api/v1)
+    OPENCLAW_LLM_MODEL   - model name
+"""
+
+import importlib.util
+import json
+import logging
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# requests is slow to import, so it is only loaded when a backend first
+# sends a request (see _load_requests)
+requests = None
+REQUESTS_AVAILABLE = importlib.util.find_spec("requests") is not None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+DEFAULT_MODEL = "openai/gpt-4o-mini"
+
+# Responses worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _load_requests():
+    """Import requests into this module on first use."""
+    global requests
+    if requests is None:
+        import requests as _requests
+        requests = _requests
+    return requests
+
+
+class LLMError(Exception):
+    """Raised when a backend can't produce a response."""
+
+
+class LLMBackend(ABC):
+    """
+    Interface for response generation backends.
+
+    Messages are OpenAI-style dicts: {"role": "system" | "user" |
+    "assistant", "content": "..."}. Subclasses must implement ``generate``.
+    """
+
+    @abstractmethod
+    def generate(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Generate a complete response.
+
+        Args:
+            messages: Conversation, oldest first
+
+        Returns:
+            Response text
+        """
+
+    def stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """
+        Generate a response incrementally.
+
+        Backends without native streaming yield the whole response at once.
+
+        Args:
+            messages: Conversation, oldest first
+
+        Yields:
+            Response text chunks
+        """
+        yield self.generate(messages)
+
+    def close(self) -> None:
+        """Release connections and other resources."""
+
+
+class OpenRouterBackend(LLMBackend):
+    """
+    OpenAI-compatible chat completions client with a pooled session.
+
+    Thread-safe; share one instance across all request handlers.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = DEFAULT_MODEL,
+        base_url: str = DEFAULT_BASE_URL,
+        max_concurrency: int = 16,
+        timeout: Tuple[float, float] = (3.05, 60.0),
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            api_key: Bearer token (not needed for local servers)
+            model: Model name sent with every request
+            base_url: API root; "/chat/completions" is appended
+            max_concurrency: Requests allowed in flight at once (also the
+                             connection pool size)
+            timeout: (connect, read) timeouts in seconds
+            max_retries: Retries after the first attempt
+            backoff: Base delay for exponential backoff, in seconds
+            max_backoff: Longest delay between attempts, in seconds
+            max_tokens: Response length cap
+            temperature: Sampling temperature
+        """
+        if not REQUESTS_AVAILABLE:
+            raise LLMError("OpenRouterBackend requires the 'requests' package")
+
+        self.model = model
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        # One keep-alive pool shared by every request, created on first use
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def generate(self, messages: List[Dict[str, str]]) -> str:
+        """Generate a complete response. See LLMBackend.generate."""
+        with self._slots:
+            response = self._post(self._payload(messages, stream=False), stream=False)
+            try:
+                data = response.json()
+                return data["choices"][0]["message"]["content"] or ""
+            except (ValueError, KeyError, IndexError) as e:
+                raise LLMError(f"Unexpected completion response: {e}") from e
+            finally:
+                response.close()
+
+    def stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Stream response chunks as they arrive. See LLMBackend.stream."""
+        with self._slots:
+            response = self._post(self._payload(messages, stream=True), stream=True)
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue  # Blank separators and ": keep-alive" comments
+
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        # Keep reading to the end of the body so the
+                        # connection goes back to the pool
+                        continue
+
+                    try:
+                        delta = json.loads(data)["choices"][0].get("delta", {})
+                    except (ValueError, KeyError, IndexError) as e:
+                        raise LLMError(f"Unexpected stream chunk: {e}") from e
+                    if delta.get("content"):
+                        yield delta["content"]
+            except requests.RequestException as e:
+                raise LLMError(f"Stream interrupted: {e}") from e
+            finally:
+                response.close()
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        if self._session is not None:
+            self._session.close()
+
+    def _get_session(self) -> "requests.Session":
+        """Get the pooled session, creating it on first use."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    from requests.adapters import HTTPAdapter
+
+                    session = _load_requests().Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=self.max_concurrency,
+                        max_retries=0
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    session.headers.update({
+                        "Content-Type": "application/json",
+                        "X-Title": "OpenClaw",
+                    })
+                    if self.api_key:
+                        session.headers["Authorization"] = f"Bearer {self.api_key}"
+                    self._session = session
+        return self._session
+
+    def _payload(self, messages: List[Dict[str, str]], stream: bool) -> Dict[str, Any]:
+        """Build a chat completions request body."""
+        payload: Dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+        }
+        if self.max_tokens is not None:
+            payload["max_tokens"] = self.max_tokens
+        if self.temperature is not None:
+            payload["temperature"] = self.temperature
+        return payload
+
+    def _post(self, payload: Dict[str, Any], stream: bool) -> "requests.Response":
+        """POST with retries. Returns a successful response."""
+        session = self._get_session()
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            try:
+                response = session.post(
+                    self.url, json=payload, timeout=self.timeout, stream=stream
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last:
+                    raise LLMError(f"LLM request failed: {e}") from e
+                self._sleep(attempt, None)
+                continue
+
+            if response.status_code in RETRY_STATUSES and not last:
+                retry_after = response.headers.get("Retry-After")
+                response.close()
+                logger.warning(f"LLM returned {response.status_code}, retrying")
+                self._sleep(attempt, retry_after)
+                continue
+
+            if response.status_code >= 400:
+                body = response.text[:200]
+                response.close()
+                raise LLMError(f"LLM returned {response.status_code}: {body}")
+
+            return response
+
+        raise LLMError("LLM request failed")  # Unreachable
+
+    def _sleep(self, attempt: int, retry_after: Optional[str]) -> None:
+        """Wait before retrying: full jitter, at least any Retry-After."""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.max_backoff))
+            except ValueError:
+                pass  # HTTP-date form; jitter is good enough
+        time.sleep(delay)
+
+
+def backend_from_env() -> Optional[LLMBackend]:
+    """
+    Build a backend from environment variables.
+
+    Returns:
+        An OpenRouterBackend if OPENROUTER_API_KEY or OPENCLAW_LLM_URL is
+        set, otherwise None
+    """
+    api_key = os.environ.get("OPENROUTER_API_KEY")
+    base_url = os.environ.get("OPENCLAW_LLM_URL")
+    if not api_key and not base_url:
+        return None
+
+    if not REQUESTS_AVAILABLE:
+        logger.error("LLM backend configured but 'requests' is not installed")
+        return None
+
+    return OpenRouterBackend(
+        api_key=api_key,
+        model=os.environ.get("OPENCLAW_LLM_MODEL", DEFAULT_MODEL),
+        base_url=base_url or DEFAULT_BASE_URL,
+    )
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+OpenClaw LLM Stub Server
+========================
+
+Local stand-in for an OpenAI-compatible chat completions API, for
+benchmarking OpenClaw's generation path offline.
+
+It answers POST /v1/chat/completions (and /api/v1/chat/completions)
+after an emulated time-to-first-token, then emits tokens at an emulated
+rate. Streaming requests get server-sent events over a chunked,
+keep-alive HTTP/1.1 connection, like the real API.
+
+Usage:
+    # Serve on :8090
+    python llm_stub_server.py serve --port 8090 --first-token-ms 300 --token-ms 20
+
+    # Point OpenClaw at it
+    OPENCLAW_LLM_URL=http://localhost:8090/v1 python main.py
+
+    # Benchmark OpenRouterBackend against an in-process stub
+    python llm_stub_server.py bench --requests 500 --concurrency 32 --stream
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded server sized for benchmark connection counts."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients closing idle keep-alive connections is normal
+        pass
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Chat completions handler. Timing comes from the server attributes."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive
+
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/api/v1/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            messages = request["messages"]
+        except (ValueError, KeyError):
+            self._send_json(400, {"error": {"message": "invalid request"}})
+            return
+
+        tokens = self._tokens(messages)
+        time.sleep(self.server.first_token_ms / 1000)
+
+        if request.get("stream"):
+            self._stream(request, tokens)
+        else:
+            time.sleep(self.server.token_ms * (len(tokens) - 1) / 1000)
+            self._send_json(200, {
+                "id": "stub",
+                "object": "chat.completion",
+                "model": request.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+            })
+
+    def _tokens(self, messages: List[dict]) -> List[str]:
+        """Build a reply of response_tokens words echoing the last message."""
+        last = str(messages[-1].get("content", "")) if messages else ""
+        words = (f"Stub reply to: {last}".split() or ["ok"]) * self.server.response_tokens
+        words = words[:self.server.response_tokens]
+        return [word + " " for word in words[:-1]] + [words[-1]]
+
+    def _stream(self, request: dict, tokens: List[str]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.server.token_ms / 1000)
+            chunk = {
+                "id": "stub",
+                "object": "chat.completion.chunk",
+                "model": request.get("model", "stub"),
+                "choices": [{"index": 0, "delta": {"content": token}}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text: str) -> None:
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+
+def make_server(
+    port: int = 8090,
+    first_token_ms: float = 300,
+    token_ms: float = 20,
+    response_tokens: int = 40
+) -> StubServer:
+    """
+    Create a stub server (not yet serving).
+
+    Args:
+        port: Port to listen on (0 picks a free one)
+        first_token_ms: Emulated time to first token
+        token_ms: Emulated delay between tokens
+        response_tokens: Tokens per response
+
+    Returns:
+        The server; call serve_forever() to run it
+    """
+    server = StubServer(("127.0.0.1", port), StubHandler)
+    server.first_token_ms = first_token_ms
+    server.token_ms = token_ms
+    server.response_tokens = response_tokens
+    return server
+
+
+def bench(args: argparse.Namespace) -> None:
+    """Drive OpenRouterBackend against an in-process stub and report latency."""
+    from llm_backend import OpenRouterBackend
+
+    server = make_server(0, args.first_token_ms, args.token_ms, args.response_tokens)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    backend = OpenRouterBackend(
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        model="stub",
+        max_concurrency=args.concurrency,
+    )
+    messages = [{"role": "user", "content": "benchmark"}]
+
+    def one(_):
+        start = time.perf_counter()
+        if args.stream:
+            first = None
+            for _chunk in backend.stream(messages):
+                first = first or time.perf_counter()
+        else:
+            backend.generate(messages)
+            first = time.perf_counter()
+        return first - start, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    def pct(values: List[float], q: float) -> float:
+        return sorted(values)[min(int(len(values) * q), len(values) - 1)] * 1000
+
+    ttfb = [r[0] for r in results]
+    total = [r[1] for r in results]
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"{'streaming' if args.stream else 'blocking'}")
+    print(f"  throughput:  {args.requests / elapsed:.1f} req/s")
+    print(f"  first byte:  p50 {pct(ttfb, 0.5):.1f} ms  p99 {pct(ttfb, 0.99):.1f} ms")
+    print(f"  total:       p50 {pct(total, 0.5):.1f} ms  p99 {pct(total, 0.99):.1f} ms  "
+          f"mean {statistics.mean(total) * 1000:.1f} ms")
+
+    backend.close()
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible LLM stub server")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("serve", "bench"):
+        p = sub.add_parser(name)
+        p.add_argument("--first-token-ms", type=float, default=300)
+        p.add_argument("--token-ms", type=float, default=20)
+        p.add_argument("--response-tokens", type=int, default=40)
+
+    sub.choices["serve"].add_argument("--port", type=int, default=8090)
+    sub.choices["bench"].add_argument("--requests", type=int, default=200)
+    sub.choices["bench"].add_argument("--concurrency", type=int, default=16)
+    sub.choices["bench"].add_argument("--stream", action="store_true")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server = make_server(args.port, args.first_token_ms, args.token_ms, args.response_tokens)
+        print(f"🧪 LLM stub listening on http://localhost:{args.port}/v1")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Stopped")
+    else:
+        bench(args)
+
+
+if __name__ == "__main__":
+    main()
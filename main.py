@@ -21,11 +21,16 @@ Or as a module:
 """
 
 import os
-import sys
 import json
+import base64
+import time
+import atexit
 import logging
-from typing import Optional, Dict, List, Any
-from datetime import datetime
+import threading
+import weakref
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Any, Iterator, Tuple
 from pathlib import Path
 
 # Setup logging
@@ -35,15 +40,66 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Add Honcho SDK to path
-sys.path.insert(0, '/home/faisal/.openclaw/workspace/honcho-ai/sdks/python/src')
+from honcho_session import ASSISTANT_PEER_ID
+from memory_backend import (
+    MEMORY_DIR, HonchoBackend, MemoryBackend, SQLiteBackend, load_honcho as _load_honcho
+)
+from memory_shards import shards_from_env
+from message_ingest import DEFAULT_JOURNAL_PATH, claim_journal
+from message_cache import MessageCache
+from user_stats import STATS_DIR, UserStatsIndex
+from session_epochs import EPOCHS_DIR, SessionEpochs
+from keyed_executor import DEFAULT_MAX_DEPTH, KeyedExecutor, Reservation, ReservedStream
+from read_cache import DEFAULT_TTL, ReadCache
+from single_flight import SingleFlight
+from metrics import CHAT_STAGE_SECONDS, CHAT_TURNS, REGISTRY
+from llm_backend import LLMBackend, backend_from_env
+from context_assembler import DEFAULT_CONTEXT_TOKENS, ContextAssembler, summarize
+
+
+# System prompt sent with every LLM request
+SYSTEM_PROMPT = (
+    "You are OpenClaw, a helpful AI assistant with persistent memory. "
+    "Use the previous conversation to give personal, context-aware answers."
+)
+
+# Most messages accepted in one chat_batch call
+MAX_BATCH_ITEMS = 100
+
+# Users whose batched messages are processed at the same time
+BATCH_WORKERS = 16
+
+# Largest history page
+MAX_HISTORY_PAGE = 1000
+
+
+def encode_cursor(epoch: int, segment: int, message_id: str) -> str:
+    """Build an opaque history cursor pointing at one message."""
+    raw = json.dumps([epoch, segment, message_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
 
-try:
-    from honcho import Honcho
-    HONCHO_AVAILABLE = True
-except ImportError as e:
-    logger.error(f"Failed to import Honcho: {e}")
-    HONCHO_AVAILABLE = False
+def decode_cursor(cursor: str) -> Tuple[int, int, str]:
+    """
+    Read a history cursor.
+    
+    Args:
+        cursor: Cursor from encode_cursor
+        
+    Returns:
+        (epoch, segment, message_id)
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        epoch, segment, message_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(epoch, int) or not isinstance(segment, int) or not isinstance(message_id, str):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return epoch, segment, message_id
 
 
 class OpenClaw:
@@ -72,43 +128,167 @@ class OpenClaw:
         self,
         honcho_url: str = "http://localhost:8002",
         honcho_key: str = "openclaw-local-dev",
-        workspace: str = "openclaw"
+        workspace: str = "openclaw",
+        cache_max_bytes: int = 16 * 1024 * 1024,
+        cache_messages_per_user: int = 200,
+        handle_ttl: float = 300.0,
+        journal_path: Optional[str] = None,
+        stats_path: Optional[str] = None,
+        epochs_path: Optional[str] = None,
+        segment_messages: Optional[int] = 200,
+        segment_idle: Optional[float] = 4 * 3600,
+        memory: Optional[MemoryBackend] = None,
+        sqlite_path: Optional[str] = None,
+        llm: Optional[LLMBackend] = None,
+        context_tokens: int = DEFAULT_CONTEXT_TOKENS,
+        message_tokens: int = 200,
+        turn_queue_depth: int = DEFAULT_MAX_DEPTH,
+        read_cache_ttl: float = DEFAULT_TTL
     ):
         """
         Initialize OpenClaw.
         
+        Construction is cheap: the memory store is connected, and the
+        Honcho SDK imported, on first use.
+        
         Args:
             honcho_url: Honcho API URL
             honcho_key: Honcho API key
             workspace: Workspace ID for isolation
+            cache_max_bytes: Memory budget for the recent-message cache
+            cache_messages_per_user: Recent messages cached per user
+            handle_ttl: Seconds to reuse resolved peer/session handles
+            journal_path: Enables write-behind storage through this local
+                          journal; messages are batched to Honcho in the
+                          background instead of on the chat path
+            stats_path: User statistics index file
+                        (default ~/.openclaw/stats/<workspace>.json)
+            epochs_path: Session epoch registry file
+                         (default ~/.openclaw/epochs/<workspace>.json)
+            segment_messages: Messages per session segment before a new
+                              one is started (None: no limit)
+            segment_idle: Seconds of inactivity after which a user's next
+                          message starts a new segment (None: no limit)
+            memory: Conversation store to use instead of Honcho
+            sqlite_path: Database for the SQLite store used when Honcho is
+                         unavailable (default ~/.openclaw/memory/<workspace>.db)
+            llm: Response generation backend (default: configured from
+                 OPENROUTER_API_KEY / OPENCLAW_LLM_URL, else a local
+                 template responder)
+            context_tokens: Token budget for conversation context per turn
+            message_tokens: Longest a single context message may be, in tokens
+            turn_queue_depth: Turns that may wait for one user before
+                              further messages are rejected with MailboxFull
+            read_cache_ttl: Seconds history and info results are reused
+                            while the user doesn't change (0: off)
         """
         logger.info("🚀 Initializing OpenClaw...")
         
         self.honcho_url = honcho_url
         self.honcho_key = honcho_key
         self.workspace = workspace
+        self.handle_ttl = handle_ttl
+        self.journal_path = journal_path
+        self.sqlite_path = sqlite_path
+        
+        # Memory store, connected on first use unless one was given
+        self._memory = memory
+        self._memory_ready = memory is not None
+        self._memory_lock = threading.Lock()
+        
+        # Response generation
+        self.llm = llm or backend_from_env()
+        if self.llm:
+            logger.info(f"   ✅ LLM backend: {type(self.llm).__name__}")
+        else:
+            logger.warning("   ⚠️  No LLM configured - using template responses")
+        
+        # Conversation context packed into a token budget
+        self._context = ContextAssembler(
+            max_tokens=context_tokens,
+            max_message_tokens=message_tokens
+        )
         
-        # Initialize Honcho
-        if HONCHO_AVAILABLE:
+        # Per-user message counts, updated as messages are stored
+        self._stats = UserStatsIndex(stats_path or STATS_DIR / f"{workspace}.json")
+        
+        # Current session per user; clearing history starts a new epoch,
+        # and long or idle conversations continue in a new segment
+        self._epochs = SessionEpochs(
+            epochs_path or EPOCHS_DIR / f"{workspace}.json",
+            max_messages=segment_messages,
+            idle_timeout=segment_idle
+        )
+        
+        # One turn at a time per user, any number of users at once
+        self._turns = KeyedExecutor(max_depth=turn_queue_depth)
+        
+        # Version tags per user and short-lived history/info results
+        self._read_cache = ReadCache(ttl=read_cache_ttl)
+        
+        # Concurrent identical memory reads share one call
+        self._reads = SingleFlight()
+        
+        # Recent messages per user, so hot users skip the store on reads
+        self._message_cache = MessageCache(
+            max_bytes=cache_max_bytes,
+            messages_per_user=cache_messages_per_user
+        )
+        
+        # Closed at exit and read by /metrics, without being kept alive;
+        # an instance collected unclosed still saves its indexes
+        _instances.add(self)
+        self._finalizer = weakref.finalize(self, _save_indexes, self._stats, self._epochs)
+        
+        logger.info("✅ OpenClaw ready!")
+    
+    @property
+    def memory(self) -> Optional[MemoryBackend]:
+        """The conversation store (None if none is available), connected on first use."""
+        if not self._memory_ready:
+            with self._memory_lock:
+                if not self._memory_ready:
+                    self._memory = self._connect_memory()
+                    self._memory_ready = True
+        return self._memory
+    
+    def _connect_memory(self) -> Optional[MemoryBackend]:
+        """
+        Create the default memory store.
+        
+        Honcho is used if its SDK loads; otherwise a local SQLite database,
+        rather than running without memory.
+        
+        Returns:
+            The store, or None if neither could be set up
+        """
+        Honcho = _load_honcho()
+        if Honcho is not None:
             try:
-                self.memory = Honcho(
-                    base_url=honcho_url,
-                    api_key=honcho_key,
-                    workspace_id=workspace
+                memory = HonchoBackend(
+                    Honcho(
+                        base_url=self.honcho_url,
+                        api_key=self.honcho_key,
+                        workspace_id=self.workspace
+                    ),
+                    handle_ttl=self.handle_ttl,
+                    journal_path=self.journal_path
                 )
-                logger.info(f"   ✅ Connected to Honcho at {honcho_url}")
-                logger.info(f"   ✅ Workspace: {workspace}")
+                logger.info(f"   ✅ Connected to Honcho at {self.honcho_url}")
+                logger.info(f"   ✅ Workspace: {self.workspace}")
+                if self.journal_path:
+                    logger.info(f"   ✅ Write-behind journal: {self.journal_path}")
+                return memory
             except Exception as e:
                 logger.error(f"   ❌ Failed to connect to Honcho: {e}")
-                self.memory = None
-        else:
-            logger.warning("   ⚠️  Honcho not available - running without memory")
-            self.memory = None
-        
-        # Message cache for quick access
-        self._message_cache: Dict[str, List[Dict]] = {}
         
-        logger.info("✅ OpenClaw ready!")
+        logger.warning("   ⚠️  Honcho not available - using local SQLite memory")
+        try:
+            return SQLiteBackend(self.sqlite_path or MEMORY_DIR / f"{self.workspace}.db")
+        except Exception as e:
+            logger.error(f"   ❌ Failed to open SQLite memory: {e}")
+            logger.warning("   ⚠️  Running without memory")
+            return None
     
     def chat(self, user_id: str, message: str) -> str:
         """
@@ -118,7 +298,10 @@ class OpenClaw:
         1. Stores the user message
         2. Retrieves conversation context
         3. Generates a context-aware response
-        4. Returns the response
+        4. Stores and returns the response
+        
+        Concurrent calls for the same user take turns, in arrival order;
+        calls for different users run in parallel.
         
         Args:
             user_id: Unique user identifier
@@ -127,66 +310,280 @@ class OpenClaw:
         Returns:
             Assistant's response
             
+        Raises:
+            MailboxFull: If too many turns are already queued for the user
+            
         Example:
             >>> openclaw = OpenClaw()
             >>> openclaw.chat("user1", "I love Python")
             "That's great! Python is a powerful language for automation."
         """
         logger.info(f"💬 Message from {user_id}: {message[:50]}...")
+        CHAT_TURNS.inc("chat")
         
-        # Store user message
-        self._store_message(user_id, message)
-        
-        # Get context
-        context = self._get_context(user_id)
-        
-        # Generate response
-        response = self._generate_response(user_id, message, context)
+        with CHAT_STAGE_SECONDS.time("turn"), self._take_turn(user_id):
+            # Store user message
+            self.store_message(user_id, message)
+            
+            # Get context
+            context = self._get_context(user_id)
+            
+            # Generate response
+            response = self.generate_response(user_id, message, context)
+            
+            # Store response
+            self.store_message(user_id, response, role="assistant")
         
         logger.info(f"🤖 Response: {response[:50]}...")
         
         return response
     
-    def _store_message(self, user_id: str, message: str) -> None:
+    def chat_stream(self, user_id: str, message: str) -> Iterator[str]:
         """
-        Store a message in Honcho memory.
+        Process a user message and stream the response as it is generated.
+        
+        Same pipeline as chat(), but response chunks are yielded as soon as
+        the generation backend produces them. The complete response is
+        stored once the stream finishes; a stream abandoned part way
+        stores nothing.
+        
+        The user's turn is reserved when this is called, so a full turn
+        queue is reported before any response is sent, and held from the
+        first chunk until the stream ends. Close the stream if it may not
+        be consumed, to give the turn up.
+        
+        Args:
+            user_id: Unique user identifier
+            message: User's message
+            
+        Returns:
+            Iterator over response text chunks
+            
+        Raises:
+            MailboxFull: If too many turns are already queued for the user
+            
+        Example:
+            >>> for chunk in openclaw.chat_stream("user1", "Hello!"):
+            ...     print(chunk, end="", flush=True)
+        """
+        logger.info(f"💬 Message from {user_id} (streaming): {message[:50]}...")
+        
+        start = time.perf_counter()
+        reservation = self.reserve_turn(user_id)
+        CHAT_TURNS.inc("stream")
+        return ReservedStream(self._stream_turn(user_id, message, reservation, start), reservation)
+    
+    def _stream_turn(
+        self,
+        user_id: str,
+        message: str,
+        reservation: Reservation,
+        start: float
+    ) -> Iterator[str]:
+        """Run a streaming turn once its reserved turn comes. See chat_stream."""
+        with reservation:
+            CHAT_STAGE_SECONDS.observe(time.perf_counter() - start, "queue")
+            self.store_message(user_id, message)
+            context = self._get_context(user_id)
+            
+            chunks = []
+            start = time.perf_counter()
+            for chunk in self.generate_stream(user_id, message, context):
+                if not chunks:
+                    CHAT_STAGE_SECONDS.observe(time.perf_counter() - start, "first_token")
+                chunks.append(chunk)
+                yield chunk
+            
+            response = "".join(chunks)
+            self.store_message(user_id, response, role="assistant")
+        
+        logger.info(f"🤖 Streamed response: {response[:50]}...")
+    
+    def chat_batch(
+        self,
+        items: List[Dict[str, Any]],
+        max_workers: int = BATCH_WORKERS
+    ) -> List[Dict[str, Any]]:
+        """
+        Process messages for many users at once.
+        
+        Different users' messages are processed concurrently; one user's
+        messages are processed one after another, in the order given, so
+        each sees the previous one in its context. A failing item doesn't
+        stop the others.
+        
+        Args:
+            items: {"user_id": ..., "message": ...} dicts
+            max_workers: Users processed at the same time
+            
+        Returns:
+            One result per item, in order: {"user_id", "message",
+            "response"}, or {"user_id", "message", "error"} if it failed
+        """
+        results, groups = self.batch_groups(items)
+        
+        def run(user_id: str) -> None:
+            for index, message in groups[user_id]:
+                try:
+                    response = self.chat(user_id, message)
+                    results[index] = {"user_id": user_id, "message": message, "response": response}
+                except Exception as e:
+                    logger.error(f"Error in batch chat for {user_id}: {e}")
+                    results[index] = {"user_id": user_id, "message": message, "error": str(e)}
+        
+        if groups:
+            workers = min(max_workers, len(groups))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="openclaw-batch") as pool:
+                list(pool.map(run, groups))
+        
+        return results
+    
+    @staticmethod
+    def batch_groups(
+        items: List[Dict[str, Any]]
+    ) -> Tuple[List[Optional[Dict[str, Any]]], Dict[str, List[Tuple[int, str]]]]:
+        """
+        Validate batch items and group them by user.
+        
+        Args:
+            items: Batch items
+            
+        Returns:
+            (results, groups): results has an error entry for each invalid
+            item and None elsewhere; groups maps each user to the
+            (index, message) pairs of their valid items, in order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        groups: Dict[str, List[Tuple[int, str]]] = {}
+        
+        for index, item in enumerate(items):
+            user_id = item.get("user_id") if isinstance(item, dict) else None
+            message = item.get("message") if isinstance(item, dict) else None
+            if not isinstance(user_id, str) or not isinstance(message, str) or not user_id or not message:
+                results[index] = {
+                    "user_id": user_id,
+                    "message": message,
+                    "error": "user_id and message required"
+                }
+                continue
+            groups.setdefault(user_id, []).append((index, message))
+        
+        return results, groups
+    
+    @contextmanager
+    def _take_turn(self, user_id: str) -> Iterator[None]:
+        """Hold the user's turn, recording how long it took to get it."""
+        start = time.perf_counter()
+        with self._turns.turn(user_id):
+            CHAT_STAGE_SECONDS.observe(time.perf_counter() - start, "queue")
+            yield
+    
+    def reserve_turn(self, user_id: str, loop: Any = None) -> Reservation:
+        """
+        Queue for a user's turn now, to wait for and hold it later.
+        
+        The steps of a turn (store_message, recent_messages, build_context,
+        generate_response, ...) are public so that other interfaces, like
+        AsyncOpenClaw, can run them; they expect the caller to hold the
+        user's turn, which this gets.
+        
+        Args:
+            user_id: User identifier
+            loop: Event loop that will wait for the turn (None: a thread)
+            
+        Returns:
+            The reservation; enter it (with or async with) to take the turn
+            
+        Raises:
+            MailboxFull: If too many turns are already queued for the user
+        """
+        return self._turns.reserve(user_id, loop)
+    
+    def store_message(
+        self,
+        user_id: str,
+        message: str,
+        role: str = "user"
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Store a message in memory.
+        
+        Caller holds the user's turn.
         
         Args:
             user_id: User identifier
             message: Message content
+            role: "user" or "assistant"
+            
+        Returns:
+            The stored message dict, or None if it wasn't stored
         """
         if not self.memory:
             logger.debug("Memory not available, skipping storage")
-            return
+            return None
+        
+        # Segments only ever start on a user message, never mid-turn
+        if role == "user":
+            self._maybe_rotate(user_id)
+        
+        session_id = self._epochs.session_id(user_id)
+        peer_id = user_id if role == "user" else ASSISTANT_PEER_ID
         
         try:
-            # Get or create peer
-            peer = self.memory.peer(user_id)
+            with CHAT_STAGE_SECONDS.time("store"):
+                record = self.memory.add_message(peer_id, session_id, message)
+            logger.debug(f"Stored {role} message for {user_id}")
             
-            # Get or create session
-            session_id = f"{user_id}-session"
-            session = self.memory.session(session_id)
-            
-            # Link peer to session
-            try:
-                session.add_peers([peer])
-            except Exception:
-                pass  # Already linked
-            
-            # Store message
-            session.add_messages([peer.message(message)])
-            logger.debug(f"Stored message for {user_id}")
+            self._epochs.record(user_id)
+            self._message_cache.append(user_id, record)
+            self._stats.record(user_id, record["created_at"])
+            self._read_cache.bump(user_id)
+            return record
             
         except Exception as e:
             logger.error(f"Failed to store message: {e}")
+            return None
     
-    def _get_context(self, user_id: str, limit: int = 10) -> str:
+    def _maybe_rotate(self, user_id: str) -> None:
+        """
+        Start a new session segment for a user if the current one is due.
+        
+        The closing segment is condensed into a summary that is carried
+        over, and the user's cache is reset to the new, empty segment.
+        
+        Args:
+            user_id: User identifier
+        """
+        segment = self._epochs.due(user_id)
+        if segment is None:
+            return
+        
+        try:
+            messages = self.recent_messages(user_id, self._context.max_messages)
+        except Exception as e:
+            logger.error(f"Failed to read segment for summary: {e}")
+            messages = []
+        
+        summary = summarize(
+            messages,
+            previous=self._epochs.summary(user_id),
+            max_tokens=self._context.summary_tokens
+        )
+        if self._epochs.rotate(user_id, segment, summary):
+            self._message_cache.warm(user_id, [], complete=True)
+            self._read_cache.bump(user_id)
+            logger.info(f"Started session segment {segment + 1} for {user_id}")
+    
+    def _get_context(self, user_id: str) -> str:
         """
         Get conversation context for a user.
         
+        As many recent messages as fit the context token budget are
+        included, newest first; oversized messages are clipped. Earlier
+        session segments are represented by their carried-over summary.
+        
         Args:
             user_id: User identifier
-            limit: Maximum messages to retrieve
             
         Returns:
             Formatted conversation history
@@ -195,24 +592,105 @@ class OpenClaw:
             return ""
         
         try:
-            session_id = f"{user_id}-session"
-            session = self.memory.session(session_id)
-            
-            messages = []
-            for msg in session.messages():
-                role = "User" if msg.peer_id else "Assistant"
-                messages.append(f"{role}: {msg.content}")
-            
-            # Return last N messages
-            context = "\n".join(messages[-limit:])
+            with CHAT_STAGE_SECONDS.time("context"):
+                messages = self.recent_messages(user_id, self._context.max_messages)
             logger.debug(f"Retrieved {len(messages)} messages for context")
-            return context
+            return self.build_context(user_id, messages)
             
         except Exception as e:
             logger.error(f"Failed to get context: {e}")
             return ""
     
-    def _generate_response(
+    @property
+    def context_messages(self) -> int:
+        """Most recent messages a turn's context is built from."""
+        return self._context.max_messages
+    
+    def build_context(self, user_id: str, messages: List[Dict[str, Any]]) -> str:
+        """
+        Format a user's recent messages as a turn's context.
+        
+        Args:
+            user_id: User identifier
+            messages: The user's newest messages, oldest first
+            
+        Returns:
+            As many of the messages as fit the context token budget, after
+            the summary of the user's earlier session segments
+        """
+        return self._context.assemble(messages, summary=self._epochs.summary(user_id))
+    
+    def session_id(self, user_id: str) -> str:
+        """Get the session a user's messages are currently stored in."""
+        return self._epochs.session_id(user_id)
+    
+    def history_version(self, user_id: str) -> int:
+        """Get a number that changes whenever a user's history does."""
+        return self._read_cache.version(user_id)
+    
+    def cache_recent(
+        self,
+        user_id: str,
+        messages: List[Dict[str, Any]],
+        complete: bool
+    ) -> None:
+        """
+        Cache a user's newest messages, unless the user is cached already.
+        
+        For messages read outside recent_messages, e.g. by a fetch that
+        raced a store. Caller holds the user's turn, so no other write can
+        be missing from them.
+        
+        Args:
+            user_id: User identifier
+            messages: The user's newest messages, oldest first
+            complete: True if these are all of the session's messages
+        """
+        cache = self._message_cache
+        if user_id not in cache:
+            cache.warm(user_id, messages, complete=complete, since=cache.writes(user_id))
+    
+    def recent_messages(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Get a user's newest messages, from the cache when possible.
+        
+        On a cache miss, enough messages to fill the user's ring buffer are
+        fetched from memory so that following reads are served locally.
+        Concurrent misses for a user (e.g. a chat turn and a history poll)
+        share one fetch, unless the user was written to in between. A
+        fetch that overlapped a write isn't cached, as it may lack it.
+        
+        Args:
+            user_id: User identifier
+            limit: Maximum messages
+            
+        Returns:
+            List of message dicts, oldest first
+        """
+        cached = self._message_cache.get(user_id, limit)
+        if cached is not None:
+            return cached
+        
+        fetch = max(limit, self._message_cache.messages_per_user)
+        # Before the session, so a rotation or clear in between is caught too
+        since = self._message_cache.writes(user_id)
+        session_id = self._epochs.session_id(user_id)
+        
+        def load() -> List[Dict[str, Any]]:
+            messages = self.memory.recent_messages(session_id, fetch)
+            # Fewer than asked for means this is the whole history
+            self._message_cache.warm(
+                user_id, messages, complete=len(messages) < fetch, since=since
+            )
+            return messages
+        
+        messages = self._reads.do(
+            "recent", (session_id, fetch, self._read_cache.version(user_id)), load
+        )
+        # Copies, like the cache hands out; the fetch may be shared
+        return [dict(msg) for msg in messages[-limit:]] if limit > 0 else []
+    
+    def generate_response(
         self,
         user_id: str,
         message: str,
@@ -221,7 +699,8 @@ class OpenClaw:
         """
         Generate a response based on message and context.
         
-        This is where you'd integrate your LLM.
+        Uses the configured LLM backend, or a simple template response
+        when none is configured.
         
         Args:
             user_id: User identifier
@@ -231,8 +710,9 @@ class OpenClaw:
         Returns:
             Generated response
         """
-        # TODO: Replace with your LLM
-        # For now, a simple contextual response
+        if self.llm:
+            with CHAT_STAGE_SECONDS.time("generate"):
+                return self.llm.generate(self._build_messages(message, context))
         
         if context:
             # We have history - reference it
@@ -245,37 +725,207 @@ class OpenClaw:
             # First message
             return f"Hello! I see you're interested in: {message[:50]}. Tell me more!"
     
-    def get_history(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+    def generate_stream(
+        self,
+        user_id: str,
+        message: str,
+        context: str
+    ) -> Iterator[str]:
+        """
+        Generate a response incrementally.
+        
+        Streams from the configured LLM backend, or streams the template
+        response word by word when none is configured.
+        
+        Args:
+            user_id: User identifier
+            message: Current message
+            context: Conversation history
+            
+        Yields:
+            Response text chunks
+        """
+        if self.llm:
+            yield from self.llm.stream(self._build_messages(message, context))
+            return
+        
+        response = self.generate_response(user_id, message, context)
+        for word in response.split(" ")[:-1]:
+            yield word + " "
+        yield response.split(" ")[-1]
+    
+    @staticmethod
+    def _build_messages(message: str, context: str) -> List[Dict[str, str]]:
+        """
+        Build the LLM request for a turn.
+        
+        Args:
+            message: Current message
+            context: Conversation history (may end with the current message)
+            
+        Returns:
+            Chat messages for the LLM backend
+        """
+        # The context is read after storing the message, so drop it from there
+        current = f"User: {message}"
+        if context.endswith(current):
+            context = context[:-len(current)].rstrip("\n")
+        
+        system = SYSTEM_PROMPT
+        if context:
+            system += f"\n\nPrevious conversation:\n{context}"
+        
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": message},
+        ]
+    
+    def get_history(
+        self,
+        user_id: str,
+        limit: int = 50,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """
         Get message history for a user.
         
         Args:
             user_id: User identifier
             limit: Maximum messages
+            before: Cursor; get the messages before it (see get_history_page)
+            after: Cursor; get the messages after it
             
         Returns:
             List of message dicts
+            
+        Raises:
+            ValueError: If a cursor is invalid
         """
-        if not self.memory:
-            return []
+        return self.get_history_page(user_id, limit, before, after)["messages"]
+    
+    def get_history_page(
+        self,
+        user_id: str,
+        limit: int = 50,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of a user's history, for scrolling through it.
         
-        try:
-            session_id = f"{user_id}-session"
-            session = self.memory.session(session_id)
+        Without a cursor, the page holds the newest ``limit`` messages.
+        Pass the returned ``before`` cursor to get the page before it, and
+        ``after`` to get messages newer than the page. Only the page is
+        read from memory, however long the history is; pages span session
+        segments.
+        
+        Args:
+            user_id: User identifier
+            limit: Page size (at most MAX_HISTORY_PAGE)
+            before: Cursor; get the newest messages older than it ("": none)
+            after: Cursor; get the oldest messages newer than it ("": none)
             
-            messages = []
-            for msg in session.messages():
-                messages.append({
-                    "role": "user" if msg.peer_id else "assistant",
-                    "content": msg.content,
-                    "created_at": str(msg.created_at)
-                })
+        Returns:
+            Dict with "messages" (oldest first), "before" (cursor for the
+            previous page, None at the start of the history) and "after"
+            (cursor for newer messages, None if there are no messages)
             
-            return messages[-limit:]
+        Raises:
+            ValueError: If both cursors are given, or a cursor is invalid
+                        or from before the history was cleared
+        """
+        before = before or None  # e.g. an empty ?after= query parameter
+        after = after or None
+        if before is not None and after is not None:
+            raise ValueError("Pass before or after, not both")
+        
+        limit = min(limit, MAX_HISTORY_PAGE)
+        cursor = decode_cursor(before or after) if (before or after) else None
+        if cursor is not None:
+            if cursor[0] != self._epochs.epoch(user_id):
+                raise ValueError("Cursor is from before the history was cleared")
+            if not 0 <= cursor[1] < len(self._epochs.session_ids(user_id)):
+                raise ValueError(f"Invalid cursor: {before or after!r}")
+        
+        empty = {"messages": [], "before": None, "after": after}
+        if not self.memory or limit <= 0:
+            return empty
+        
+        try:
+            page = self._read_cache.fetch(
+                user_id, ("history", limit, before, after),
+                lambda: self._load_page(user_id, limit, cursor, forward=after is not None)
+            )
+            # No newer messages yet; keep polling from the same place
+            return dict(page, messages=list(page["messages"]), after=page["after"] or after)
             
         except Exception as e:
             logger.error(f"Failed to get history: {e}")
-            return []
+            return empty
+    
+    def _load_page(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: Optional[Tuple[int, int, str]],
+        forward: bool
+    ) -> Dict[str, Any]:
+        """
+        Read one history page from memory. See get_history_page.
+        
+        Paging back, one extra message is read to tell whether the page
+        reaches the start of the history.
+        
+        Args:
+            user_id: User identifier
+            limit: Page size
+            cursor: Decoded cursor, or None for the newest page
+            forward: Page forward from the cursor rather than back
+            
+        Returns:
+            Page dict
+        """
+        epoch = self._epochs.epoch(user_id)
+        session_ids = self._epochs.session_ids(user_id)
+        want = limit + 1
+        found: List[Tuple[int, Dict[str, Any]]] = []  # (segment, message)
+        
+        if forward:
+            _, segment, message_id = cursor
+            while segment < len(session_ids) and len(found) < limit:
+                messages = self.memory.messages_after(
+                    session_ids[segment], message_id, limit - len(found)
+                )
+                found += [(segment, msg) for msg in messages]
+                segment, message_id = segment + 1, None
+            has_more = True  # At least the cursor's own message is older
+        else:
+            if cursor is None:
+                # The newest page usually comes from the message cache
+                segment = len(session_ids) - 1
+                found = [(segment, msg) for msg in self.recent_messages(user_id, want)]
+                segment -= 1
+                message_id = None
+            else:
+                _, segment, message_id = cursor
+            while segment >= 0 and len(found) < want:
+                messages = self.memory.messages_before(
+                    session_ids[segment], message_id, want - len(found)
+                )
+                found = [(segment, msg) for msg in messages] + found
+                segment, message_id = segment - 1, None
+            has_more = len(found) > limit
+            found = found[-limit:]
+        
+        def cursor_at(segment: int, msg: Dict[str, Any]) -> str:
+            return encode_cursor(epoch, segment, msg["id"])
+        
+        return {
+            "messages": [msg for _, msg in found],
+            "before": cursor_at(*found[0]) if found and has_more else None,
+            "after": cursor_at(*found[-1]) if found else None,
+        }
     
     def get_user_info(self, user_id: str) -> Dict[str, Any]:
         """
@@ -287,19 +937,69 @@ class OpenClaw:
         Returns:
             User info dict
         """
-        history = self.get_history(user_id)
+        def load() -> Dict[str, Any]:
+            stats = self._stats.get(user_id)
+            if stats is None:
+                stats = self._seed_stats(user_id)
+            return {"user_id": user_id, **stats}
         
-        return {
-            "user_id": user_id,
-            "message_count": len(history),
-            "first_seen": history[0]["created_at"] if history else None,
-            "last_active": history[-1]["created_at"] if history else None,
-        }
+        return dict(self._read_cache.fetch(user_id, "info", load))
+    
+    def version_tag(self, user_id: str) -> str:
+        """
+        Get a tag that changes whenever the user's history or info does.
+        
+        Cheap: no memory access. Used as the HTTP ETag of /history and
+        /info, so unchanged polls can be answered with 304.
+        
+        Args:
+            user_id: User identifier
+            
+        Returns:
+            Quoted entity tag
+        """
+        return self._read_cache.etag(user_id)
+    
+    def _seed_stats(self, user_id: str) -> Dict[str, Any]:
+        """
+        Count a user's messages in memory to seed the stats index.
+        
+        Only needed once per user; afterwards the index is kept current
+        by store_message.
+        
+        Args:
+            user_id: User identifier
+            
+        Returns:
+            Dict with message_count, first_seen and last_active
+        """
+        stats = {"message_count": 0, "first_seen": None, "last_active": None}
+        if not self.memory:
+            return stats
+        
+        try:
+            for session_id in self._epochs.session_ids(user_id):
+                for msg in self.memory.iter_messages(session_id):
+                    stats["message_count"] += 1
+                    if stats["first_seen"] is None:
+                        stats["first_seen"] = msg["created_at"]
+                    stats["last_active"] = msg["created_at"]
+            
+            return self._stats.seed(
+                user_id, stats["message_count"], stats["first_seen"], stats["last_active"]
+            )
+            
+        except Exception as e:
+            logger.error(f"Failed to count messages: {e}")
+            return stats
     
     def clear_history(self, user_id: str) -> bool:
         """
         Clear a user's conversation history.
         
+        Starts a new, empty session epoch for the user. Nothing is deleted,
+        so this takes the same time however long the history was.
+        
         Args:
             user_id: User identifier
             
@@ -310,18 +1010,157 @@ class OpenClaw:
             return False
         
         try:
-            # Create new session to clear history
-            session_id = f"{user_id}-session-{int(datetime.now().timestamp())}"
-            session = self.memory.session(session_id)
-            peer = self.memory.peer(user_id)
-            session.add_peers([peer])
-            
-            logger.info(f"Cleared history for {user_id}")
+            with self._turns.turn(user_id):
+                self.start_epoch(user_id)
             return True
             
         except Exception as e:
             logger.error(f"Failed to clear history: {e}")
             return False
+    
+    def start_epoch(self, user_id: str) -> None:
+        """
+        Start a new, empty session epoch for a user.
+        
+        Caller holds the user's turn.
+        
+        Args:
+            user_id: User identifier
+        """
+        epoch = self._epochs.bump(user_id)
+        self._message_cache.invalidate(user_id)
+        self._stats.reset(user_id)
+        self._read_cache.bump(user_id)
+        logger.info(f"Cleared history for {user_id} (epoch {epoch})")
+
+    def warm_users(self, user_ids: List[str]) -> int:
+        """
+        Load users' recent context into the message cache ahead of their
+        requests, e.g. in a worker that is about to start serving.
+        
+        Args:
+            user_ids: Users to load, most important first
+            
+        Returns:
+            Number of users loaded
+        """
+        if not self.memory:
+            return 0
+        
+        warmed = 0
+        for user_id in user_ids:
+            try:
+                self.recent_messages(user_id, self._context.max_messages)
+                warmed += 1
+            except Exception as e:
+                logger.warning(f"Failed to warm {user_id}: {e}")
+        return warmed
+    
+    def queue_stats(self) -> Dict[str, Any]:
+        """
+        Get per-user turn queueing statistics.
+        
+        Returns:
+            See KeyedExecutor.stats
+        """
+        return self._turns.stats()
+    
+    def most_active_users(self, limit: int) -> List[str]:
+        """
+        Get the users who were active most recently, from the stats index.
+        
+        Args:
+            limit: Most users to return
+            
+        Returns:
+            User ids, most recently active first
+        """
+        return self._stats.most_active(limit)
+    
+    def close(self) -> None:
+        """Flush pending writes to memory and stop background work."""
+        _instances.discard(self)
+        self._finalizer.detach()
+        if self._memory:
+            self._memory.close()
+        self._stats.save()
+        self._epochs.save()  # Segment sizes and activity since the last periodic save
+        if self.llm:
+            self.llm.close()
+
+
+# Open OpenClaw instances, held weakly
+_instances: "weakref.WeakSet[OpenClaw]" = weakref.WeakSet()
+
+
+def _save_indexes(stats: UserStatsIndex, epochs: SessionEpochs) -> None:
+    """Save an OpenClaw's indexes once it has been collected."""
+    stats.save()
+    epochs.save()
+
+
+@atexit.register
+def _close_all() -> None:
+    """Close every OpenClaw still open at exit."""
+    for openclaw in list(_instances):
+        openclaw.close()
+
+
+# Read when /metrics is scraped, summed over the open instances
+REGISTRY.gauge(
+    "openclaw_chat_queued_turns",
+    "Chat turns waiting for an earlier turn of the same user",
+    lambda: {(): sum(openclaw._turns.stats()["queued"] for openclaw in list(_instances))}
+)
+REGISTRY.gauge(
+    "openclaw_message_cache_bytes",
+    "Estimated size of the recent-message cache",
+    lambda: {(): sum(openclaw._message_cache.stats()["bytes"] for openclaw in list(_instances))}
+)
+
+
+def openclaw_from_env(**kwargs: Any) -> OpenClaw:
+    """
+    Create an OpenClaw configured from environment variables.
+    
+    Used by the API servers. Safe to call in several worker processes at
+    once: each claims its own write-behind journal.
+    
+    Environment:
+        OPENCLAW_JOURNAL       - write-behind journal (default
+                                 ~/.openclaw/journal/messages.jsonl; set to
+                                 "" to store synchronously)
+        OPENCLAW_MEMORY        - "honcho" (default) or "sqlite" for
+                                 single-node deployments that shouldn't
+                                 depend on the Honcho server
+        OPENCLAW_SQLITE_PATH   - SQLite database file (default
+                                 ~/.openclaw/memory/<workspace>.db, the
+                                 database OpenClaw falls back to when
+                                 Honcho is unavailable)
+        OPENCLAW_HONCHO_SHARDS - spread users over several Honcho
+                                 servers/workspaces (see memory_shards.py)
+    
+    Args:
+        **kwargs: Passed to OpenClaw
+        
+    Returns:
+        A new OpenClaw
+    """
+    memory = None
+    journal_path = None
+    if os.environ.get("OPENCLAW_MEMORY", "honcho") == "sqlite":
+        workspace = kwargs.get("workspace", "openclaw")
+        memory = SQLiteBackend(
+            os.environ.get("OPENCLAW_SQLITE_PATH") or kwargs.get("sqlite_path")
+            or MEMORY_DIR / f"{workspace}.db"
+        )
+    else:
+        journal = os.environ.get("OPENCLAW_JOURNAL", str(DEFAULT_JOURNAL_PATH))
+        if journal:
+            journal_path = str(claim_journal(journal))
+        memory = shards_from_env(journal_path=journal_path)
+    
+    return OpenClaw(memory=memory, journal_path=journal_path, **kwargs)
 
 
 # CLI Interface
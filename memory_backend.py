@@ -0,0 +1,589 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Memory Backends
+========================
+
+Where OpenClaw keeps conversation history.
+
+``MemoryBackend`` is the interface. Messages go in and come out as plain
+dicts ({"role", "content", "created_at", "id"}), so OpenClaw doesn't care
+which store is behind it. Two implementations:
+
+- ``HonchoBackend`` - the Honcho server, with cached session handles,
+  tail reads and optional write-behind ingestion
+- ``SQLiteBackend`` - an embedded SQLite database in WAL mode with an
+  index on (session, insertion order); reads are local and sub-millisecond
+
+OpenClaw falls back to ``SQLiteBackend`` when the Honcho SDK can't be
+loaded, and single-node deployments can choose it outright so the service
+doesn't depend on the Honcho process.
+
+Usage:
+    memory = SQLiteBackend("~/.openclaw/memory/openclaw.db")
+    memory.add_message("faisal", "faisal-session", "Hello!")
+    memory.recent_messages("faisal-session", 10)
+"""
+
+import json
+import logging
+import queue
+import sqlite3
+import sys
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from honcho_session import SessionRegistry, message_role, newest_first, tail_messages
+from message_ingest import MessageIngestor, message_id, record_to_message
+from metrics import honcho_call
+
+logger = logging.getLogger(__name__)
+
+MEMORY_DIR = Path.home() / ".openclaw" / "memory"
+
+# Honcho SDK location. The SDK is slow to import, so it is only loaded
+# when memory is first used (see load_honcho).
+HONCHO_SDK_PATH = '/home/faisal/.openclaw/workspace/honcho-ai/sdks/python/src'
+
+
+def load_honcho():
+    """
+    Import the Honcho client class.
+
+    Returns:
+        The Honcho class, or None if the SDK can't be imported
+    """
+    if HONCHO_SDK_PATH not in sys.path:
+        sys.path.insert(0, HONCHO_SDK_PATH)
+
+    try:
+        from honcho import Honcho
+        return Honcho
+    except ImportError as e:
+        logger.error(f"Failed to import Honcho: {e}")
+        return None
+
+
+class MemoryBackend(ABC):
+    """
+    Interface for conversation stores.
+
+    Sessions are created implicitly by their first message. Implementations
+    must be thread-safe and raise on failure; callers decide what to log.
+    Subclasses must implement ``add_message``, ``recent_messages`` and
+    ``iter_messages``.
+    """
+
+    # Short name for logs and /health
+    name = "none"
+
+    @abstractmethod
+    def add_message(
+        self,
+        peer_id: str,
+        session_id: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Store a message.
+
+        Args:
+            peer_id: Peer that sent the message (a user, or ASSISTANT_PEER_ID)
+            session_id: Session identifier
+            content: Message content
+            metadata: Optional message metadata
+
+        Returns:
+            The stored message dict
+        """
+
+    @abstractmethod
+    def recent_messages(self, session_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Get a session's newest messages.
+
+        Args:
+            session_id: Session identifier
+            limit: Maximum messages
+
+        Returns:
+            Up to ``limit`` message dicts, oldest first
+        """
+
+    @abstractmethod
+    def iter_messages(self, session_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over a session's whole history.
+
+        Args:
+            session_id: Session identifier
+
+        Yields:
+            Message dicts, oldest first
+        """
+
+    def messages_before(
+        self,
+        session_id: str,
+        before: Optional[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the messages just before a given one, for paging back.
+
+        The default scans the session; stores should override it with
+        something cheaper.
+
+        Args:
+            session_id: Session identifier
+            before: Message id (None: the end of the session)
+            limit: Maximum messages
+
+        Returns:
+            Up to ``limit`` message dicts immediately older than ``before``,
+            oldest first ([] if ``before`` isn't in the session)
+        """
+        if limit <= 0:
+            return []
+
+        window: deque = deque(maxlen=limit)
+        for msg in self.iter_messages(session_id):
+            if before is not None and msg["id"] == before:
+                return list(window)
+            window.append(msg)
+        return list(window) if before is None else []
+
+    def messages_after(
+        self,
+        session_id: str,
+        after: Optional[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the messages just after a given one, for paging forward.
+
+        The default scans the session; stores should override it with
+        something cheaper.
+
+        Args:
+            session_id: Session identifier
+            after: Message id (None: the start of the session)
+            limit: Maximum messages
+
+        Returns:
+            Up to ``limit`` message dicts immediately newer than ``after``,
+            oldest first ([] if ``after`` isn't in the session)
+        """
+        if limit <= 0:
+            return []
+
+        messages = self.iter_messages(session_id)
+        if after is not None:
+            for msg in messages:
+                if msg["id"] == after:
+                    break
+            else:
+                return []
+        return list(islice(messages, limit))
+
+    def close(self) -> None:
+        """Flush pending writes and release resources."""
+
+    def stats(self) -> Dict[str, Any]:
+        """Get backend-specific statistics, if any."""
+        return {}
+
+
+class HonchoBackend(MemoryBackend):
+    """
+    Conversation store on a Honcho server.
+    """
+
+    name = "honcho"
+
+    def __init__(
+        self,
+        client: Any,
+        handle_ttl: float = 300.0,
+        journal_path: Optional[str] = None
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            client: Honcho client for the workspace
+            handle_ttl: Seconds to reuse resolved peer/session handles
+            journal_path: Enables write-behind storage through this local
+                          journal; messages are batched to Honcho in the
+                          background instead of on the caller's thread
+        """
+        self.client = client
+
+        # Resolved peer/session handles, so stores skip the setup calls
+        self._handles = SessionRegistry(client, ttl=handle_ttl)
+
+        # Optional write-behind ingestion
+        self._ingestor = MessageIngestor(self._handles, journal_path) if journal_path else None
+
+    def add_message(
+        self,
+        peer_id: str,
+        session_id: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Store a message. See MemoryBackend.add_message."""
+        if self._ingestor:
+            return record_to_message(
+                self._ingestor.submit(peer_id, session_id, content, metadata)
+            )
+
+        try:
+            peer, session = self._handles.resolve(peer_id, session_id)
+            with honcho_call("add_messages"):
+                stored = session.add_messages([peer.message(content, metadata=metadata)])
+        except Exception:
+            self._handles.invalidate(peer_id, session_id)
+            raise
+
+        return {
+            "role": message_role(peer_id),
+            "content": content,
+            "created_at": str(stored[0].created_at if stored else datetime.now()),
+            "id": stored[0].id if stored else None
+        }
+
+    def recent_messages(self, session_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Get a session's newest messages. See MemoryBackend.recent_messages."""
+        session = self._handles.session(session_id)
+        messages = [self._to_dict(msg) for msg in tail_messages(session, limit)]
+
+        if self._ingestor:
+            # Include our own writes that are still waiting for Honcho
+            messages = self._ingestor.merge_pending(session_id, messages)[-limit:]
+        return messages
+
+    def iter_messages(self, session_id: str) -> Iterator[Dict[str, Any]]:
+        """Iterate over a session's history. See MemoryBackend.iter_messages."""
+        session = self._handles.session(session_id)
+
+        seen = set()
+        for msg in session.messages():
+            message = self._to_dict(msg)
+            seen.add(message["id"])
+            yield message
+
+        # Journaled messages Honcho doesn't have yet
+        if self._ingestor:
+            for record in self._ingestor.pending(session_id):
+                if record["id"] not in seen:
+                    yield record_to_message(record)
+
+    def messages_before(
+        self,
+        session_id: str,
+        before: Optional[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the messages just before a given one. See MemoryBackend.messages_before.
+
+        Walks back from the newest message, so the cost grows with how far
+        back ``before`` is, not with the length of the session.
+        """
+        if before is None:
+            return self.recent_messages(session_id, limit)
+        if limit <= 0:
+            return []
+
+        with honcho_call("messages"):
+            newest = self._newest_first(session_id)
+            for message in newest:
+                if message["id"] == before:
+                    older = list(islice(newest, limit))
+                    older.reverse()
+                    return older
+        return []
+
+    def messages_after(
+        self,
+        session_id: str,
+        after: Optional[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the messages just after a given one. See MemoryBackend.messages_after.
+
+        Walks back from the newest message to ``after``, so catching up
+        on recent messages is cheap however long the session is.
+        """
+        if after is None:
+            return list(islice(self.iter_messages(session_id), limit))
+        if limit <= 0:
+            return []
+
+        newer = []
+        with honcho_call("messages"):
+            for message in self._newest_first(session_id):
+                if message["id"] == after:
+                    newer.reverse()
+                    return newer[:limit]
+                newer.append(message)
+        return []
+
+    def _newest_first(self, session_id: str) -> Iterator[Dict[str, Any]]:
+        """Iterate over a session's messages newest first, journaled ones included."""
+        seen = set()
+        if self._ingestor:
+            # Not yet in Honcho, so newer than anything that is
+            for record in reversed(self._ingestor.pending(session_id)):
+                seen.add(record["id"])
+                yield record_to_message(record)
+
+        for msg in newest_first(self._handles.session(session_id)):
+            message = self._to_dict(msg)
+            if message["id"] not in seen:
+                yield message
+
+    def close(self) -> None:
+        """Flush journaled messages to Honcho and stop background work."""
+        if self._ingestor:
+            self._ingestor.close()
+
+    @staticmethod
+    def _to_dict(msg: Any) -> Dict[str, Any]:
+        """Convert a Honcho message to a message dict."""
+        return {
+            "role": message_role(msg.peer_id),
+            "content": msg.content,
+            "created_at": str(msg.created_at),
+            "id": message_id(msg)
+        }
+
+
+class SQLiteBackend(MemoryBackend):
+    """
+    Conversation store in an embedded SQLite database.
+
+    The database runs in WAL mode, so reads never wait for writes.
+    Connections come from a pool of at most ``max_connections``, shared by
+    however many threads use the store; a call waits for a free one.
+    """
+
+    name = "sqlite"
+
+    # Rows read per connection checkout while iterating over a history
+    ITER_CHUNK = 500
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS messages (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            session_id TEXT NOT NULL,
+            peer_id TEXT NOT NULL,
+            content TEXT NOT NULL,
+            metadata TEXT NOT NULL DEFAULT '{}',
+            created_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS messages_by_session ON messages (session_id, seq);
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        busy_timeout: float = 5.0,
+        max_connections: int = 16
+    ):
+        """
+        Initialize the backend, creating the database if needed.
+
+        Args:
+            path: Database file (default ~/.openclaw/memory/openclaw.db)
+            busy_timeout: Seconds a writer waits for another writer's lock,
+                          and a call for a free connection
+            max_connections: Connections kept open at most
+        """
+        self.path = Path(path).expanduser() if path else MEMORY_DIR / "openclaw.db"
+        self.busy_timeout = busy_timeout
+        self.max_connections = max_connections
+
+        # Every open connection, and those not checked out (most recently
+        # returned first, so a lightly loaded store reuses a few)
+        self._connections: List[sqlite3.Connection] = []
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    def add_message(
+        self,
+        peer_id: str,
+        session_id: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Store a message. See MemoryBackend.add_message."""
+        message = {
+            "role": message_role(peer_id),
+            "content": content,
+            "created_at": str(datetime.now()),
+            "id": uuid.uuid4().hex
+        }
+
+        with self._connection() as conn, conn:
+            conn.execute(
+                "INSERT INTO messages (id, session_id, peer_id, content, metadata, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (message["id"], session_id, peer_id, content,
+                 json.dumps(metadata or {}, default=str), message["created_at"])
+            )
+        return message
+
+    def recent_messages(self, session_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Get a session's newest messages. See MemoryBackend.recent_messages."""
+        if limit <= 0:
+            return []
+
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT id, peer_id, content, created_at FROM messages "
+                "WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                (session_id, limit)
+            ).fetchall()
+        rows.reverse()
+        return [self._to_dict(row) for row in rows]
+
+    def iter_messages(self, session_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over a session's history. See MemoryBackend.iter_messages.
+
+        Reads ITER_CHUNK rows at a time, so a slow or abandoned iteration
+        doesn't hold a pooled connection.
+        """
+        seq = 0
+        while True:
+            with self._connection() as conn:
+                rows = conn.execute(
+                    "SELECT seq, id, peer_id, content, created_at FROM messages "
+                    "WHERE session_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (session_id, seq, self.ITER_CHUNK)
+                ).fetchall()
+            for row in rows:
+                yield self._to_dict(row[1:])
+            if len(rows) < self.ITER_CHUNK:
+                return
+            seq = rows[-1][0]
+
+    def messages_before(
+        self,
+        session_id: str,
+        before: Optional[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Page back with an index seek. See MemoryBackend.messages_before."""
+        if before is None:
+            return self.recent_messages(session_id, limit)
+        if limit <= 0:
+            return []
+
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT id, peer_id, content, created_at FROM messages "
+                "WHERE session_id = ? AND seq < (SELECT seq FROM messages WHERE id = ? AND session_id = ?) "
+                "ORDER BY seq DESC LIMIT ?",
+                (session_id, before, session_id, limit)
+            ).fetchall()
+        rows.reverse()
+        return [self._to_dict(row) for row in rows]
+
+    def messages_after(
+        self,
+        session_id: str,
+        after: Optional[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Page forward with an index seek. See MemoryBackend.messages_after."""
+        if limit <= 0:
+            return []
+
+        if after is None:
+            query = "WHERE session_id = ? ORDER BY seq LIMIT ?"
+            params: tuple = (session_id, limit)
+        else:
+            query = (
+                "WHERE session_id = ? AND seq > (SELECT seq FROM messages WHERE id = ? AND session_id = ?) "
+                "ORDER BY seq LIMIT ?"
+            )
+            params = (session_id, after, session_id, limit)
+
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT id, peer_id, content, created_at FROM messages " + query, params
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logger.debug(f"Failed to close SQLite connection: {e}")
+            # Connections checked out now go back to the old, dropped queue
+            self._connections = []
+            self._idle = queue.LifoQueue()
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Check out a pooled connection for the duration of the block.
+
+        Raises:
+            sqlite3.OperationalError: If none is free within busy_timeout
+        """
+        with self._lock:
+            idle = self._idle
+            try:
+                conn = idle.get_nowait()
+            except queue.Empty:
+                conn = None
+                if len(self._connections) < self.max_connections:
+                    # Pooled connections move between threads, one at a time
+                    conn = sqlite3.connect(
+                        str(self.path), timeout=self.busy_timeout, check_same_thread=False
+                    )
+                    conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL
+                    self._connections.append(conn)
+
+        if conn is None:
+            try:
+                conn = idle.get(timeout=self.busy_timeout)
+            except queue.Empty:
+                raise sqlite3.OperationalError(
+                    f"No SQLite connection free after {self.busy_timeout}s"
+                ) from None
+        try:
+            yield conn
+        finally:
+            idle.put(conn)
+
+    @staticmethod
+    def _to_dict(row: tuple) -> Dict[str, Any]:
+        """Convert a (id, peer_id, content, created_at) row to a message dict."""
+        return {
+            "role": message_role(row[1]),
+            "content": row[2],
+            "created_at": row[3],
+            "id": row[0]
+        }
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Memory Sharding
+========================
+
+Spreads users over several memory backends, e.g. a number of Honcho
+servers or workspaces, so memory capacity isn't capped by one process.
+
+Users are placed on a consistent-hash ring with virtual nodes: every user
+always lands on the same shard, load is spread evenly, and adding a shard
+to N existing ones moves only about 1/(N+1) of users - those now owned by
+the new shard. (Their earlier history stays where it was; migrate it, or
+accept that those users start fresh.)
+
+Each shard's call count, error count and latency percentiles are tracked
+and reported by ``stats()``.
+
+Usage:
+    memory = ShardedBackend({
+        "a": HonchoBackend(Honcho(base_url="http://h1:8002", workspace_id="openclaw")),
+        "b": HonchoBackend(Honcho(base_url="http://h2:8002", workspace_id="openclaw")),
+    })
+    openclaw = OpenClaw(memory=memory)
+
+Environment (see ``shards_from_env``):
+    OPENCLAW_HONCHO_SHARDS - comma-separated "workspace@url" entries
+"""
+
+import bisect
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from memory_backend import HonchoBackend, MemoryBackend, load_honcho
+
+logger = logging.getLogger(__name__)
+
+# Virtual nodes per shard; enough for a few percent load imbalance
+DEFAULT_VNODES = 160
+
+# Latency samples kept per shard for percentiles
+LATENCY_WINDOW = 1024
+
+
+def _hash(key: str) -> int:
+    """Map a string to a point on the ring."""
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+def shard_key(session_id: str) -> str:
+    """
+    Get the routing key of a session.
+
+    Sessions are named "<user_id>-session" (optionally with a suffix), so
+    routing on the user part keeps all of a user's sessions on one shard.
+    """
+    user_id, sep, _ = session_id.rpartition("-session")
+    return user_id if sep else session_id
+
+
+class HashRing:
+    """
+    Consistent-hash ring of named nodes with virtual nodes.
+
+    Not thread-safe; ShardedBackend guards it with a lock.
+    """
+
+    def __init__(self, nodes: Optional[List[str]] = None, vnodes: int = DEFAULT_VNODES):
+        """
+        Initialize the ring.
+
+        Args:
+            nodes: Initial node names
+            vnodes: Points on the ring per node
+        """
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self._nodes = set()
+
+        for node in nodes or []:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        """Add a node. Only keys that now hash to it move."""
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str) -> None:
+        """Remove a node. Its keys move to the following nodes on the ring."""
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def node_for(self, key: str) -> str:
+        """
+        Get the node that owns a key.
+
+        Args:
+            key: Routing key
+
+        Returns:
+            Node name
+        """
+        if not self._points:
+            raise LookupError("HashRing has no nodes")
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+    @property
+    def nodes(self) -> List[str]:
+        """Node names, sorted."""
+        return sorted(self._nodes)
+
+
+class _ShardStats:
+    """Call counts and recent latencies of one shard."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = sorted(self.latencies)
+
+        def pct(q: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(int(len(samples) * q), len(samples) - 1)] * 1000, 3)
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "p50_ms": pct(0.5),
+            "p99_ms": pct(0.99),
+        }
+
+
+class ShardedBackend(MemoryBackend):
+    """
+    Memory backend that routes each user to one of several shards.
+    """
+
+    name = "sharded"
+
+    def __init__(self, shards: Dict[str, MemoryBackend], vnodes: int = DEFAULT_VNODES):
+        """
+        Initialize the backend.
+
+        Args:
+            shards: Backends by shard name. Names place shards on the ring,
+                    so they must stay the same across restarts.
+            vnodes: Points on the ring per shard
+        """
+        if not shards:
+            raise ValueError("ShardedBackend needs at least one shard")
+
+        self._shards = dict(shards)
+        self._ring = HashRing(list(shards), vnodes=vnodes)
+        self._stats = {name: _ShardStats() for name in shards}
+        self._lock = threading.Lock()
+
+    def add_shard(self, name: str, backend: MemoryBackend) -> None:
+        """
+        Add a shard at runtime.
+
+        Args:
+            name: Shard name
+            backend: The shard's backend
+        """
+        with self._lock:
+            if name in self._shards:
+                raise ValueError(f"Shard {name!r} already exists")
+            self._shards[name] = backend
+            self._stats[name] = _ShardStats()
+            self._ring.add(name)
+            count = len(self._shards)
+        logger.info(f"Added memory shard {name}; about 1/{count} of users move to it")
+
+    def shard_for(self, session_id: str) -> str:
+        """Get the name of the shard that stores a session."""
+        with self._lock:
+            return self._ring.node_for(shard_key(session_id))
+
+    def add_message(
+        self,
+        peer_id: str,
+        session_id: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Store a message on the session's shard. See MemoryBackend.add_message."""
+        return self._call(session_id, lambda shard: shard.add_message(
+            peer_id, session_id, content, metadata
+        ))
+
+    def recent_messages(self, session_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Get newest messages from the session's shard. See MemoryBackend.recent_messages."""
+        return self._call(session_id, lambda shard: shard.recent_messages(session_id, limit))
+
+    def iter_messages(self, session_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over history on the session's shard. See MemoryBackend.iter_messages.
+
+        Messages are read from the shard as they are consumed; the whole
+        iteration counts as one call in the shard's statistics.
+        """
+        name, shard = self._route(session_id)
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield from shard.iter_messages(session_id)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._record(name, time.perf_counter() - start, failed)
+
+    def messages_before(
+        self,
+        session_id: str,
+        before: Optional[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Page back on the session's shard. See MemoryBackend.messages_before."""
+        return self._call(session_id, lambda shard: shard.messages_before(session_id, before, limit))
+
+    def messages_after(
+        self,
+        session_id: str,
+        after: Optional[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Page forward on the session's shard. See MemoryBackend.messages_after."""
+        return self._call(session_id, lambda shard: shard.messages_after(session_id, after, limit))
+
+    def close(self) -> None:
+        """Close every shard."""
+        for name, shard in self._shards.items():
+            try:
+                shard.close()
+            except Exception as e:
+                logger.error(f"Failed to close memory shard {name}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get per-shard statistics.
+
+        Returns:
+            Dict of shard name -> calls, errors, p50_ms and p99_ms over the
+            last LATENCY_WINDOW calls
+        """
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in self._stats.items()}
+
+    def _call(self, session_id: str, fn: Callable[[MemoryBackend], Any]) -> Any:
+        """Run ``fn`` against the session's shard, recording its latency."""
+        name, shard = self._route(session_id)
+        start = time.perf_counter()
+        failed = False
+        try:
+            return fn(shard)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._record(name, time.perf_counter() - start, failed)
+
+    def _route(self, session_id: str) -> Tuple[str, MemoryBackend]:
+        """Get the name and backend of the session's shard."""
+        with self._lock:
+            name = self._ring.node_for(shard_key(session_id))
+            return name, self._shards[name]
+
+    def _record(self, name: str, elapsed: float, failed: bool) -> None:
+        """Count one call to a shard."""
+        with self._lock:
+            stats = self._stats[name]
+            stats.calls += 1
+            stats.errors += failed
+            stats.latencies.append(elapsed)
+
+
+def parse_shards(spec: str) -> List[Tuple[str, str]]:
+    """
+    Parse a shard list.
+
+    Args:
+        spec: Comma-separated "workspace@url" entries
+
+    Returns:
+        (workspace, url) pairs
+    """
+    shards = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        workspace, sep, url = entry.partition("@")
+        if not sep or not workspace or not url:
+            raise ValueError(f"Invalid shard {entry!r}, expected workspace@url")
+        shards.append((workspace, url))
+    return shards
+
+
+def shards_from_env(
+    api_key: str = "openclaw-local-dev",
+    journal_path: Optional[str] = None
+) -> Optional[ShardedBackend]:
+    """
+    Build a sharded Honcho backend from OPENCLAW_HONCHO_SHARDS.
+
+    Args:
+        api_key: Honcho API key for every shard
+        journal_path: Enables write-behind storage; each shard journals
+                      to its own file next to this path
+
+    Returns:
+        A ShardedBackend, or None if OPENCLAW_HONCHO_SHARDS is not set or
+        the Honcho SDK can't be loaded (OpenClaw then uses its default store)
+    """
+    spec = os.environ.get("OPENCLAW_HONCHO_SHARDS")
+    if not spec:
+        return None
+
+    Honcho = load_honcho()
+    if Honcho is None:
+        logger.warning("Honcho SDK not available - ignoring OPENCLAW_HONCHO_SHARDS")
+        return None
+
+    shards = {}
+    for workspace, url in parse_shards(spec):
+        name = f"{workspace}@{url}"
+        shard_journal = None
+        if journal_path:
+            # One journal per shard; journals must never be shared
+            path = Path(journal_path)
+            suffix = hashlib.md5(name.encode("utf-8")).hexdigest()[:8]
+            shard_journal = str(path.with_name(f"{path.stem}-{suffix}{path.suffix}"))
+        shards[name] = HonchoBackend(
+            Honcho(base_url=url, api_key=api_key, workspace_id=workspace),
+            journal_path=shard_journal
+        )
+    return ShardedBackend(shards)
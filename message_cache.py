@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Message Cache
+======================
+
+In-process cache of each user's most recent messages.
+
+Every user gets a ring buffer holding their newest messages. Buffers are
+warmed from Honcho on the first read and kept current by writing through
+on every stored message, so hot users are served without any network
+round trips. The cache as a whole is capped at a byte budget; when it is
+exceeded, the least recently used users are evicted.
+
+A fetch can race a write: it reads Honcho, the message is stored and
+(the user not being cached yet) skipped by ``append``, then the fetch
+warms the buffer without it. So every write is counted per user, and
+``warm`` drops a fetch if the user was written to after it started.
+
+Usage:
+    cache = MessageCache(max_bytes=16 * 1024 * 1024)
+    since = cache.writes("faisal")
+    history = fetch_from_honcho("faisal")
+    cache.warm("faisal", history, complete=True, since=since)
+    cache.append("faisal", {"role": "user", "content": "Hi", "created_at": "..."})
+    recent = cache.get("faisal", limit=10)
+"""
+
+import threading
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional
+
+# Rough bookkeeping overheads, in bytes
+MESSAGE_OVERHEAD = 64
+BUFFER_OVERHEAD = 256
+
+# Users whose last write is remembered; older writes count as recent
+TRACKED_WRITES = 100000
+
+
+def message_size(message: Dict[str, Any]) -> int:
+    """Estimate the memory held by one cached message, in bytes."""
+    return MESSAGE_OVERHEAD + sum(len(str(value)) for value in message.values())
+
+
+class _UserBuffer:
+    """Ring buffer of one user's newest messages."""
+
+    __slots__ = ("messages", "complete", "size")
+
+    def __init__(self, capacity: int):
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        # True while the buffer holds the user's entire history
+        self.complete = True
+        self.size = BUFFER_OVERHEAD
+
+    def append(self, message: Dict[str, Any]) -> None:
+        if len(self.messages) == self.messages.maxlen:
+            self.size -= message_size(self.messages[0])
+            self.complete = False
+        self.messages.append(message)
+        self.size += message_size(message)
+
+
+class MessageCache:
+    """
+    Per-user ring buffers of recent messages with global LRU eviction.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, messages_per_user: int = 200):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Memory budget for all cached messages
+            messages_per_user: Ring buffer capacity per user
+        """
+        self.max_bytes = max_bytes
+        self.messages_per_user = messages_per_user
+
+        self._users: "OrderedDict[str, _UserBuffer]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        # Write sequence numbers: user_id -> number of their last write.
+        # Users dropped from here count as written at _forgotten.
+        self._writes = 0
+        self._written: "OrderedDict[str, int]" = OrderedDict()
+        self._forgotten = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get a user's newest messages from the cache.
+
+        Args:
+            user_id: User identifier
+            limit: Maximum messages
+
+        Returns:
+            Up to ``limit`` messages (oldest first), or None if the cache
+            can't answer without going to Honcho
+        """
+        with self._lock:
+            buffer = self._users.get(user_id)
+            if buffer is None or (limit > len(buffer.messages) and not buffer.complete):
+                self.misses += 1
+                return None
+
+            self._users.move_to_end(user_id)
+            self.hits += 1
+            start = max(len(buffer.messages) - limit, 0)
+            return [dict(msg) for msg in islice(buffer.messages, start, None)]
+
+    def __contains__(self, user_id: str) -> bool:
+        """Check whether a user's messages are cached."""
+        with self._lock:
+            return user_id in self._users
+
+    def writes(self, user_id: str) -> int:
+        """
+        Get a counter that changes whenever the user is written to.
+
+        Read it before fetching the user's messages and pass it to ``warm``.
+
+        Args:
+            user_id: User identifier
+        """
+        with self._lock:
+            return self._written.get(user_id, self._forgotten)
+
+    def warm(
+        self,
+        user_id: str,
+        messages: List[Dict[str, Any]],
+        complete: bool,
+        since: Optional[int] = None
+    ) -> bool:
+        """
+        Load a user's newest messages fetched from Honcho.
+
+        Args:
+            user_id: User identifier
+            messages: Newest messages, oldest first
+            complete: True if ``messages`` is the user's entire history
+            since: ``writes(user_id)`` from before the fetch; if the user
+                   has been written to since, the messages may be missing
+                   the write and are dropped. None replaces the buffer
+                   unconditionally, and counts as a write.
+
+        Returns:
+            True if the buffer was loaded
+        """
+        buffer = _UserBuffer(self.messages_per_user)
+        for message in messages:
+            buffer.append(dict(message))
+        buffer.complete = complete and len(messages) <= self.messages_per_user
+
+        with self._lock:
+            if since is None:
+                self._note_write(user_id)
+            elif self._written.get(user_id, self._forgotten) != since:
+                return False
+            self._drop(user_id)
+            self._users[user_id] = buffer
+            self._total_bytes += buffer.size
+            self._evict()
+        return True
+
+    def append(self, user_id: str, message: Dict[str, Any]) -> None:
+        """
+        Write a newly stored message through to the cache.
+
+        Users that haven't been warmed yet are left alone; their first read
+        loads the buffer from Honcho, which will include this message. A
+        message whose ``id`` is already buffered is not added twice.
+
+        Args:
+            user_id: User identifier
+            message: Message dict
+        """
+        with self._lock:
+            self._note_write(user_id)
+            buffer = self._users.get(user_id)
+            if buffer is None:
+                return
+            if message.get("id") is not None and any(
+                msg.get("id") == message["id"] for msg in buffer.messages
+            ):
+                return
+
+            before = buffer.size
+            buffer.append(dict(message))
+            self._total_bytes += buffer.size - before
+            self._users.move_to_end(user_id)
+            self._evict()
+
+    def invalidate(self, user_id: str) -> None:
+        """Forget everything cached for a user."""
+        with self._lock:
+            self._note_write(user_id)
+            self._drop(user_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache occupancy and hit counters."""
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _note_write(self, user_id: str) -> None:
+        """Count a write to a user. Caller must hold the lock."""
+        self._writes += 1
+        self._written[user_id] = self._writes
+        self._written.move_to_end(user_id)
+        while len(self._written) > TRACKED_WRITES:
+            # Oldest first, so this is the newest write forgotten so far
+            _, self._forgotten = self._written.popitem(last=False)
+
+    def _drop(self, user_id: str) -> None:
+        """Remove a user's buffer. Caller must hold the lock."""
+        buffer = self._users.pop(user_id, None)
+        if buffer is not None:
+            self._total_bytes -= buffer.size
+
+    def _evict(self) -> None:
+        """Evict least recently used users until within budget. Caller must hold the lock."""
+        while self._total_bytes > self.max_bytes and self._users:
+            _, buffer = self._users.popitem(last=False)
+            self._total_bytes -= buffer.size
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Message Ingestion
+==========================
+
+Write-behind ingestion of messages into Honcho.
+
+Messages are appended to a local append-only journal and acknowledged
+immediately. A background thread coalesces pending messages per session
+and writes them to Honcho with one ``add_messages`` call per batch, as soon
+as a session has ``batch_size`` messages waiting or ``flush_interval``
+seconds have passed. Sessions are flushed concurrently. If a session's
+batch fails, that session is retried with backoff while the others carry
+on; a batch that fails ``max_attempts`` times in a row is moved to a
+dead-letter file (``<journal stem>.dead<suffix>``, in journal format, so
+an ingestor pointed at it replays it) instead of blocking its session
+forever. If the process restarts, unacknowledged messages are replayed
+from the journal. Honcho latency is off the chat path and no message is
+lost.
+
+Journal format (one JSON object per line):
+    {"op": "add", "id": "...", "peer_id": "...", "session_id": "...",
+     "content": "...", "metadata": {...}, "created_at": "..."}
+    {"op": "ack", "ids": ["...", ...]}
+
+Usage:
+    ingestor = MessageIngestor(SessionRegistry(honcho))
+    record = ingestor.submit("faisal", "faisal-session", "Hello!")
+    ...
+    ingestor.close()
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+from honcho_session import SessionRegistry, message_role
+from metrics import honcho_call
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_PATH = Path.home() / ".openclaw" / "journal" / "messages.jsonl"
+
+# Metadata key carrying the journal id into Honcho
+LOCAL_ID_KEY = "local_id"
+
+# Journal lock files held by this process, by path
+_claimed_journals: Dict[str, Any] = {}
+
+
+def claim_journal(path: str, slots: int = 64) -> Path:
+    """
+    Claim a journal file that no other process is using.
+
+    Two processes must never append to the same journal. Slots ``path``,
+    ``<stem>-1<suffix>``, ``<stem>-2<suffix>``... are each guarded by an
+    exclusive lock on a ``.lock`` file, held until this process exits, and
+    the first free one is returned. A single process always gets ``path``
+    itself, and a restarted worker reclaims a slot and replays whatever its
+    predecessor left in it.
+
+    Claim after forking: children share their parent's locks.
+
+    Args:
+        path: Base journal path
+        slots: Most journals to try
+
+    Returns:
+        Journal path for this process
+    """
+    base = Path(path).expanduser()
+    if not FCNTL_AVAILABLE:
+        return base
+
+    base.parent.mkdir(parents=True, exist_ok=True)
+    for slot in range(slots):
+        candidate = base if slot == 0 else base.with_name(f"{base.stem}-{slot}{base.suffix}")
+        if str(candidate) in _claimed_journals:
+            return candidate
+
+        lock = open(candidate.with_suffix(".lock"), "a")
+        try:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            continue
+        _claimed_journals[str(candidate)] = lock
+        return candidate
+
+    raise RuntimeError(f"All {slots} journal slots for {base} are in use")
+
+
+def record_to_message(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a journal record to an OpenClaw message dict."""
+    return {
+        "role": message_role(record["peer_id"]),
+        "content": record["content"],
+        "created_at": record["created_at"],
+        "id": record["id"],
+    }
+
+
+def message_id(msg: Any) -> str:
+    """Get the id of a Honcho message, preferring the journal id it was stored with."""
+    metadata = getattr(msg, "metadata", None) or {}
+    return metadata.get(LOCAL_ID_KEY, msg.id)
+
+
+class MessageIngestor:
+    """
+    Journaled, batched background writer for Honcho messages.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        handles: SessionRegistry,
+        journal_path: Optional[str] = None,
+        batch_size: int = 50,
+        flush_interval: float = 0.5,
+        max_retry_interval: float = 30.0,
+        compact_after: int = 10000,
+        fsync: bool = False,
+        max_attempts: int = 10,
+        flush_threads: int = 4
+    ):
+        """
+        Initialize the ingestor, replay the journal and start flushing.
+
+        Args:
+            handles: Registry used to resolve peer/session handles
+            journal_path: Journal file (default ~/.openclaw/journal/messages.jsonl)
+            batch_size: Pending messages that trigger an early flush
+            flush_interval: Seconds between background flushes
+            max_retry_interval: Longest backoff of a session after failed flushes
+            compact_after: Journal lines before acknowledged entries are dropped
+            fsync: fsync the journal on every message (survives OS crashes,
+                   not just process crashes, at the cost of latency)
+            max_attempts: Consecutive failures after which a batch is
+                          dead-lettered
+            flush_threads: Sessions flushed at once
+        """
+        self.handles = handles
+        self.journal_path = Path(journal_path) if journal_path else DEFAULT_JOURNAL_PATH
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retry_interval = max_retry_interval
+        self.compact_after = compact_after
+        self.fsync = fsync
+        self.max_attempts = max_attempts
+        self.dead_letter_path = self.journal_path.with_name(
+            f"{self.journal_path.stem}.dead{self.journal_path.suffix}"
+        )
+
+        # session_id -> pending records, oldest first
+        self._pending: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._pending_count = 0
+        self._journal_lines = 0
+        # session_id -> consecutive failed flushes, and when to retry
+        self._failures: Dict[str, int] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._dead_letters = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._pool = ThreadPoolExecutor(
+            max_workers=flush_threads, thread_name_prefix="openclaw-ingest-flush"
+        )
+
+        self._journal = None
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        self._replay()
+        self._compact()
+
+        self._thread = threading.Thread(
+            target=self._run, name="openclaw-ingest", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        peer_id: str,
+        session_id: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Journal a message for delivery to Honcho.
+
+        Args:
+            peer_id: Peer that sent the message
+            session_id: Session identifier
+            content: Message content
+            metadata: Optional message metadata
+
+        Returns:
+            The journaled record, including its local ``id``
+        """
+        record = {
+            "op": "add",
+            "id": uuid.uuid4().hex,
+            "peer_id": peer_id,
+            "session_id": session_id,
+            "content": content,
+            "metadata": metadata or {},
+            "created_at": str(datetime.now()),
+        }
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MessageIngestor is closed")
+            self._write(record)
+            self._pending.setdefault(session_id, []).append(record)
+            self._pending_count += 1
+            backlog = len(self._pending[session_id])
+
+        if backlog >= self.batch_size:
+            self._wakeup.set()
+        return record
+
+    def pending(self, session_id: str) -> List[Dict[str, Any]]:
+        """
+        Get messages for a session that Honcho hasn't acknowledged yet.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            Pending records, oldest first
+        """
+        with self._lock:
+            return list(self._pending.get(session_id, []))
+
+    def merge_pending(self, session_id: str, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Append a session's pending messages to messages read from Honcho.
+
+        Gives readers their own writes before the background flush has
+        delivered them. Messages already present (matched by ``id``) are
+        not repeated.
+
+        Args:
+            session_id: Session identifier
+            messages: Message dicts read from Honcho, oldest first
+
+        Returns:
+            ``messages`` followed by the missing pending messages
+        """
+        seen = {msg.get("id") for msg in messages}
+        for record in self.pending(session_id):
+            if record["id"] not in seen:
+                messages.append(record_to_message(record))
+        return messages
+
+    def flush(self) -> bool:
+        """
+        Write every pending message to Honcho now, ignoring backoff.
+
+        Returns:
+            True if nothing is left pending
+        """
+        self._flush(due_only=False)
+        with self._lock:
+            return not self._pending
+
+    def close(self) -> None:
+        """Stop the background thread after a final flush attempt."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        self._pool.shutdown()
+        with self._lock:
+            self._journal.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Get the pending backlog size."""
+        with self._lock:
+            return {
+                "pending": self._pending_count,
+                "sessions": len(self._pending),
+                "retrying": len(self._failures),
+                "dead_letters": self._dead_letters,
+                "journal_lines": self._journal_lines,
+            }
+
+    def _run(self) -> None:
+        """Background loop: flush on a timer or when a batch fills up."""
+        while not self._closed:
+            with self._lock:
+                next_retry = min(self._retry_at.values(), default=None)
+            wait = self.flush_interval
+            if next_retry is not None:
+                wait = min(wait, max(0.0, next_retry - time.monotonic()))
+            self._wakeup.wait(wait)
+            self._wakeup.clear()
+            if self._closed:
+                break
+
+            self._flush(due_only=True)
+
+    def _flush(self, due_only: bool) -> None:
+        """Flush sessions concurrently; with ``due_only``, skip those backing off."""
+        with self._flush_lock:
+            now = time.monotonic()
+            with self._lock:
+                session_ids = [
+                    session_id for session_id in self._pending
+                    if not due_only or self._retry_at.get(session_id, 0) <= now
+                ]
+            # Each session is flushed by one thread at a time
+            list(self._pool.map(self._flush_session, session_ids))
+
+    def _flush_session(self, session_id: str) -> bool:
+        """Write one session's pending messages in batches. Returns False on failure."""
+        while True:
+            with self._lock:
+                batch = self._pending.get(session_id, [])[:self.batch_size]
+            if not batch:
+                return True
+
+            try:
+                peers = {}
+                for record in batch:
+                    if record["peer_id"] not in peers:
+                        peers[record["peer_id"]], session = self.handles.resolve(
+                            record["peer_id"], session_id
+                        )
+                with honcho_call("add_messages"):
+                    session.add_messages([
+                        peers[record["peer_id"]].message(
+                            record["content"],
+                            metadata={**record["metadata"], LOCAL_ID_KEY: record["id"]}
+                        )
+                        for record in batch
+                    ])
+            except Exception as e:
+                self.handles.invalidate(session_id=session_id)
+                with self._lock:
+                    failures = self._failures.get(session_id, 0) + 1
+                    if failures >= self.max_attempts:
+                        self._dead_letter(session_id, batch, e)
+                        continue
+                    self._failures[session_id] = failures
+                    retry_in = min(self.flush_interval * 2 ** failures, self.max_retry_interval)
+                    self._retry_at[session_id] = time.monotonic() + retry_in
+                logger.error(
+                    f"Failed to store {len(batch)} messages for {session_id}: {e}; "
+                    f"retrying in {retry_in:.1f}s"
+                )
+                return False
+
+            with self._lock:
+                self._failures.pop(session_id, None)
+                self._retry_at.pop(session_id, None)
+                self._acknowledge(session_id, batch)
+
+            logger.debug(f"Stored {len(batch)} messages for {session_id}")
+
+    def _acknowledge(self, session_id: str, batch: List[Dict[str, Any]]) -> None:
+        """Drop a session's leading batch from the backlog. Caller must hold the lock."""
+        remaining = self._pending[session_id][len(batch):]
+        if remaining:
+            self._pending[session_id] = remaining
+        else:
+            del self._pending[session_id]
+        self._pending_count -= len(batch)
+        self._write({"op": "ack", "ids": [record["id"] for record in batch]})
+        self._maybe_compact()
+
+    def _dead_letter(self, session_id: str, batch: List[Dict[str, Any]], error: Exception) -> None:
+        """Move a batch that keeps failing out of the backlog. Caller must hold the lock."""
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            for record in batch:
+                f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._failures.pop(session_id, None)
+        self._retry_at.pop(session_id, None)
+        self._dead_letters += len(batch)
+        self._acknowledge(session_id, batch)
+        logger.error(
+            f"Gave up on {len(batch)} messages for {session_id} after "
+            f"{self.max_attempts} attempts ({error}); kept in {self.dead_letter_path}"
+        )
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        """Append one journal line. Caller must hold the lock."""
+        self._journal.write(json.dumps(entry, default=str) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self._journal_lines += 1
+
+    def _maybe_compact(self) -> None:
+        """Compact once everything is acknowledged or the journal is long. Caller must hold the lock."""
+        if self._pending_count and self._journal_lines < self.compact_after:
+            return
+        self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the journal with only pending messages. Caller must hold the lock."""
+        tmp_path = self.journal_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for records in self._pending.values():
+                for record in records:
+                    f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        if self._journal is not None:
+            self._journal.close()
+        os.replace(tmp_path, self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_lines = self._pending_count
+
+    def _replay(self) -> None:
+        """Load unacknowledged messages left in the journal."""
+        if not self.journal_path.exists():
+            return
+
+        records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                self._journal_lines += 1
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write
+                    logger.warning(f"Skipping unreadable journal line in {self.journal_path}")
+                    continue
+
+                if entry.get("op") == "add":
+                    records[entry["id"]] = entry
+                elif entry.get("op") == "ack":
+                    for record_id in entry["ids"]:
+                        records.pop(record_id, None)
+
+        for record in records.values():
+            self._pending.setdefault(record["session_id"], []).append(record)
+        self._pending_count = len(records)
+
+        if records:
+            logger.info(f"Replaying {len(records)} journaled messages")
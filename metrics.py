@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Metrics
+================
+
+Counters and latency histograms for the chat pipeline, rendered in the
+Prometheus text format for ``GET /metrics``.
+
+Recording is lock-free: every thread updates its own cells, and a scrape
+sums the cells of all threads. Cells of threads that have exited are
+folded into one retired set, so servers that start a thread per request
+don't accumulate them.
+
+Usage:
+    from metrics import CHAT_STAGE_SECONDS, REGISTRY
+
+    with CHAT_STAGE_SECONDS.time("generate"):
+        response = llm.generate(messages)
+
+    text = REGISTRY.render()
+"""
+
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+# Threads registered before exited ones are folded into the retired cells
+COMPACT_AFTER = 256
+
+Labels = Tuple[str, ...]
+
+
+class _Metric:
+    """A metric whose cells are kept per thread."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+
+        self._local = threading.local()
+        self._threads: List[Tuple[threading.Thread, Dict[Labels, List[float]]]] = []
+        self._retired: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def _new_cell(self) -> List[float]:
+        raise NotImplementedError
+
+    def _cell(self, labels: Labels) -> List[float]:
+        """Get this thread's cell for ``labels``."""
+        cells = getattr(self._local, "cells", None)
+        if cells is None:
+            cells = self._local.cells = {}
+            with self._lock:
+                self._threads.append((threading.current_thread(), cells))
+                if len(self._threads) > COMPACT_AFTER:
+                    self._compact()
+
+        cell = cells.get(labels)
+        if cell is None:
+            cell = cells[labels] = self._new_cell()
+        return cell
+
+    def _compact(self) -> None:
+        """Fold cells of exited threads into the retired cells. Caller holds the lock."""
+        alive = []
+        for thread, cells in self._threads:
+            if thread.is_alive():
+                alive.append((thread, cells))
+            else:
+                self._merge(self._retired, cells)
+        self._threads = alive
+
+    def _merge(self, into: Dict[Labels, List[float]], cells: Dict[Labels, List[float]]) -> None:
+        for labels, cell in list(cells.items()):
+            total = into.get(labels)
+            if total is None:
+                total = into[labels] = self._new_cell()
+            for i, value in enumerate(cell):
+                total[i] += value
+
+    def collect(self) -> Dict[Labels, List[float]]:
+        """Sum every thread's cells."""
+        with self._lock:
+            self._compact()
+            totals: Dict[Labels, List[float]] = {}
+            self._merge(totals, self._retired)
+            for _, cells in self._threads:
+                self._merge(totals, cells)
+        return totals
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+    def _labels(self, labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, labels))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    kind = "counter"
+
+    def _new_cell(self) -> List[float]:
+        return [0.0]
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Add ``amount`` to the counter for ``labels``."""
+        self._cell(labels)[0] += amount
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{self._labels(labels)} {_number(cell[0])}"
+            for labels, cell in sorted(self.collect().items())
+        ]
+
+
+class Histogram(_Metric):
+    """Histogram of observed values, e.g. latencies in seconds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_cell(self) -> List[float]:
+        # Count per bucket, then the +Inf bucket, then the sum
+        return [0.0] * (len(self.buckets) + 2)
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record one value for ``labels``."""
+        cell = self._cell(labels)
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self, *labels: str, errors: Optional[Counter] = None) -> "_Timer":
+        """
+        Context manager that observes the duration of its block.
+
+        Args:
+            *labels: Label values
+            errors: Counter incremented (with the same labels) if the
+                    block raises
+        """
+        return _Timer(self, labels, errors)
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, cell in sorted(self.collect().items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), cell):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{self.name}_bucket{self._labels(labels, ('le', le))} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {_number(cell[-1])}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {_number(cumulative)}")
+        return lines
+
+
+class _Timer:
+    """Observes the time spent in a ``with`` block."""
+
+    __slots__ = ("histogram", "labels", "errors", "start")
+
+    def __init__(self, histogram: Histogram, labels: Labels, errors: Optional[Counter]):
+        self.histogram = histogram
+        self.labels = labels
+        self.errors = errors
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        if exc_type is not None and self.errors is not None:
+            self.errors.inc(*self.labels)
+
+
+class Gauge:
+    """Gauge read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        read: Callable[[], Dict[Labels, float]],
+        labelnames: Sequence[str] = ()
+    ):
+        """
+        Initialize the gauge.
+
+        Args:
+            name: Metric name
+            description: Help text
+            read: Returns {label values: value}
+            labelnames: Label names
+        """
+        self.name = name
+        self.description = description
+        self.read = read
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, value in sorted(self.read().items()):
+            pairs = ",".join(f'{key}="{_escape(v)}"' for key, v in zip(self.labelnames, labels))
+            lines.append(f"{self.name}{{{pairs}}} {_number(value)}" if pairs else f"{self.name} {_number(value)}")
+        return lines
+
+
+class Registry:
+    """
+    Named metrics, rendered together.
+
+    Thread-safe.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create and register a counter."""
+        return self.register(Counter(name, description, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Create and register a histogram."""
+        return self.register(Histogram(name, description, labelnames, buckets))
+
+    def gauge(
+        self,
+        name: str,
+        description: str,
+        read: Callable[[], Dict[Labels, float]],
+        labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        """Create and register a callback gauge, replacing one of the same name."""
+        return self.register(Gauge(name, description, read, labelnames))
+
+    def register(self, metric: Any) -> Any:
+        """Add a metric, replacing any registered under the same name."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text (content type ``CONTENT_TYPE``)
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Process-wide registry served at /metrics
+REGISTRY = Registry()
+
+CHAT_STAGE_SECONDS = REGISTRY.histogram(
+    "openclaw_chat_stage_seconds",
+    "Time spent in each stage of a chat turn",
+    ["stage"]
+)
+CHAT_TURNS = REGISTRY.counter(
+    "openclaw_chat_turns_total",
+    "Chat turns processed",
+    ["mode"]
+)
+HONCHO_REQUEST_SECONDS = REGISTRY.histogram(
+    "openclaw_honcho_request_seconds",
+    "Latency of Honcho calls",
+    ["call"]
+)
+HONCHO_ERRORS = REGISTRY.counter(
+    "openclaw_honcho_errors_total",
+    "Honcho calls that raised",
+    ["call"]
+)
+
+
+def honcho_call(call: str) -> _Timer:
+    """
+    Time one Honcho call, counting it as an error if it raises.
+
+    Args:
+        call: Call name, e.g. "add_messages"
+    """
+    return HONCHO_REQUEST_SECONDS.time(call, errors=HONCHO_ERRORS)
@@ -15,6 +15,7 @@ Features:
 
 import sys
 import os
+import atexit
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -22,8 +23,12 @@ from datetime import datetime
 sys.path.insert(0, '/home/faisal/.openclaw/workspace/honcho-ai/sdks/python/src')
 from honcho import Honcho
 
-# Optional: Add your LLM client here
-# from your_llm_client import LLMClient
+from honcho_session import SessionRegistry, message_role, tail_messages
+from user_stats import STATS_DIR, UserStatsIndex
+from session_epochs import EPOCHS_DIR, SessionEpochs
+from llm_backend import LLMBackend, backend_from_env
+from context_assembler import DEFAULT_CONTEXT_TOKENS, ContextAssembler
+
 
 
 class OpenClawAgent:
@@ -49,7 +54,11 @@ class OpenClawAgent:
         self,
         workspace_id: str = "openclaw",
         base_url: str = "http://localhost:8002",
-        api_key: str = "openclaw-local-dev"
+        api_key: str = "openclaw-local-dev",
+        stats_path: Optional[str] = None,
+        epochs_path: Optional[str] = None,
+        llm: Optional[LLMBackend] = None,
+        context_tokens: int = DEFAULT_CONTEXT_TOKENS
     ):
         """
         Initialize the OpenClaw agent with Honcho memory.
@@ -58,6 +67,13 @@ class OpenClawAgent:
             workspace_id: Honcho workspace ID
             base_url: Honcho API URL
             api_key: Honcho API key (auth disabled in local setup)
+            stats_path: User statistics index file
+                        (default ~/.openclaw/stats/<workspace_id>-agent.json)
+            epochs_path: Session epoch registry file
+                         (default ~/.openclaw/epochs/<workspace_id>-agent.json)
+            llm: Response generation backend (default: configured from
+                 OPENROUTER_API_KEY / OPENCLAW_LLM_URL, else a demo echo)
+            context_tokens: Token budget for conversation context per turn
         """
         print("🚀 Initializing OpenClaw Agent with Honcho Memory...")
         
@@ -68,8 +84,26 @@ class OpenClawAgent:
             workspace_id=workspace_id
         )
         
-        # Initialize your LLM here
-        # self.llm = LLMClient()
+        # Resolved peer/session handles, so stores skip the setup calls
+        self._handles = SessionRegistry(self.memory)
+        
+        # Conversation context packed into a token budget
+        self._context = ContextAssembler(max_tokens=context_tokens)
+        
+        # Per-user message counts, updated as messages are stored
+        self._stats = UserStatsIndex(
+            stats_path or STATS_DIR / f"{workspace_id}-agent.json"
+        )
+        atexit.register(self._stats.save)
+        
+        # Current session per user; clearing history starts a new epoch
+        self._epochs = SessionEpochs(
+            epochs_path or EPOCHS_DIR / f"{workspace_id}-agent.json"
+        )
+        atexit.register(self._epochs.save)
+        
+        # Response generation
+        self.llm = llm or backend_from_env()
         
         print(f"   ✅ Connected to Honcho at {base_url}")
         print(f"   ✅ Workspace: {workspace_id}")
@@ -102,8 +136,6 @@ class OpenClawAgent:
         prompt = self._build_prompt(context, message)
         
         # Step 4: Get LLM response
-        # response = self.llm.generate(prompt)
-        # For demo, we'll use a simple echo
         response = self._generate_response(prompt, message)
         
         return response
@@ -116,48 +148,43 @@ class OpenClawAgent:
             user_id: User identifier
             message: Message content
         """
-        # Get or create peer (user)
-        peer = self.memory.peer(user_id)
-        
-        # Get or create session
-        session_id = f"{user_id}-session"
-        session = self.memory.session(session_id)
+        # Get linked peer and session handles
+        session_id = self._epochs.session_id(user_id)
+        peer, session = self._handles.resolve(user_id, session_id)
         
-        # Link peer to session (ignore if already linked)
+        # Store message
         try:
-            session.add_peers([peer])
+            stored = session.add_messages([peer.message(message)])
         except Exception:
-            pass
+            self._handles.invalidate(user_id, session_id)
+            raise
         
-        # Store message
-        session.add_messages([peer.message(message)])
+        created_at = stored[0].created_at if stored else datetime.now()
+        self._stats.record(user_id, str(created_at))
     
-    def _get_conversation_context(
-        self,
-        user_id: str,
-        limit: int = 10
-    ) -> str:
+    def _get_conversation_context(self, user_id: str) -> str:
         """
         Get formatted conversation history for context.
         
+        As many recent messages as fit the context token budget are
+        included; oversized messages are clipped.
+        
         Args:
             user_id: User identifier
-            limit: Number of messages to retrieve
             
         Returns:
             Formatted conversation history
         """
-        session_id = f"{user_id}-session"
-        session = self.memory.session(session_id)
+        session_id = self._epochs.session_id(user_id)
+        session = self._handles.session(session_id)
         
+        # Fetch only the messages the budget could possibly hold
         messages = []
-        for msg in session.messages():
+        for msg in tail_messages(session, self._context.max_messages):
             # Determine role from peer_id
-            role = "User" if msg.peer_id else "Assistant"
-            messages.append(f"{role}: {msg.content}")
+            messages.append({"role": message_role(msg.peer_id), "content": msg.content})
         
-        # Return last N messages
-        return "\n".join(messages[-limit:])
+        return self._context.assemble(messages)
     
     def _build_prompt(self, context: str, message: str) -> str:
         """
@@ -183,7 +210,7 @@ Assistant:"""
         """
         Generate response using LLM.
         
-        Replace this with your actual LLM call.
+        Falls back to a demo echo when no LLM backend is configured.
         
         Args:
             prompt: Full prompt with context
@@ -192,8 +219,8 @@ Assistant:"""
         Returns:
             Generated response
         """
-        # TODO: Replace with your LLM
-        # return self.llm.generate(prompt)
+        if self.llm:
+            return self.llm.generate([{"role": "user", "content": prompt}])
         
         # Demo response
         return f"I remember our conversation! You said: '{original_message}'. How can I help you with that?"
@@ -208,10 +235,21 @@ Assistant:"""
         Returns:
             User summary
         """
-        session_id = f"{user_id}-session"
-        session = self.memory.session(session_id)
+        stats = self._stats.get(user_id)
+        if stats is None:
+            # First lookup for this user: count once, then keep it current
+            session_id = self._epochs.session_id(user_id)
+            session = self._handles.session(session_id)
+            
+            message_count = 0
+            first_seen = last_active = None
+            for msg in session.messages():
+                message_count += 1
+                first_seen = first_seen or str(msg.created_at)
+                last_active = str(msg.created_at)
+            stats = self._stats.seed(user_id, message_count, first_seen, last_active)
         
-        message_count = sum(1 for _ in session.messages())
+        message_count = stats["message_count"]
         
         if message_count == 0:
             return f"User {user_id} has no conversation history yet."
@@ -241,6 +279,9 @@ Assistant:"""
         """
         Clear a user's conversation history.
         
+        Honcho messages can't be deleted, so the user moves on to a new,
+        empty session epoch.
+        
         Args:
             user_id: User identifier
             
@@ -248,12 +289,8 @@ Assistant:"""
             True if cleared
         """
         try:
-            # In Honcho, you can create a new session
-            # to effectively "clear" history
-            session_id = f"{user_id}-session-new-{datetime.now().timestamp()}"
-            session = self.memory.session(session_id)
-            peer = self.memory.peer(user_id)
-            session.add_peers([peer])
+            self._epochs.bump(user_id)
+            self._stats.reset(user_id)
             return True
         except Exception as e:
             print(f"Error clearing history: {e}")
@@ -303,7 +340,7 @@ if __name__ == "__main__":
     print("\n" + "=" * 60)
     print("✅ Demo complete!")
     print("\n💡 To use in production:")
-    print("   1. Replace _generate_response() with your LLM")
+    print("   1. Set OPENROUTER_API_KEY (or pass llm=OpenRouterBackend(...))")
     print("   2. Import this class in your OpenClaw main")
     print("   3. Call handle_message() for each user message")
     print("=" * 60)
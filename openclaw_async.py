@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+OpenClaw - Async Interface
+==========================
+
+asyncio counterpart of ``main.OpenClaw`` with the same public surface.
+
+``AsyncOpenClaw.chat`` writes the user message and reads the conversation
+context at the same time, so a turn costs max(store, fetch) + generate
+instead of store + fetch + generate. Blocking Honcho calls run on a
+bounded thread pool (``max_workers`` threads, default ``OPENCLAW_THREADS``
+or 32), which keeps the event loop free to juggle thousands of concurrent
+conversations.
+
+Long-lived connections (e.g. WebSockets) can pass a ``Conversation`` to
+keep the user's recent context between turns instead of fetching it.
+
+Usage:
+    import asyncio
+    from openclaw_async import AsyncOpenClaw
+
+    async def demo():
+        async with AsyncOpenClaw() as openclaw:
+            print(await openclaw.chat("faisal", "Hello!"))
+
+    asyncio.run(demo())
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from keyed_executor import AsyncReservedStream, Reservation
+from main import OpenClaw
+from metrics import CHAT_STAGE_SECONDS, CHAT_TURNS
+
+logger = logging.getLogger(__name__)
+
+# Threads for blocking memory and LLM calls, unless OPENCLAW_THREADS is set
+DEFAULT_THREADS = 32
+
+
+class AsyncOpenClaw:
+    """
+    OpenClaw AI Assistant for asyncio applications.
+
+    Wraps an ``OpenClaw`` instance, sharing its message cache and Honcho
+    handles, and exposes awaitable versions of its public methods. Turns
+    are built from OpenClaw's public turn steps (``reserve_turn``,
+    ``store_message``, ``build_context``, ...).
+
+    Example:
+        >>> openclaw = AsyncOpenClaw()
+        >>> response = await openclaw.chat("user123", "Hello!")
+        >>> history = await openclaw.get_history("user123")
+        >>> await openclaw.close()
+    """
+
+    def __init__(
+        self,
+        openclaw: Optional[OpenClaw] = None,
+        max_workers: Optional[int] = None,
+        **kwargs: Any
+    ):
+        """
+        Initialize AsyncOpenClaw.
+
+        Args:
+            openclaw: Existing OpenClaw to wrap (one is created if omitted)
+            max_workers: Threads for blocking memory and LLM calls, which
+                         bounds the turns in progress at once (default:
+                         OPENCLAW_THREADS, else DEFAULT_THREADS)
+            **kwargs: Passed to OpenClaw when creating one
+        """
+        self.openclaw = openclaw or OpenClaw(**kwargs)
+        self.max_workers = max_workers or int(os.environ.get("OPENCLAW_THREADS", DEFAULT_THREADS))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="openclaw-io"
+        )
+
+    async def __aenter__(self) -> "AsyncOpenClaw":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Wait for in-flight calls and release the worker threads."""
+        await asyncio.get_running_loop().run_in_executor(
+            None, partial(self._executor.shutdown, wait=True)
+        )
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking OpenClaw call on the worker pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def chat(
+        self,
+        user_id: str,
+        message: str,
+        conversation: Optional["Conversation"] = None
+    ) -> str:
+        """
+        Process a user message and return a response.
+
+        The message is stored while the previous conversation is fetched;
+        the new message is then appended to that context locally, so the
+        prompt is the same as ``OpenClaw.chat`` would build. Turns for one
+        user are awaited in order, without holding a worker thread.
+
+        Args:
+            user_id: Unique user identifier
+            message: User's message
+            conversation: Context kept by a long-lived connection; while
+                          nothing else writes to the user, it replaces the
+                          context fetch
+
+        Returns:
+            Assistant's response
+        """
+        logger.info(f"💬 Message from {user_id}: {message[:50]}...")
+        CHAT_TURNS.inc("async")
+
+        start = time.perf_counter()
+        async with self.openclaw.reserve_turn(user_id, asyncio.get_running_loop()):
+            CHAT_STAGE_SECONDS.observe(time.perf_counter() - start, "queue")
+            context = await self._begin_turn(user_id, message, conversation)
+            response = await self._run(
+                self.openclaw.generate_response, user_id, message, context
+            )
+            await self._end_turn(user_id, response, conversation)
+        CHAT_STAGE_SECONDS.observe(time.perf_counter() - start, "turn")
+
+        logger.info(f"🤖 Response: {response[:50]}...")
+
+        return response
+
+    def chat_stream(
+        self,
+        user_id: str,
+        message: str,
+        conversation: Optional["Conversation"] = None
+    ) -> AsyncIterator[str]:
+        """
+        Process a user message and stream the response as it is generated.
+
+        Same turn as ``chat``, with the response generated on the worker
+        pool one chunk at a time. Abandoning the stream closes the
+        generation, so nothing is stored for an unfinished response.
+
+        Call from the event loop. The user's turn is reserved at once, so a
+        full turn queue is reported before any response is sent; always
+        ``aclose()`` the stream, even if it isn't consumed.
+
+        Args:
+            user_id: Unique user identifier
+            message: User's message
+            conversation: Context kept by a long-lived connection (see chat)
+
+        Returns:
+            Async iterator over response text chunks
+
+        Raises:
+            MailboxFull: If too many turns are already queued for the user
+        """
+        logger.info(f"💬 Message from {user_id} (streaming): {message[:50]}...")
+
+        start = time.perf_counter()
+        reservation = self.openclaw.reserve_turn(user_id, asyncio.get_running_loop())
+        CHAT_TURNS.inc("stream")
+        return AsyncReservedStream(
+            self._stream_turn(user_id, message, conversation, reservation, start), reservation
+        )
+
+    async def _stream_turn(
+        self,
+        user_id: str,
+        message: str,
+        conversation: Optional["Conversation"],
+        reservation: Reservation,
+        start: float
+    ) -> AsyncIterator[str]:
+        """Run a streaming turn once its reserved turn comes. See chat_stream."""
+        async with reservation:
+            CHAT_STAGE_SECONDS.observe(time.perf_counter() - start, "queue")
+            context = await self._begin_turn(user_id, message, conversation)
+
+            stream = self.openclaw.generate_stream(user_id, message, context)
+            done = object()
+            chunks = []
+            generate_start = time.perf_counter()
+            try:
+                while True:
+                    chunk = await self._run(next, stream, done)
+                    if chunk is done:
+                        break
+                    if not chunks:
+                        CHAT_STAGE_SECONDS.observe(time.perf_counter() - generate_start, "first_token")
+                    chunks.append(chunk)
+                    yield chunk
+            finally:
+                await self._run(stream.close)
+
+            response = "".join(chunks)
+            await self._end_turn(user_id, response, conversation)
+
+        logger.info(f"🤖 Streamed response: {response[:50]}...")
+
+    async def _begin_turn(
+        self,
+        user_id: str,
+        message: str,
+        conversation: Optional["Conversation"]
+    ) -> str:
+        """
+        Store the user's message and build the turn's context.
+
+        Caller holds the user's turn.
+
+        Returns:
+            Formatted conversation context
+        """
+        openclaw = self.openclaw
+        if not openclaw.memory:
+            return ""
+
+        if conversation is not None and self._is_current(conversation):
+            stored = await self._run(openclaw.store_message, user_id, message)
+            previous = list(conversation.messages)
+            if openclaw.session_id(user_id) != conversation.session_id:
+                previous = []  # Storing started a new segment
+        else:
+            session_id = openclaw.session_id(user_id)
+            stored, fetched = await asyncio.gather(
+                self._run(openclaw.store_message, user_id, message),
+                self._previous_messages(user_id)
+            )
+            previous = fetched or []
+            if openclaw.session_id(user_id) != session_id:
+                previous = []  # Storing started a new segment; the fetch may have read the old one
+            elif stored is not None and stored["id"] is not None:
+                # The fetch may or may not have seen the new message
+                previous = [msg for msg in previous if msg.get("id") != stored["id"]]
+
+            # The store raced the fetch, so the fetch wasn't cached. Holding
+            # the turn, we know the user's newest messages: cache those.
+            if fetched is not None and stored is not None:
+                openclaw.cache_recent(
+                    user_id, previous + [stored],
+                    complete=len(fetched) < openclaw.context_messages
+                )
+
+        previous.append(stored or {"role": "user", "content": message})
+        if conversation is not None:
+            conversation.messages = previous[-openclaw.context_messages:]
+
+        return openclaw.build_context(user_id, previous)
+
+    async def _end_turn(
+        self,
+        user_id: str,
+        response: str,
+        conversation: Optional["Conversation"]
+    ) -> None:
+        """Store the response and bring the connection's context up to date."""
+        openclaw = self.openclaw
+        stored = await self._run(openclaw.store_message, user_id, response, "assistant")
+
+        if conversation is not None and openclaw.memory:
+            conversation.messages.append(stored or {"role": "assistant", "content": response})
+            del conversation.messages[:-openclaw.context_messages]
+            # Nothing else writes to the user while we hold the turn
+            conversation.version = openclaw.history_version(user_id)
+            conversation.session_id = openclaw.session_id(user_id)
+
+    def _is_current(self, conversation: "Conversation") -> bool:
+        """Check that no one else has written to the user since the connection's last turn."""
+        user_id = conversation.user_id
+        return (
+            conversation.version == self.openclaw.history_version(user_id)
+            and conversation.session_id == self.openclaw.session_id(user_id)
+        )
+
+    async def chat_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Process messages for many users at once. See ``OpenClaw.chat_batch``.
+
+        Each user's messages run in order as one task, and all users'
+        tasks run concurrently, bounded by the worker pool.
+
+        Args:
+            items: {"user_id": ..., "message": ...} dicts
+
+        Returns:
+            One result per item, in order
+        """
+        results, groups = self.openclaw.batch_groups(items)
+
+        async def run(user_id: str) -> None:
+            for index, message in groups[user_id]:
+                try:
+                    response = await self.chat(user_id, message)
+                    results[index] = {"user_id": user_id, "message": message, "response": response}
+                except Exception as e:
+                    logger.error(f"Error in batch chat for {user_id}: {e}")
+                    results[index] = {"user_id": user_id, "message": message, "error": str(e)}
+
+        await asyncio.gather(*(run(user_id) for user_id in groups))
+        return results
+
+    async def _previous_messages(self, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Fetch a user's recent messages for context ([] without memory, None on error)."""
+        if not self.openclaw.memory:
+            return []
+
+        try:
+            with CHAT_STAGE_SECONDS.time("context"):
+                return await self._run(
+                    self.openclaw.recent_messages, user_id, self.openclaw.context_messages
+                )
+        except Exception as e:
+            logger.error(f"Failed to get context: {e}")
+            return None
+
+    async def get_history(
+        self,
+        user_id: str,
+        limit: int = 50,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get message history for a user.
+
+        Args:
+            user_id: User identifier
+            limit: Maximum messages
+            before: Cursor; get the messages before it
+            after: Cursor; get the messages after it
+
+        Returns:
+            List of message dicts
+        """
+        return await self._run(self.openclaw.get_history, user_id, limit, before, after)
+
+    async def get_history_page(
+        self,
+        user_id: str,
+        limit: int = 50,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of a user's history. See ``OpenClaw.get_history_page``.
+
+        Args:
+            user_id: User identifier
+            limit: Page size
+            before: Cursor; get the newest messages older than it
+            after: Cursor; get the oldest messages newer than it
+
+        Returns:
+            Dict with "messages", "before" and "after"
+        """
+        return await self._run(self.openclaw.get_history_page, user_id, limit, before, after)
+
+    async def get_user_info(self, user_id: str) -> Dict[str, Any]:
+        """
+        Get information about a user.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            User info dict
+        """
+        return await self._run(self.openclaw.get_user_info, user_id)
+
+    async def clear_history(self, user_id: str) -> bool:
+        """
+        Clear a user's conversation history.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            True if cleared
+        """
+        openclaw = self.openclaw
+        if not openclaw.memory:
+            return False
+
+        try:
+            # Awaited here, like chat turns: a pool thread blocked waiting
+            # for the turn could starve the turn holder of a thread
+            async with openclaw.reserve_turn(user_id, asyncio.get_running_loop()):
+                await self._run(openclaw.start_epoch, user_id)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to clear history: {e}")
+            return False
+
+
+class Conversation:
+    """
+    State a long-lived connection keeps for its user between turns.
+
+    Holds the user's recent messages as of the connection's last turn,
+    so its next turn needs no context fetch unless something else
+    (another connection, the HTTP API, a cleared history) has written to
+    the user since. A few hundred bytes plus the messages, so idle
+    connections are cheap.
+    """
+
+    __slots__ = ("user_id", "messages", "version", "session_id")
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.messages: List[Dict[str, Any]] = []
+        self.version: Optional[int] = None  # Unknown until the first turn
+        self.session_id: Optional[str] = None
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Persistent Index
+=========================
+
+Per-user JSON index kept in memory and shared through one file.
+
+Base of ``UserStatsIndex`` and ``SessionEpochs``. Changes are made in
+memory and marked dirty; the file is written at most every
+``save_interval`` seconds and on ``save()``, never as part of a single
+update. Several processes may share the file: a save writes only the users
+this process changed, merged into the file under a lock, and picks up
+everyone else's changes. That is exact as long as each user is updated by
+one process at a time, as with api_prefork.py's user affinity.
+
+Usage:
+    class Scores(PersistentIndex):
+        what = "scores"
+
+        def add(self, user_id, points):
+            with self._lock:
+                self._users[user_id] = self._users.get(user_id, 0) + points
+                self._changed(user_id)
+            self._maybe_save()
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class PersistentIndex:
+    """
+    In-memory user_id -> entry index persisted to a shared JSON file.
+
+    Subclasses update ``_users`` under ``_lock``, call ``_changed`` for
+    each user they touch, then ``_maybe_save``. All methods are
+    thread-safe.
+    """
+
+    # What the index holds, for log messages
+    what = "index"
+
+    def __init__(self, path: str, save_interval: float = 5.0):
+        """
+        Initialize the index, loading it from ``path`` if it exists.
+
+        Args:
+            path: JSON file the index is persisted to
+            save_interval: Minimum seconds between automatic saves
+        """
+        self.path = Path(path).expanduser()
+        self.save_interval = save_interval
+
+        self._users: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._touched = set()  # Users changed since the last save
+        self._last_save = time.monotonic()
+
+        if self.path.exists():
+            self._users = self._read_file()
+
+    def save(self) -> None:
+        """Merge this process's changes into the index file."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                known = {user_id: self._copy(entry) for user_id, entry in self._users.items()}
+                changed = {user_id: known[user_id] for user_id in self._touched}
+                self._touched = set()
+                self._dirty = False
+                self._last_save = time.monotonic()
+
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path.with_suffix(".lock"), "a") as lock:
+                    if FCNTL_AVAILABLE:
+                        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                    # Start from what we know, so an unreadable file loses nothing
+                    merged = known
+                    merged.update(self._read_file())
+                    merged.update(changed)
+                    tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(merged, f)
+                    os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error(f"Failed to save {self.what} to {self.path}: {e}")
+                with self._lock:
+                    self._touched.update(changed)
+                    self._dirty = True
+                return
+
+            # Take other processes' changes, except to users changed meanwhile
+            with self._lock:
+                for user_id, entry in merged.items():
+                    if user_id not in self._touched:
+                        self._users[user_id] = entry
+
+    def _changed(self, user_id: str) -> None:
+        """Mark a user's entry for the next save. Caller must hold the lock."""
+        self._touched.add(user_id)
+        self._dirty = True
+
+    def _maybe_save(self) -> None:
+        """Save if the last save is older than save_interval."""
+        if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def _read_file(self) -> Dict[str, Any]:
+        """Load the index file as saved by any process, or {} if unreadable."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return self._parse(json.load(f))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Could not load {self.what} from {self.path}: {e}")
+            return {}
+
+    def _parse(self, data: Any) -> Dict[str, Any]:
+        """Convert the file's JSON to entries; subclasses normalize old formats."""
+        if not isinstance(data, dict):
+            raise ValueError("not a JSON object")
+        return data
+
+    @staticmethod
+    def _copy(entry: Any) -> Any:
+        """Snapshot an entry for saving."""
+        return dict(entry) if isinstance(entry, dict) else entry
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Read Cache
+===================
+
+Per-user version tags and a short-lived cache of read results, for
+endpoints that are polled far more often than users write.
+
+Every write to a user (stored message, new segment, cleared history)
+bumps the user's version. The version is cheap to read, so pollers can
+send it back as an ETag and get a 304 without any read being done, and a
+result cached under an older version is never served.
+
+Versions come from one sequence shared by all users, so a user's version
+only ever grows, even after their entry is evicted (they then report the
+highest version evicted so far). Tags also carry a token that is new for
+every process, so a tag handed out before a restart never matches.
+
+Concurrent misses for the same read of the same version share one load
+(see single_flight.py).
+
+Usage:
+    cache = ReadCache(ttl=2.0)
+    cache.bump("faisal")                        # on every write
+    cache.etag("faisal")                        # '"3f9c1a2b-17"'
+    history = cache.fetch("faisal", ("history", 50), load_history)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from single_flight import SingleFlight
+
+# Seconds a cached read result is served for
+DEFAULT_TTL = 2.0
+
+
+class ReadCache:
+    """
+    Version tags per user and a TTL cache of read results.
+
+    Thread-safe.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = 10000,
+        max_users: int = 100000
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a result is served for, unless the user's version
+                 changes first (0 disables result caching)
+            max_entries: Results kept before the oldest are dropped
+            max_users: Users whose version is tracked individually
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_users = max_users
+
+        self._token = os.urandom(4).hex()
+        self._seq = 0
+        self._floor = 0  # Highest version evicted
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._entries: Dict[Tuple[str, Hashable], Tuple[float, int, Any]] = {}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, user_id: str) -> int:
+        """Get a user's current version."""
+        with self._lock:
+            return self._versions.get(user_id, self._floor)
+
+    def etag(self, user_id: str) -> str:
+        """
+        Get a user's current version as a quoted HTTP entity tag.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            Entity tag, e.g. '"3f9c1a2b-17"'
+        """
+        return f'"{self._token}-{self.version(user_id)}"'
+
+    def bump(self, user_id: str) -> None:
+        """
+        Record a write to a user, invalidating their cached results.
+
+        Args:
+            user_id: User identifier
+        """
+        with self._lock:
+            self._seq += 1
+            self._versions.pop(user_id, None)
+            self._versions[user_id] = self._seq
+            while len(self._versions) > self.max_users:
+                _, evicted = self._versions.popitem(last=False)
+                self._floor = max(self._floor, evicted)
+
+    def fetch(self, user_id: str, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        Get a read result, from the cache if the user hasn't changed since.
+
+        The version is read before loading, so a result is never cached
+        under a version newer than the data it reflects. Callers missing
+        at the same time for the same version share one load. Exceptions
+        from ``load`` propagate and nothing is cached.
+
+        Args:
+            user_id: User the result belongs to
+            key: Identifies the read; a tuple starting with, or a string
+                 naming, the kind of read, e.g. ("history", limit)
+            load: Computes the result on a miss
+
+        Returns:
+            The result; shared between callers, so don't modify it
+        """
+        now = time.monotonic()
+        cache_key = (user_id, key)
+
+        with self._lock:
+            version = self._versions.get(user_id, self._floor)
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] > now and entry[1] == version:
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        def load_and_cache() -> Any:
+            value = load()
+            if self.ttl > 0:
+                with self._lock:
+                    self._entries[cache_key] = (now + self.ttl, version, value)
+                    self._prune(now)
+            return value
+
+        read = key[0] if isinstance(key, tuple) else str(key)
+        return self._flights.do(read, (cache_key, version), load_and_cache)
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counts and sizes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "users": len(self._versions),
+            }
+
+    def _prune(self, now: float) -> None:
+        """Keep the results within max_entries. Caller must hold the lock."""
+        if len(self._entries) <= self.max_entries:
+            return
+
+        for key in [key for key, entry in self._entries.items() if entry[0] <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an entity tag.
+
+    Uses weak comparison, as RFC 9110 requires for If-None-Match.
+
+    Args:
+        if_none_match: Header value, or None if absent
+        etag: Current entity tag, quoted
+
+    Returns:
+        True if the client's copy is current (respond 304)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    current = opaque(etag)
+    return any(opaque(tag) == current for tag in if_none_match.split(","))
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Session Epochs
+=======================
+
+Which session holds each user's current conversation.
+
+Every user has an epoch number, 0 until they first clear their history.
+Clearing history bumps the epoch: a dict update, however long the old
+session was.
+
+Within an epoch, conversation is split into segments so that no session
+grows without bound: a new segment starts once the current one holds
+``max_messages`` messages, or when the user comes back after
+``idle_timeout`` seconds. A short summary of the closed segment is carried
+over into the new one, so context isn't lost at the boundary.
+
+Session ids:
+    "<user_id>-session"                    epoch 0, segment 0 (existing history)
+    "<user_id>-session-<epoch>"            later epochs, segment 0
+    "<user_id>-session-<epoch>-s<segment>" later segments ("-<epoch>" is
+                                           omitted in epoch 0)
+
+Reads and writes resolve the session through the registry, so they only
+ever see the newest segment of the current epoch.
+
+The index is kept in memory and persisted to a JSON file at most every
+``save_interval`` seconds and on ``save()`` (OpenClaw.close saves it).
+Several processes may share the file (see persistent_index.py).
+
+Usage:
+    epochs = SessionEpochs("~/.openclaw/epochs/openclaw.json", max_messages=200)
+    epochs.session_id("faisal")   # "faisal-session"
+    epochs.bump("faisal")         # 1
+    epochs.session_id("faisal")   # "faisal-session-1"
+"""
+
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from persistent_index import PersistentIndex
+
+EPOCHS_DIR = Path.home() / ".openclaw" / "epochs"
+
+
+def _session_id(user_id: str, epoch: int, segment: int) -> str:
+    """Build the session id of an epoch and segment."""
+    session_id = f"{user_id}-session-{epoch}" if epoch else f"{user_id}-session"
+    return f"{session_id}-s{segment}" if segment else session_id
+
+
+class SessionEpochs(PersistentIndex):
+    """
+    Persistent per-user session epoch and segment index.
+
+    All methods are thread-safe.
+    """
+
+    what = "session epochs"
+
+    def __init__(
+        self,
+        path: str,
+        max_messages: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        save_interval: float = 5.0
+    ):
+        """
+        Initialize the registry, loading it from ``path`` if it exists.
+
+        Args:
+            path: JSON file the index is persisted to
+            max_messages: Messages per segment (None: no size limit)
+            idle_timeout: Seconds of inactivity that start a new segment
+                          (None: no idle limit)
+            save_interval: Minimum seconds between automatic saves
+        """
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+
+        # user_id -> {"epoch", "segment", "count", "last_at", "summary"};
+        # users not listed are in epoch 0, segment 0
+        super().__init__(path, save_interval)
+
+    def epoch(self, user_id: str) -> int:
+        """Get a user's current epoch."""
+        entry = self._users.get(user_id)
+        return entry["epoch"] if entry else 0
+
+    def session_id(self, user_id: str) -> str:
+        """
+        Get the id of a user's current session.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            Session identifier for the newest segment of the current epoch
+        """
+        entry = self._users.get(user_id)
+        if entry is None:
+            return f"{user_id}-session"
+        return _session_id(user_id, entry["epoch"], entry["segment"])
+
+    def session_ids(self, user_id: str) -> List[str]:
+        """
+        Get the ids of every segment of a user's current epoch.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            Session identifiers, oldest segment first
+        """
+        entry = self._users.get(user_id)
+        if entry is None:
+            return [f"{user_id}-session"]
+        return [
+            _session_id(user_id, entry["epoch"], segment)
+            for segment in range(entry["segment"] + 1)
+        ]
+
+    def summary(self, user_id: str) -> Optional[str]:
+        """Get the summary carried over from the user's earlier segments, if any."""
+        entry = self._users.get(user_id)
+        return entry["summary"] if entry else None
+
+    def due(self, user_id: str) -> Optional[int]:
+        """
+        Check whether the user's next message should start a new segment.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            The current segment number if it should be closed, else None
+        """
+        entry = self._users.get(user_id)
+        if entry is None or not entry["count"]:
+            return None
+
+        full = self.max_messages and entry["count"] >= self.max_messages
+        idle = (
+            self.idle_timeout and entry["last_at"]
+            and time.time() - entry["last_at"] >= self.idle_timeout
+        )
+        return entry["segment"] if full or idle else None
+
+    def rotate(self, user_id: str, segment: int, summary: Optional[str]) -> bool:
+        """
+        Close a segment and start the next one.
+
+        Args:
+            user_id: User identifier
+            segment: Segment to close, as returned by ``due``
+            summary: Summary to carry over into the new segment
+
+        Returns:
+            True if rotated, False if another thread already did
+        """
+        with self._lock:
+            entry = self._users.setdefault(user_id, self._new_entry())
+            if entry["segment"] != segment:
+                return False
+            entry.update(segment=segment + 1, count=0, summary=summary)
+            self._changed(user_id)
+
+        self._maybe_save()
+        return True
+
+    def record(self, user_id: str) -> None:
+        """
+        Count a message stored in the user's current segment.
+
+        Args:
+            user_id: User identifier
+        """
+        with self._lock:
+            entry = self._users.setdefault(user_id, self._new_entry())
+            entry["count"] += 1
+            entry["last_at"] = time.time()
+            self._changed(user_id)
+
+        self._maybe_save()
+
+    def bump(self, user_id: str) -> int:
+        """
+        Start a new, empty session for a user.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            The user's new epoch
+        """
+        with self._lock:
+            entry = self._users.get(user_id) or self._new_entry()
+            epoch = entry["epoch"] + 1
+            self._users[user_id] = self._new_entry(epoch=epoch)
+            self._changed(user_id)
+
+        self._maybe_save()
+        return epoch
+
+    def _parse(self, data: Any) -> Dict[str, Dict[str, Any]]:
+        """Build full entries from the file, including the old epoch-only format."""
+        users = {}
+        for user_id, entry in super()._parse(data).items():
+            if isinstance(entry, int):
+                entry = {"epoch": entry}
+            users[user_id] = self._new_entry(**entry)
+        return users
+
+    @staticmethod
+    def _new_entry(
+        epoch: int = 0,
+        segment: int = 0,
+        count: int = 0,
+        last_at: Optional[float] = None,
+        summary: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build an index entry."""
+        return {
+            "epoch": epoch,
+            "segment": segment,
+            "count": count,
+            "last_at": last_at,
+            "summary": summary,
+        }
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Single Flight
+======================
+
+Coalesces concurrent identical reads.
+
+When several callers ask for the same thing at once (a user's dashboard,
+the gateway and a background job all reading the same history), the
+first one does the backend call and the others wait for its result
+instead of making the same call themselves. Nothing is kept once the call
+returns; caching is up to the caller.
+
+Keys must identify the data exactly, including anything that would make
+an earlier call's result stale (e.g. the user's version), so a caller
+never joins a read that started before its own write.
+
+Usage:
+    flights = SingleFlight()
+    messages = flights.do("recent", (session_id, 200), load_messages)
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from metrics import REGISTRY
+
+READ_LOADS = REGISTRY.counter(
+    "openclaw_read_loads_total",
+    "Reads that called the memory store",
+    ["read"]
+)
+READS_COALESCED = REGISTRY.counter(
+    "openclaw_coalesced_reads_total",
+    "Reads served by joining an identical read already in progress",
+    ["read"]
+)
+
+
+class _Call:
+    """One read in progress and its outcome."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time, sharing its result.
+
+    Thread-safe.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, read: str, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        Get the result of ``load``, joining a call already running for ``key``.
+
+        Exceptions from ``load`` are raised to every caller that shared
+        the call.
+
+        Args:
+            read: Kind of read, for metrics (e.g. "history")
+            key: Identifies the read exactly
+            load: Does the read
+
+        Returns:
+            The result; shared between callers, so don't modify it
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            READS_COALESCED.inc(read)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        READ_LOADS.inc(read)
+        try:
+            call.value = load()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Get the number of calls running."""
+        with self._lock:
+            return len(self._calls)
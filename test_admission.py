@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Admission tests: what each request is charged."""
+from admission import Limits, RateLimiter, Rejected, request_charges
+
+
+def test_request_charges():
+    assert request_charges("alice", None) == {"alice": 1}
+    assert request_charges(None, {"user_id": "bob", "message": "hi"}) == {"bob": 1}
+    assert request_charges(None, {"items": [
+        {"user_id": "alice"}, {"user_id": "bob"}, {"user_id": "alice"}, "junk", {}
+    ]}) == {"alice": 2, "bob": 1}
+    assert request_charges(None, None) == {}
+
+
+def test_batch_charges_its_users():
+    """A batch can't get a user past their own limit."""
+    limits = Limits(RateLimiter(rate=0.001, burst=5), RateLimiter(rate=0.001, burst=1000))
+    batch = {"items": [{"user_id": "alice", "message": "hi"}] * 5}
+    limits.check(None, request_charges(None, batch))
+
+    try:
+        limits.check(None, request_charges(None, batch))
+    except Rejected as e:
+        assert e.reason == "user_rate"
+    else:
+        raise AssertionError("second batch was admitted")
+    limits.check(None, request_charges("bob", None))  # Other users are unaffected
+
+
+def test_batch_larger_than_burst_is_charged_in_full():
+    limits = Limits(RateLimiter(rate=1, burst=5), None)
+    batch = {"items": [{"user_id": "alice", "message": "hi"}] * 100}
+    limits.check(None, request_charges(None, batch))  # From a full bucket
+
+    try:
+        limits.check(None, request_charges("alice", None))
+    except Rejected as e:
+        # 95 tokens of debt to pay off at one per second, then one more
+        assert 95 < e.retry_after <= 96, e.retry_after
+    else:
+        raise AssertionError("request after an oversized batch was admitted")
+
+
+if __name__ == "__main__":
+    print("Testing admission")
+    print("=" * 40)
+
+    test_request_charges()
+    print("   ✓ Request charges")
+
+    test_batch_charges_its_users()
+    print("   ✓ Batches charge each user")
+
+    test_batch_larger_than_burst_is_charged_in_full()
+    print("   ✓ Batches larger than the burst")
+
+    print("\n✅ Admission tests complete!")
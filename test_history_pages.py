@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""History paging tests: cursors across pages, segments and clears."""
+from conftest import run
+
+
+def contents(page: dict) -> list:
+    return [m["content"] for m in page["messages"]]
+
+
+def test_pages_across_segments(new_openclaw):
+    openclaw = new_openclaw(segment_messages=3)
+    for i in range(7):
+        openclaw.store_message("alice", f"m{i}")
+
+    page = openclaw.get_history_page("alice", limit=3)
+    assert contents(page) == ["m4", "m5", "m6"]
+    page = openclaw.get_history_page("alice", limit=3, before=page["before"])
+    assert contents(page) == ["m1", "m2", "m3"]
+    page = openclaw.get_history_page("alice", limit=3, before=page["before"])
+    assert contents(page) == ["m0"]
+    assert page["before"] is None
+
+    newest = openclaw.get_history_page("alice", limit=3)
+    assert contents(openclaw.get_history_page("alice", after=newest["after"])) == []
+    openclaw.store_message("alice", "m7")
+    assert contents(openclaw.get_history_page("alice", after=newest["after"])) == ["m7"]
+    openclaw.close()
+
+
+def test_empty_cursor_is_no_cursor(new_openclaw):
+    openclaw = new_openclaw()
+    openclaw.store_message("alice", "hello")
+
+    assert contents(openclaw.get_history_page("alice", after="")) == ["hello"]
+    assert contents(openclaw.get_history_page("alice", before="")) == ["hello"]
+    openclaw.close()
+
+
+def test_cursor_from_before_clear(new_openclaw):
+    openclaw = new_openclaw()
+    openclaw.store_message("alice", "hello")
+    cursor = openclaw.get_history_page("alice")["after"]
+    openclaw.clear_history("alice")
+
+    try:
+        openclaw.get_history_page("alice", after=cursor)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("stale cursor was accepted")
+    openclaw.close()
+
+
+if __name__ == "__main__":
+    print("Testing history pages")
+    print("=" * 40)
+
+    run(test_pages_across_segments)
+    print("   ✓ Pages across segments")
+
+    run(test_empty_cursor_is_no_cursor)
+    print("   ✓ Empty cursor")
+
+    run(test_cursor_from_before_clear)
+    print("   ✓ Cursor from before a clear")
+
+    print("\n✅ History page tests complete!")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Turn tests: reservations, and full turn queues on the streaming endpoints."""
+import asyncio
+
+import api_server
+from conftest import run
+from keyed_executor import KeyedExecutor, MailboxFull
+from openclaw_async import AsyncOpenClaw
+
+
+def test_reservation_queues_at_once():
+    turns = KeyedExecutor(max_depth=2)
+    first = turns.reserve("alice")
+    second = turns.reserve("alice")
+    try:
+        turns.reserve("alice")
+    except MailboxFull:
+        pass
+    else:
+        raise AssertionError("third reservation was accepted")
+
+    first.cancel()  # Given up unused: the next in line gets the turn
+    with second:
+        assert turns.depth("alice") == 1
+    assert turns.depth("alice") == 0
+
+
+def test_unconsumed_stream_gives_up_its_turn(new_openclaw):
+    openclaw = new_openclaw()
+    stream = openclaw.chat_stream("alice", "hello")
+    assert openclaw._turns.depth("alice") == 1
+    stream.close()
+    assert openclaw._turns.depth("alice") == 0
+    assert openclaw.chat("alice", "hello again")
+    openclaw.close()
+
+
+def test_stream_endpoint_rejects_full_queue(new_openclaw):
+    """A full turn queue is a 429 with Retry-After before the stream starts."""
+    openclaw = new_openclaw()
+    openclaw._turns.max_depth = 1
+    original, api_server._openclaw = api_server._openclaw, openclaw
+    try:
+        with openclaw._turns.turn("alice"):
+            response = api_server.app.test_client().post(
+                "/chat/stream", json={"user_id": "alice", "message": "hi"}
+            )
+        assert response.status_code == 429
+        assert response.headers["Retry-After"]
+
+        response = api_server.app.test_client().post(
+            "/chat/stream", json={"user_id": "alice", "message": "hi"}
+        )
+        assert response.status_code == 200
+        assert b"event: done" in response.data
+        assert openclaw._turns.depth("alice") == 0
+    finally:
+        api_server._openclaw = original
+        openclaw.close()
+
+
+def test_async_stream_rejects_full_queue(new_openclaw):
+    openclaw = new_openclaw()
+    openclaw._turns.max_depth = 1
+
+    async def run():
+        async with AsyncOpenClaw(openclaw, max_workers=2) as client:
+            held = client.chat_stream("alice", "first")
+            try:
+                client.chat_stream("alice", "second")
+            except MailboxFull:
+                pass
+            else:
+                raise AssertionError("second stream was accepted")
+            await held.aclose()  # Never consumed
+            return [chunk async for chunk in client.chat_stream("alice", "third")]
+
+    assert asyncio.run(run())
+    assert openclaw._turns.depth("alice") == 0
+    openclaw.close()
+
+
+if __name__ == "__main__":
+    print("Testing turns")
+    print("=" * 40)
+
+    run(test_reservation_queues_at_once)
+    print("   ✓ Reservations")
+
+    run(test_unconsumed_stream_gives_up_its_turn)
+    print("   ✓ Unconsumed stream")
+
+    run(test_stream_endpoint_rejects_full_queue)
+    print("   ✓ /chat/stream with a full queue")
+
+    run(test_async_stream_rejects_full_queue)
+    print("   ✓ Async stream with a full queue")
+
+    print("\n✅ Turn tests complete!")
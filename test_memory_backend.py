@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""SQLite store tests: pooled connections and chunked history reads."""
+import os
+import tempfile
+import threading
+
+from memory_backend import SQLiteBackend
+
+
+def test_connections_stay_bounded():
+    """Short-lived threads, like Flask's per-request ones, share a few connections."""
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = SQLiteBackend(os.path.join(tmp, "memory.db"), max_connections=4)
+        memory.add_message("alice", "alice-session", "hello")
+
+        errors = []
+
+        def request():
+            try:
+                assert len(memory.recent_messages("alice-session", 10)) == 1
+            except Exception as e:  # noqa: BLE001 - reported below
+                errors.append(e)
+
+        for _ in range(30):
+            threads = [threading.Thread(target=request) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert not errors, errors
+        assert len(memory._connections) <= 4
+        memory.close()
+
+
+def test_iter_messages_in_chunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = SQLiteBackend(os.path.join(tmp, "memory.db"), max_connections=1)
+        memory.ITER_CHUNK = 3
+        for i in range(7):
+            memory.add_message("alice", "alice-session", f"m{i}")
+        memory.add_message("bob", "bob-session", "other")
+
+        messages = memory.iter_messages("alice-session")
+        assert next(messages)["content"] == "m0"
+        # The pool's only connection isn't held by the paused iteration
+        assert len(memory.recent_messages("bob-session", 1)) == 1
+        assert [m["content"] for m in messages] == [f"m{i}" for i in range(1, 7)]
+        memory.close()
+
+
+if __name__ == "__main__":
+    print("Testing the SQLite store")
+    print("=" * 40)
+
+    test_connections_stay_bounded()
+    print("   ✓ Bounded connections")
+
+    test_iter_messages_in_chunks()
+    print("   ✓ Chunked iteration")
+
+    print("\n✅ SQLite store tests complete!")
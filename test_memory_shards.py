@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Shard tests: ring balance, which keys move when nodes change, and routing."""
+import os
+import tempfile
+
+import memory_shards
+from memory_backend import SQLiteBackend
+from memory_shards import HashRing, ShardedBackend, shards_from_env
+
+USERS = [f"user-{i}" for i in range(3000)]
+
+
+def owners(ring: HashRing) -> dict:
+    return {user: ring.node_for(user) for user in USERS}
+
+
+def test_balance():
+    counts = {}
+    for node in owners(HashRing(["a", "b", "c"])).values():
+        counts[node] = counts.get(node, 0) + 1
+    assert sorted(counts) == ["a", "b", "c"]
+    assert min(counts.values()) > len(USERS) / 3 * 0.7, counts
+
+
+def test_add_moves_only_to_new_node():
+    ring = HashRing(["a", "b", "c"])
+    before = owners(ring)
+    ring.add("d")
+    after = owners(ring)
+
+    moved = [user for user in USERS if before[user] != after[user]]
+    assert all(after[user] == "d" for user in moved)
+    assert len(moved) < len(USERS) / 4 * 1.5, len(moved)
+
+
+def test_remove_moves_only_its_keys():
+    ring = HashRing(["a", "b", "c"])
+    before = owners(ring)
+    ring.remove("b")
+    after = owners(ring)
+
+    for user in USERS:
+        if before[user] != "b":
+            assert after[user] == before[user]
+        else:
+            assert after[user] in ("a", "c")
+
+    ring.add("b")
+    assert owners(ring) == before  # Placement depends only on the node names
+
+
+def test_iter_messages_is_lazy():
+    with tempfile.TemporaryDirectory() as tmp:
+        shards = {name: SQLiteBackend(os.path.join(tmp, f"{name}.db")) for name in ("a", "b")}
+        memory = ShardedBackend(shards)
+        for i in range(3):
+            memory.add_message("alice", "alice-session", f"m{i}")
+
+        messages = memory.iter_messages("alice-session")
+        assert memory.stats()[memory.shard_for("alice-session")]["calls"] == 3  # Not read yet
+        assert next(messages)["content"] == "m0"
+        assert [m["content"] for m in messages] == ["m1", "m2"]
+        assert memory.stats()[memory.shard_for("alice-session")]["calls"] == 4
+        memory.close()
+
+
+def test_missing_sdk_falls_back():
+    original = memory_shards.load_honcho
+    os.environ["OPENCLAW_HONCHO_SHARDS"] = "a@http://localhost:1"
+    memory_shards.load_honcho = lambda: None
+    try:
+        assert shards_from_env() is None
+    finally:
+        memory_shards.load_honcho = original
+        del os.environ["OPENCLAW_HONCHO_SHARDS"]
+
+
+if __name__ == "__main__":
+    print("Testing memory shards")
+    print("=" * 40)
+
+    test_balance()
+    print("   ✓ Balance")
+
+    test_add_moves_only_to_new_node()
+    print("   ✓ Adding a node")
+
+    test_remove_moves_only_its_keys()
+    print("   ✓ Removing a node")
+
+    test_iter_messages_is_lazy()
+    print("   ✓ Lazy iteration")
+
+    test_missing_sdk_falls_back()
+    print("   ✓ Missing Honcho SDK")
+
+    print("\n✅ Memory shard tests complete!")
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Message cache tests: buffers, eviction, and fetches racing writes."""
+import asyncio
+import threading
+import time
+
+from conftest import run
+from memory_backend import SQLiteBackend
+from message_cache import MessageCache
+from openclaw_async import AsyncOpenClaw
+
+
+def message(content: str, msg_id: str = None) -> dict:
+    return {"role": "user", "content": content, "created_at": "2026-01-01", "id": msg_id}
+
+
+class BlockingSQLite(SQLiteBackend):
+    """SQLite store whose reads can be held after they've read the database."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.read_done = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def recent_messages(self, session_id, limit):
+        messages = super().recent_messages(session_id, limit)
+        self.read_done.set()
+        self.release.wait()
+        return messages
+
+
+class RacySQLite(SQLiteBackend):
+    """SQLite store where a read overlapping a write sees the database before it."""
+
+    def add_message(self, *args, **kwargs):
+        time.sleep(0.01)
+        return super().add_message(*args, **kwargs)
+
+    def recent_messages(self, session_id, limit):
+        messages = super().recent_messages(session_id, limit)
+        time.sleep(0.05)
+        return messages
+
+
+def user_messages(messages) -> list:
+    return [m["content"] for m in messages if m["role"] == "user"]
+
+
+def test_ring_buffer():
+    cache = MessageCache(messages_per_user=3)
+    assert cache.get("alice", 10) is None
+
+    cache.warm("alice", [message("a"), message("b")], complete=True)
+    assert [m["content"] for m in cache.get("alice", 10)] == ["a", "b"]
+
+    cache.append("alice", message("c"))
+    cache.append("alice", message("d"))
+    # The oldest message fell out, so only reads within the buffer are served
+    assert [m["content"] for m in cache.get("alice", 3)] == ["b", "c", "d"]
+    assert cache.get("alice", 4) is None
+
+
+def test_append_skips_cold_users_and_duplicates():
+    cache = MessageCache()
+    cache.append("alice", message("a", "1"))
+    assert cache.get("alice", 10) is None
+
+    cache.warm("alice", [message("a", "1")], complete=True)
+    cache.append("alice", message("a", "1"))
+    assert len(cache.get("alice", 10)) == 1
+
+
+def test_lru_eviction():
+    big = [message("x" * 1000)]
+    cache = MessageCache(max_bytes=3000)
+    cache.warm("alice", big, complete=True)
+    cache.warm("bob", big, complete=True)
+    cache.get("alice", 1)  # alice is now the most recently used
+    cache.warm("carol", big, complete=True)
+
+    assert cache.get("bob", 1) is None
+    assert cache.get("alice", 1) is not None
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_warm_after_write_is_dropped():
+    cache = MessageCache()
+    since = cache.writes("alice")
+    cache.append("alice", message("new"))  # Not cached: skipped, but counted
+    assert not cache.warm("alice", [message("old")], complete=True, since=since)
+    assert cache.get("alice", 10) is None
+
+    since = cache.writes("alice")
+    cache.invalidate("alice")
+    assert not cache.warm("alice", [message("old")], complete=True, since=since)
+
+    since = cache.writes("alice")
+    assert cache.warm("alice", [message("old"), message("new")], complete=True, since=since)
+    assert len(cache.get("alice", 10)) == 2
+
+
+def test_poll_racing_store(new_openclaw):
+    """A history read that fetched before a store must not cache a history without it."""
+    memory = BlockingSQLite(new_openclaw.path("memory.db"))
+    openclaw = new_openclaw(memory)
+    openclaw.store_message("alice", "old message")
+
+    # The poll reads the database, then stalls before warming the cache
+    memory.release.clear()
+    poll = threading.Thread(target=openclaw.get_history, args=("alice",))
+    poll.start()
+    assert memory.read_done.wait(5)
+
+    openclaw.store_message("alice", "NEW message")
+    memory.release.set()
+    poll.join(5)
+
+    contents = [m["content"] for m in openclaw.recent_messages("alice", 10)]
+    assert contents == ["old message", "NEW message"], contents
+    assert "NEW message" in openclaw._get_context("alice")
+    openclaw.close()
+
+
+def test_clear_racing_fetch(new_openclaw):
+    """A fetch of the cleared session must not be cached as the new one."""
+    memory = BlockingSQLite(new_openclaw.path("memory.db"))
+    openclaw = new_openclaw(memory)
+    openclaw.store_message("alice", "before clear")
+
+    memory.release.clear()
+    poll = threading.Thread(target=openclaw.recent_messages, args=("alice", 10))
+    poll.start()
+    assert memory.read_done.wait(5)
+
+    openclaw.clear_history("alice")
+    memory.release.set()
+    poll.join(5)
+
+    assert openclaw.recent_messages("alice", 10) == []
+    openclaw.close()
+
+
+def test_async_turn_keeps_own_message(new_openclaw):
+    """The async turn stores while it fetches; the stored message must be cached."""
+    openclaw = new_openclaw(RacySQLite(new_openclaw.path("memory.db")))
+    openclaw.store_message("alice", "earlier")
+    openclaw._message_cache.invalidate("alice")
+
+    async def turn():
+        async with AsyncOpenClaw(openclaw, max_workers=4) as client:
+            await client.chat("alice", "remember the code 4711")
+
+    asyncio.run(turn())
+    # Cached from the turn itself, though its fetch raced the store
+    assert "alice" in openclaw._message_cache
+    history = openclaw.get_history("alice")
+    assert user_messages(history) == ["earlier", "remember the code 4711"], history
+    assert len(history) == 3
+    openclaw.close()
+
+
+def test_async_turn_across_rotation(new_openclaw):
+    """A fetch of the closing segment must not be cached as the new segment."""
+    openclaw = new_openclaw(RacySQLite(new_openclaw.path("memory.db")), segment_messages=2)
+    openclaw.store_message("alice", "one")
+    openclaw.store_message("alice", "two")
+    openclaw._message_cache.invalidate("alice")
+
+    async def turn():
+        async with AsyncOpenClaw(openclaw, max_workers=4) as client:
+            await client.chat("alice", "three")
+
+    asyncio.run(turn())
+    assert user_messages(openclaw.recent_messages("alice", 10)) == ["three"]
+    history = openclaw.get_history("alice")
+    assert user_messages(history) == ["one", "two", "three"], history
+    openclaw.close()
+
+
+if __name__ == "__main__":
+    print("Testing the message cache")
+    print("=" * 40)
+
+    for name, test in [
+        ("Ring buffer", test_ring_buffer),
+        ("Write-through", test_append_skips_cold_users_and_duplicates),
+        ("LRU eviction", test_lru_eviction),
+        ("Stale warm dropped", test_warm_after_write_is_dropped),
+        ("Poll racing a store", test_poll_racing_store),
+        ("Fetch racing a clear", test_clear_racing_fetch),
+        ("Async turn keeps its message", test_async_turn_keeps_own_message),
+        ("Async turn across a rotation", test_async_turn_across_rotation),
+    ]:
+        run(test)
+        print(f"   ✓ {name}")
+
+    print("\n✅ Message cache tests complete!")
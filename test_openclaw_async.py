@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""AsyncOpenClaw tests: turns for one user on a small worker pool."""
+import asyncio
+
+from conftest import run
+from openclaw_async import AsyncOpenClaw
+
+
+def test_clears_and_chats_share_the_pool(new_openclaw):
+    """Clears waiting for a user's turn must not hold the threads the turn needs."""
+    openclaw = new_openclaw()
+
+    async def run():
+        async with AsyncOpenClaw(openclaw, max_workers=2) as client:
+            return await asyncio.wait_for(asyncio.gather(
+                client.chat("alice", "hello"),
+                client.clear_history("alice"),
+                client.clear_history("alice"),
+            ), timeout=5)
+
+    response, cleared, cleared_again = asyncio.run(run())
+    assert response and cleared and cleared_again
+    assert openclaw._epochs.epoch("alice") == 2
+    assert openclaw.get_history("alice") == []
+    openclaw.close()
+
+
+def test_turns_run_in_order(new_openclaw):
+    openclaw = new_openclaw()
+
+    async def run():
+        async with AsyncOpenClaw(openclaw, max_workers=2) as client:
+            await asyncio.gather(*(client.chat("alice", f"message {n}") for n in range(5)))
+
+    asyncio.run(run())
+    sent = [m["content"] for m in openclaw.get_history("alice") if m["role"] == "user"]
+    assert sent == [f"message {n}" for n in range(5)], sent
+    openclaw.close()
+
+
+if __name__ == "__main__":
+    print("Testing AsyncOpenClaw")
+    print("=" * 40)
+
+    run(test_clears_and_chats_share_the_pool)
+    print("   ✓ Clears don't starve chat turns")
+
+    run(test_turns_run_in_order)
+    print("   ✓ One user's turns in order")
+
+    print("\n✅ AsyncOpenClaw tests complete!")
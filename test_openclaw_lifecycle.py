@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""OpenClaw lifecycle tests: instances can be collected, and metrics follow the open ones."""
+import gc
+import os
+import re
+import weakref
+
+from conftest import run
+from metrics import REGISTRY
+from session_epochs import SessionEpochs
+
+
+def cache_bytes() -> float:
+    match = re.search(r"^openclaw_message_cache_bytes (\S+)$", REGISTRY.render(), re.M)
+    return float(match.group(1))
+
+
+def test_unreferenced_instance_is_collected(new_openclaw):
+    openclaw = new_openclaw()
+    openclaw.chat("alice", "hello")
+    ref = weakref.ref(openclaw)
+    del openclaw
+    gc.collect()
+    assert ref() is None
+
+    # Its indexes were saved when it went
+    assert "alice" in SessionEpochs(new_openclaw.path("epochs.json"))._users
+    assert os.path.exists(new_openclaw.path("stats.json"))
+
+
+def test_gauges_sum_open_instances(new_openclaw):
+    gc.collect()
+    before = cache_bytes()
+    first, second = new_openclaw(), new_openclaw()
+    first.chat("alice", "hello")
+    second.chat("bob", "hello")
+    both = cache_bytes()
+    assert both == before + first._message_cache.stats()["bytes"] + second._message_cache.stats()["bytes"]
+
+    first.close()
+    assert cache_bytes() == before + second._message_cache.stats()["bytes"]
+    second.close()
+
+
+if __name__ == "__main__":
+    print("Testing the OpenClaw lifecycle")
+    print("=" * 40)
+
+    run(test_unreferenced_instance_is_collected)
+    print("   ✓ Collected when unreferenced")
+
+    run(test_gauges_sum_open_instances)
+    print("   ✓ Gauges over open instances")
+
+    print("\n✅ Lifecycle tests complete!")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Session epoch tests: segments, and processes sharing one index file."""
+import os
+import tempfile
+
+from conftest import run
+from session_epochs import SessionEpochs
+
+
+def test_segments():
+    with tempfile.TemporaryDirectory() as tmp:
+        epochs = SessionEpochs(os.path.join(tmp, "epochs.json"), max_messages=2)
+        assert epochs.session_id("alice") == "alice-session"
+
+        epochs.record("alice")
+        assert epochs.due("alice") is None
+        epochs.record("alice")
+        assert epochs.due("alice") == 0
+
+        assert epochs.rotate("alice", 0, "summary")
+        assert not epochs.rotate("alice", 0, "again")  # Already rotated
+        assert epochs.session_ids("alice") == ["alice-session", "alice-session-s1"]
+        assert epochs.summary("alice") == "summary"
+
+        assert epochs.bump("alice") == 1
+        assert epochs.session_ids("alice") == ["alice-session-1"]
+
+
+def test_shared_file():
+    """Each process's changes survive the other's saves and restarts."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "epochs.json")
+        a = SessionEpochs(path)
+        b = SessionEpochs(path)
+
+        a.bump("alice")
+        b.bump("bob")
+        b.record("bob")
+        a.save()
+        b.save()
+
+        restarted = SessionEpochs(path)
+        assert restarted.epoch("alice") == 1
+        assert restarted.epoch("bob") == 1
+        assert restarted.session_id("bob") == "bob-session-1"
+        assert sorted(os.listdir(tmp)) == ["epochs.json", "epochs.lock"]
+
+
+def test_bump_defers_the_write():
+    """Clearing history is a dict update; the file is written on the save cadence."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "epochs.json")
+        epochs = SessionEpochs(path, max_messages=1)
+        epochs.bump("alice")
+        epochs.record("alice")
+        epochs.rotate("alice", 0, None)
+        assert not os.path.exists(path)
+
+        epochs.save()
+        restarted = SessionEpochs(path)
+        assert restarted.session_id("alice") == "alice-session-1-s1"
+
+
+def test_close_saves_segments(new_openclaw):
+    """Segment sizes recorded since the last periodic save survive a restart."""
+    openclaw = new_openclaw()
+    openclaw.store_message("alice", "one")
+    openclaw.store_message("alice", "two")
+    openclaw.close()
+
+    assert SessionEpochs(new_openclaw.path("epochs.json"), max_messages=2).due("alice") == 0
+
+
+if __name__ == "__main__":
+    print("Testing session epochs")
+    print("=" * 40)
+
+    test_segments()
+    print("   ✓ Segments and epochs")
+
+    test_shared_file()
+    print("   ✓ Shared index file")
+
+    test_bump_defers_the_write()
+    print("   ✓ Deferred writes")
+
+    run(test_close_saves_segments)
+    print("   ✓ Close saves segments")
+
+    print("\n✅ Session epoch tests complete!")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Startup time test: importing OpenClaw must stay cheap."""
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Import-time budgets in milliseconds, for each module's own imports
+BUDGET_MS = {
+    "main": 50,
+    "api_server": 50,
+}
+
+# Third-party frameworks imported first, so they don't count against budgets
+PRELOAD = {
+    "api_server": ["flask"],
+}
+
+# Modules that must not be imported until first use
+DEFERRED = ["honcho", "requests"]
+
+
+def import_time_ms(module: str) -> float:
+    """Import a module in a fresh interpreter and get its cumulative import time."""
+    imports = PRELOAD.get(module, []) + [module]
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {m}" for m in imports)],
+        cwd=HERE, capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S+)$", line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000
+    raise AssertionError(f"no import time reported for {module}")
+
+
+def test_import_budget():
+    for module, budget in BUDGET_MS.items():
+        own = import_time_ms(module)
+        print(f"   {module}: {own:.1f} ms (budget {budget} ms)")
+        assert own <= budget, f"importing {module} took {own:.1f} ms"
+
+
+def test_deferred_imports():
+    code = (
+        "import sys, main; "
+        "main.OpenClaw(stats_path=sys.argv[1]); "
+        f"print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        result = subprocess.run(
+            [sys.executable, "-c", code, os.path.join(tmp, "stats.json")],
+            cwd=HERE, capture_output=True, text=True, check=True
+        )
+    loaded = result.stdout.strip()
+    print(f"   loaded by OpenClaw(): {loaded or 'nothing deferred'}")
+    assert not loaded, f"OpenClaw() imported {loaded}"
+
+
+if __name__ == "__main__":
+    print("Testing OpenClaw startup")
+    print("=" * 40)
+
+    print("\n1. Import time...")
+    test_import_budget()
+    print("   ✓ Within budget")
+
+    print("\n2. Deferred imports...")
+    test_deferred_imports()
+    print("   ✓ Honcho and requests not loaded")
+
+    print("\n✅ Startup test complete!")
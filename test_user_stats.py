@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""User stats tests: counting, and ordering users by activity across time formats."""
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from user_stats import UserStatsIndex, timestamp
+
+
+def test_timestamp_formats():
+    moment = datetime(2026, 2, 12, 10, 0, 0, tzinfo=timezone.utc)
+    assert timestamp("2026-02-12T10:00:00Z") == moment.timestamp()
+    assert timestamp("2026-02-12 10:00:00+00:00") == moment.timestamp()
+    assert timestamp(moment.timestamp()) == moment.timestamp()
+    local = datetime(2026, 2, 12, 10, 0, 0)
+    assert timestamp(str(local)) == local.timestamp()
+    assert timestamp("yesterday") == 0.0
+
+
+def test_most_active_mixes_formats():
+    now = datetime.now().astimezone()
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = UserStatsIndex(os.path.join(tmp, "stats.json"))
+        # Sorted as strings, "T" > " " would put the oldest first
+        stats.record("old", (now - timedelta(hours=2)).isoformat())
+        stats.record("newest", str(datetime.now()))
+        stats.record("middle", (now - timedelta(hours=1)).astimezone(timezone.utc).isoformat(" "))
+        assert stats.most_active(3) == ["newest", "middle", "old"]
+        assert stats.most_active(1) == ["newest"]
+
+
+def test_seed_keeps_newest_activity():
+    now = datetime.now().astimezone()
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = UserStatsIndex(os.path.join(tmp, "stats.json"))
+        recent = str(datetime.now())
+        stats.record("alice", recent)
+        older = (now - timedelta(days=1)).isoformat()
+        assert stats.seed("alice", 10, older, older)["last_active"] == recent
+        assert stats.get("alice")["message_count"] == 10
+
+
+if __name__ == "__main__":
+    print("Testing user stats")
+    print("=" * 40)
+
+    test_timestamp_formats()
+    print("   ✓ Time formats")
+
+    test_most_active_mixes_formats()
+    print("   ✓ Most active across formats")
+
+    test_seed_keeps_newest_activity()
+    print("   ✓ Seeding keeps the newest activity")
+
+    print("\n✅ User stats tests complete!")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+OpenClaw User Statistics
+========================
+
+Per-user message statistics maintained as messages are stored.
+
+``get_user_info`` and ``get_user_summary`` used to derive message counts by
+reading a user's history from Honcho. This index keeps the numbers up to
+date incrementally instead, so looking them up is a dict access. Users
+the index hasn't seen yet (e.g. from before it existed) are counted from
+Honcho once and then tracked from there.
+
+The index is persisted to a JSON file, saved at most every
+``save_interval`` seconds and on ``save()``. Several processes may share
+the file (see persistent_index.py).
+
+Usage:
+    stats = UserStatsIndex("~/.openclaw/stats/openclaw.json")
+    stats.record("faisal", "2026-02-12 10:00:00")
+    stats.get("faisal")
+    # {"message_count": 1, "first_seen": "...", "last_active": "..."}
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from persistent_index import PersistentIndex
+
+STATS_DIR = Path.home() / ".openclaw" / "stats"
+
+
+def timestamp(value: Any) -> float:
+    """
+    Convert a message time to seconds since the epoch, for comparing.
+
+    Times come as local ``str(datetime.now())`` strings from the journal
+    and SQLite, as timezone-aware strings (with "T" or " ") from Honcho,
+    and as epoch numbers; their strings don't sort together.
+
+    Args:
+        value: Time in any of those forms
+
+    Returns:
+        Epoch seconds (naive times are local), or 0.0 if unparseable
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).strip()).timestamp()
+    except (TypeError, ValueError, OverflowError, OSError):
+        return 0.0
+
+
+class UserStatsIndex(PersistentIndex):
+    """
+    Persistent per-user message count, first-seen and last-active times.
+
+    Entries are {"message_count", "first_seen", "last_active", "seeded"}.
+    All methods are thread-safe.
+    """
+
+    what = "user stats"
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a user's statistics.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            Dict with message_count, first_seen and last_active, or None if
+            the user has never been counted and needs seeding
+        """
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None or not entry["seeded"]:
+                return None
+            return {
+                "message_count": entry["message_count"],
+                "first_seen": entry["first_seen"],
+                "last_active": entry["last_active"],
+            }
+
+    def record(self, user_id: str, created_at: str) -> None:
+        """
+        Count a newly stored message.
+
+        Args:
+            user_id: User identifier
+            created_at: When the message was stored
+        """
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = self._users[user_id] = {
+                    "message_count": 0,
+                    "first_seen": created_at,
+                    "last_active": None,
+                    "seeded": False,
+                }
+            if entry["first_seen"] is None:
+                entry["first_seen"] = created_at
+            entry["message_count"] += 1
+            entry["last_active"] = created_at
+            self._changed(user_id)
+
+        self._maybe_save()
+
+    def seed(
+        self,
+        user_id: str,
+        message_count: int,
+        first_seen: Optional[str],
+        last_active: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Set a user's statistics from a full count of their history.
+
+        Args:
+            user_id: User identifier
+            message_count: Total messages
+            first_seen: Time of the oldest message
+            last_active: Time of the newest message
+
+        Returns:
+            The user's statistics, as from ``get``
+        """
+        with self._lock:
+            entry = self._users.get(user_id) or {}
+            newest = max(
+                (t for t in (last_active, entry.get("last_active")) if t),
+                key=timestamp,
+                default=None
+            )
+            self._users[user_id] = {
+                "message_count": message_count,
+                "first_seen": first_seen,
+                "last_active": newest,
+                "seeded": True,
+            }
+            self._changed(user_id)
+
+        self._maybe_save()
+        return self.get(user_id)
+
+    def reset(self, user_id: str) -> None:
+        """
+        Zero a user's statistics after their history was cleared.
+
+        Args:
+            user_id: User identifier
+        """
+        with self._lock:
+            self._users[user_id] = {
+                "message_count": 0,
+                "first_seen": None,
+                "last_active": None,
+                "seeded": True,
+            }
+            self._changed(user_id)
+
+        self._maybe_save()
+
+    def most_active(self, limit: int) -> List[str]:
+        """
+        Get the users who were active most recently.
+
+        Args:
+            limit: Most users to return
+
+        Returns:
+            User ids, most recently active first
+        """
+        with self._lock:
+            active = [
+                (timestamp(entry["last_active"]), user_id)
+                for user_id, entry in self._users.items()
+                if entry.get("last_active")
+            ]
+        active.sort(reverse=True)
+        return [user_id for _, user_id in active[:limit]]